@@ -0,0 +1,278 @@
+import argparse
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource   # Unix only; peak RSS is not reported on Windows
+except ImportError:
+    resource = None
+
+# Configuration
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(SRC_DIR, "transformation"))
+from arrow_io import arrow_path, count_rows as count_arrow_rows
+
+RESULTS_DIR = "logs/benchmarks"
+DEFAULT_SCALE_FACTORS = [1, 10]
+BASE_TRANSACTIONS = 10000   # Scale factor 1 = 10k POS rows
+REGRESSION_THRESHOLD = 0.20  # 20% slower than baseline = regression
+MIN_REGRESSION_SECONDS = 0.05  # Ignore jitter on stages that finish in milliseconds
+
+# Stage -> (module dir, module, functions, input files used for rows/bytes, files reset before run).
+# SCD is left out: it applies a fixed update and doesn't scale with the dataset.
+STAGES = [
+    ("silver", "transformation", "process_silver_layer", ["run_silver_transformation"],
+     ["data/silo_pos_transactions.csv"], []),
+    ("gold", "transformation", "gold_kpi_logic", ["generate_gold_layer"],
+     ["data/silver_pos_transactions.csv"], []),
+    ("facts", "transformation", "fact_builder", ["build_fact_sales", "build_fact_inventory"],
+     ["data/silver_pos_transactions.csv", "data/silver_warehouse.csv"], []),
+    ("parquet", "transformation", "parquet_writer", ["write_fact_sales_parquet", "write_fact_inventory_parquet"],
+     ["data/fact_sales.csv", "data/fact_inventory.csv"], ["data/gold_parquet"]),
+    ("forecast", "models", "forecasting_engine", ["generate_forecast", "generate_series_forecast"],
+     ["data/gold_daily_sales.csv", "data/silver_pos_transactions.csv"], ["data/forecast_model_state.json"]),
+]
+
+
+def generate_dataset(work_dir, scale_factor, seed=42):
+    """
+    Writes a synthetic Bronze dataset (same schema and error mix as
+    generate_mock_data.py) sized by scale factor. Vectorized so SF100 is quick.
+    """
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(work_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+
+    n_txn = BASE_TRANSACTIONS * scale_factor
+    n_products = 200
+    n_stores = 20
+    n_customers = 1000 * scale_factor
+
+    # Products
+    prices = rng.uniform(100, 5000, n_products).round(2)
+    pd.DataFrame({
+        "product_id": [f"P{i:03d}" for i in range(1, n_products + 1)],
+        "product_name": [f"Product {i}" for i in range(1, n_products + 1)],
+        "category": rng.choice(['Electronics', 'Clothing', 'Home', 'Grocery'], n_products),
+        "price": prices,
+        "supplier": "Bench Supplier",
+    }).to_csv(os.path.join(data_dir, "dim_products.csv"), index=False)
+
+    # POS transactions (2% negative prices, 2% future dates, 1% duplicates)
+    product_idx = rng.integers(0, n_products, n_txn)
+    qty = rng.integers(1, 6, n_txn)
+    price = np.where(rng.random(n_txn) < 0.02, -prices[product_idx], prices[product_idx])
+    now = pd.Timestamp.now().floor("s")
+    offsets = rng.integers(-30 * 86400, 0, n_txn)
+    future = rng.random(n_txn) < 0.02
+    offsets[future] = rng.integers(86400, 5 * 86400, future.sum())
+
+    df_pos = pd.DataFrame({
+        "transaction_id": [f"T{i:09d}" for i in range(n_txn)],
+        "store_id": np.char.add("S", np.char.zfill(rng.integers(1, n_stores + 1, n_txn).astype(str), 3)),
+        "product_id": np.char.add("P", np.char.zfill((product_idx + 1).astype(str), 3)),
+        "quantity": qty,
+        "total_amount": (price * qty).round(2),
+        "payment_mode": rng.choice(['UPI', 'Credit Card', 'Cash', 'Debit Card'], n_txn),
+        "timestamp": now + pd.to_timedelta(offsets, unit="s"),
+        "customer_id": np.char.add("C", np.char.zfill(rng.integers(1, n_customers + 1, n_txn).astype(str), 3)),
+    })
+    df_pos = pd.concat([df_pos, df_pos.sample(frac=0.01, random_state=seed)], ignore_index=True)
+    df_pos.to_csv(os.path.join(data_dir, "silo_pos_transactions.csv"), index=False)
+
+    # Warehouse stock
+    warehouses = np.repeat(['Mumbai_WH', 'Delhi_WH', 'Bangalore_WH'], n_products)
+    pd.DataFrame({
+        "warehouse_id": warehouses,
+        "product_id": np.tile([f"P{i:03d}" for i in range(1, n_products + 1)], 3),
+        "stock_level": rng.integers(0, 200, len(warehouses)),
+        "last_restocked": (now - pd.to_timedelta(rng.integers(0, 180, len(warehouses)), unit="D")).date,
+    }).to_csv(os.path.join(data_dir, "silo_warehouse.csv"), index=False)
+
+    return len(df_pos)
+
+
+def resolve_input(path):
+    """Inputs are declared by CSV name; stages hand off the Arrow sibling when present."""
+    return arrow_path(path) if os.path.isfile(arrow_path(path)) else path
+
+
+def count_rows(paths):
+    """Data rows across inputs (CSV header excluded)."""
+    rows = 0
+    for path in map(resolve_input, paths):
+        if path.endswith(".arrow"):
+            rows += count_arrow_rows(path)
+        elif os.path.isfile(path):
+            with open(path, "rb") as f:
+                rows += max(sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b"")) - 1, 0)
+    return rows
+
+
+def total_bytes(paths):
+    return sum(os.path.getsize(p) for p in map(resolve_input, paths) if os.path.isfile(p))
+
+
+def _run_stage_child(work_dir, module_dir, module_name, functions, queue):
+    """Runs one stage in a fresh interpreter so peak RSS belongs to that stage alone."""
+    os.chdir(work_dir)
+    sys.path.insert(0, os.path.join(SRC_DIR, module_dir))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        module = __import__(module_name)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        for fn in functions:
+            getattr(module, fn)()
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_mb = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    queue.put({"wall_s": wall, "cpu_s": cpu, "peak_rss_mb": peak_mb})
+
+
+def run_stage(work_dir, stage, repeat):
+    name, module_dir, module_name, functions, inputs, resets = stage
+    input_paths = [os.path.join(work_dir, p) for p in inputs]
+    rows_in, bytes_in = count_rows(input_paths), total_bytes(input_paths)
+
+    ctx = mp.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        for reset in resets:
+            path = os.path.join(work_dir, reset)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_stage_child, args=(work_dir, module_dir, module_name, functions, queue))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            raise RuntimeError(f"Stage '{name}' failed with exit code {proc.exitcode}")
+        runs.append(queue.get())
+
+    best = min(runs, key=lambda r: r["wall_s"])
+    peaks = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+    return {
+        "stage": name,
+        "rows_in": rows_in,
+        "bytes_in": bytes_in,
+        "wall_s": round(best["wall_s"], 4),
+        "cpu_s": round(best["cpu_s"], 4),
+        "peak_rss_mb": round(max(peaks), 1) if peaks else None,
+        "rows_per_sec": round(rows_in / best["wall_s"], 1) if best["wall_s"] > 0 else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(scale_factors, repeat=1, stages=None):
+    print("⏱️ STARTING: Pipeline Benchmark Suite...")
+    selected = [s for s in STAGES if stages is None or s[0] in stages]
+    results = []
+
+    for sf in scale_factors:
+        work_dir = tempfile.mkdtemp(prefix=f"retailsetu_bench_sf{sf}_")
+        try:
+            rows = generate_dataset(work_dir, sf)
+            print(f"   - SF{sf}: generated {rows} POS rows")
+            for stage in selected:
+                result = run_stage(work_dir, stage, repeat)
+                result["scale_factor"] = sf
+                results.append(result)
+                peak = f"{result['peak_rss_mb']:>7.1f} MB" if result["peak_rss_mb"] is not None else "    n/a   "
+                print(f"   - SF{sf} {result['stage']:<8} {result['wall_s']:>8.3f}s  "
+                      f"{peak}  {result['rows_per_sec'] or 0:>12,.0f} rows/s")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "scale_factors": scale_factors,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares wall time per (stage, scale factor). Returns the regressions.
+    """
+    base = {(r["stage"], r["scale_factor"]): r for r in baseline["results"]}
+    regressions = []
+
+    print(f"\n📊 Comparing {current['meta']['commit']} against {baseline['meta']['commit']}:")
+    for r in current["results"]:
+        key = (r["stage"], r["scale_factor"])
+        if key not in base or not base[key]["wall_s"]:
+            continue
+        ratio = r["wall_s"] / base[key]["wall_s"]
+        regressed = ratio > 1 + threshold and r["wall_s"] - base[key]["wall_s"] > MIN_REGRESSION_SECONDS
+        flag = "❌ REGRESSION" if regressed else "✅"
+        print(f"   - SF{key[1]} {key[0]:<8} {base[key]['wall_s']:>8.3f}s -> {r['wall_s']:>8.3f}s  x{ratio:.2f}  {flag}")
+        if regressed:
+            regressions.append({"stage": key[0], "scale_factor": key[1], "ratio": round(ratio, 3)})
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retail Setu pipeline benchmark suite")
+    parser.add_argument("--scale-factors", type=int, nargs="+", default=DEFAULT_SCALE_FACTORS)
+    parser.add_argument("--stages", nargs="+", choices=[s[0] for s in STAGES])
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage (best wall time is kept)")
+    parser.add_argument("--output", help="Result JSON path (default: logs/benchmarks/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.scale_factors, args.repeat, args.stages)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark results saved: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare_results(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
+import sqlite3
+import sys
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "transformation"))
+from gold_publisher import current_snapshot_dir, resolve_gold_path
+from arrow_io import load_table
+from silver_store import SILVER_DB, recent_transactions
+
 # --------------------------------------------------
 # PAGE CONFIG
 # --------------------------------------------------
@@ -26,25 +33,48 @@ if "auto_refresh" not in st.session_state:
 # SAFE LOAD FUNCTION
 # --------------------------------------------------
 def safe_load(path):
+    # Missing/empty files are expected before the first pipeline run.
+    # Live (appended) files can also end mid-row while a writer is busy.
+    # Stage outputs are memory-mapped from their Arrow file when present.
     try:
-        return pd.read_csv(path)
-    except:
+        return load_table(path)
+    except (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError):
         return pd.DataFrame()
 
 # --------------------------------------------------
 # LOAD ALL DATA
 # --------------------------------------------------
-df_daily = safe_load(f"{DATA_DIR}/gold_daily_sales.csv")
-df_forecast = safe_load(f"{DATA_DIR}/gold_sales_forecast.csv")
-df_monthly = safe_load(f"{DATA_DIR}/gold_monthly_sales.csv")
-df_top = safe_load(f"{DATA_DIR}/gold_top_products.csv")
-df_inventory = safe_load(f"{DATA_DIR}/gold_inventory_health.csv")
-df_turnover = safe_load(f"{DATA_DIR}/gold_inventory_turnover.csv")
-df_seasonal = safe_load(f"{DATA_DIR}/gold_seasonal_trend.csv")
-df_customer_metrics = safe_load(f"{DATA_DIR}/gold_customer_metrics.csv")
-df_basket = safe_load(f"{DATA_DIR}/gold_market_basket.csv")
-df_recent = safe_load(f"{DATA_DIR}/silver_pos_transactions.csv")
-df_customers = safe_load(f"{DATA_DIR}/dim_customers_scd2.csv")
+# Pin one published Gold version for the whole render (no torn reads)
+SNAPSHOT_DIR = current_snapshot_dir()
+
+def load_gold(filename):
+    return safe_load(resolve_gold_path(filename, SNAPSHOT_DIR))
+
+df_daily = load_gold("gold_daily_sales.csv")
+df_forecast = load_gold("gold_sales_forecast.csv")
+df_monthly = load_gold("gold_monthly_sales.csv")
+df_top = load_gold("gold_top_products.csv")
+df_inventory = load_gold("gold_inventory_health.csv")
+df_turnover = load_gold("gold_inventory_turnover.csv")
+df_seasonal = load_gold("gold_seasonal_trend.csv")
+df_customer_metrics = load_gold("gold_customer_metrics.csv")
+df_basket = load_gold("gold_market_basket.csv")
+df_rfm = load_gold("gold_customer_rfm.csv")
+df_retention = load_gold("gold_cohort_retention.csv")
+df_live_top = load_gold("gold_live_top_products.csv")
+df_live_cardinality = load_gold("gold_live_cardinality.csv")
+def load_recent_transactions(limit=10):
+    # Indexed lookup in the Silver store; full CSV read only as a fallback
+    if os.path.exists(SILVER_DB):
+        try:
+            return recent_transactions(limit).iloc[::-1]
+        except (sqlite3.Error, pd.errors.DatabaseError):
+            pass
+    return safe_load(f"{DATA_DIR}/silver_pos_transactions.csv").tail(limit)
+
+df_recent = load_recent_transactions()
+df_customers = load_gold("dim_customers_scd2.csv")
+df_stock_alerts = safe_load(f"{DATA_DIR}/stream_stock_alerts.csv")
 
 # --------------------------------------------------
 # HEADER
@@ -140,6 +170,27 @@ with tab1:
             fig_top = px.bar(df_top.head(10), x="product_name", y="quantity", title="Top Products")
             st.plotly_chart(fig_top, use_container_width=True)
 
+    if not df_live_top.empty or not df_live_cardinality.empty:
+        st.subheader("📐 Live Stream (Sketched)")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            if not df_live_cardinality.empty:
+                overall = df_live_cardinality[df_live_cardinality["scope"] == "ALL"].set_index("metric")["estimate"]
+                st.metric("Distinct Customers (≈)", f"{overall.get('distinct_customers', 0):,.0f}")
+                st.metric("Orders (≈)", f"{overall.get('distinct_orders', 0):,.0f}")
+                per_store = df_live_cardinality[df_live_cardinality["scope"] != "ALL"]
+                if not per_store.empty:
+                    fig_dc = px.bar(per_store, x="scope", y="estimate", title="Distinct Customers per Store")
+                    st.plotly_chart(fig_dc, use_container_width=True)
+
+        with col2:
+            if not df_live_top.empty:
+                fig_lt = px.bar(df_live_top.head(10), x="product_id", y="est_quantity",
+                                hover_data=["min_quantity", "guaranteed"], title="Live Top Products")
+                st.plotly_chart(fig_lt, use_container_width=True)
+
 # ------------------ OPERATIONS ------------------
 with tab2:
 
@@ -150,6 +201,10 @@ with tab2:
         fig_s = px.line(df_seasonal, x="Month", y="Total_Quantity_Sold", title="Seasonal Demand Trend")
         st.plotly_chart(fig_s, use_container_width=True)
 
+    if not df_stock_alerts.empty:
+        st.subheader("🚨 Live Stock Alerts")
+        st.dataframe(df_stock_alerts.tail(10).iloc[::-1], use_container_width=True)
+
     if not df_inventory.empty:
         st.subheader("Inventory Health")
         st.dataframe(df_inventory.head(10), use_container_width=True)
@@ -172,6 +227,29 @@ with tab3:
             fig_clv = px.bar(top_clv, x="customer_id", y="total_spent", title="Top CLV Customers")
             st.plotly_chart(fig_clv, use_container_width=True)
 
+    if not df_retention.empty or not df_rfm.empty:
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            if not df_retention.empty:
+                matrix = df_retention.pivot(index="cohort", columns="period_index", values="retention_rate")
+                fig_ret = px.imshow(
+                    matrix,
+                    text_auto=".0%",
+                    color_continuous_scale="Blues",
+                    labels=dict(x="Months Since First Purchase", y="Cohort", color="Retention"),
+                    title="Cohort Retention"
+                )
+                st.plotly_chart(fig_ret, use_container_width=True)
+
+        with col2:
+            if not df_rfm.empty:
+                segments = df_rfm["segment"].value_counts().reset_index()
+                segments.columns = ["Segment", "Customers"]
+                fig_seg = px.bar(segments, x="Segment", y="Customers", title="RFM Segments")
+                st.plotly_chart(fig_seg, use_container_width=True)
+
     if not df_basket.empty:
         st.subheader("Market Basket Insights")
         st.dataframe(df_basket.head(10), use_container_width=True)
@@ -185,7 +263,7 @@ tab_live, tab_scd = st.tabs(["⚡ Live Transactions", "🕰️ Customer History
 
 with tab_live:
     if not df_recent.empty:
-        st.dataframe(df_recent.tail(10), use_container_width=True)
+        st.dataframe(df_recent, use_container_width=True)
     else:
         st.info("Waiting for transactions...")
 
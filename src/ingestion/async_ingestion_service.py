@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "transformation"))
+from arrow_io import write_json_atomic
+from bronze_io import tail_csv, part_path
+
+# Configuration
+DATA_DIR = "data"
+BRONZE_DIR = f"{DATA_DIR}/bronze"
+POS_FILE = f"{DATA_DIR}/silo_pos_transactions.csv"
+WAREHOUSE_FILE = f"{DATA_DIR}/silo_warehouse.csv"
+WEB_LOGS_FILE = f"{DATA_DIR}/silo_web_logs.json"
+TAIL_STATE_FILE = f"{BRONZE_DIR}/_pos_tail_state.json"  # Committed POS silo offset (survives restarts)
+
+HOST = "127.0.0.1"
+PORT = 8765
+QUEUE_MAXSIZE = 100           # Batches buffered per source before producers wait
+MAX_BATCH_RECORDS = 5000      # Micro-batch size that triggers a Bronze commit
+MAX_BATCH_DELAY = 1.0         # Seconds a micro-batch may wait before committing
+POLL_INTERVAL = 0.5           # Seconds between checks of the file silos
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+# Source -> Bronze sink. Store posts and the POS file land in the same table.
+# Silver reads only the store_api parts: pos_file parts are an archive of the
+# silo (for replay), and Silver tails the silo itself.
+SOURCES = {
+    "pos_file": "pos",
+    "store_api": "pos",
+    "warehouse": "warehouse",
+    "web_logs": "web_logs",
+}
+# Snapshot sources commit each changed snapshot whole, as one part in this format
+SNAPSHOT_FORMATS = {"warehouse": "csv", "web_logs": "jsonl"}
+
+
+class IngestionService:
+    """
+    Concurrent intake from every silo. Each source has its own bounded queue
+    and committer, so a slow source only ever stalls itself: a full queue
+    makes that source's producer wait (and store clients wait for their 202).
+    """
+
+    def __init__(self, host=HOST, port=PORT, bronze_dir=BRONZE_DIR):
+        self.host = host
+        self.port = port
+        self.bronze_dir = bronze_dir
+        self.queues = {name: asyncio.Queue(maxsize=QUEUE_MAXSIZE) for name in SOURCES}
+        self.stats = {name: 0 for name in SOURCES}
+        self._tasks = []
+        self._server = None
+        self._seq = 0
+
+    # ------------------------
+    # Lifecycle
+    # ------------------------
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        self._tasks = [asyncio.create_task(self._committer(name)) for name in SOURCES]
+        self._tasks += [
+            asyncio.create_task(self._tail_pos_file()),
+            asyncio.create_task(self._watch_snapshot("warehouse", WAREHOUSE_FILE, _read_warehouse)),
+            asyncio.create_task(self._watch_snapshot("web_logs", WEB_LOGS_FILE, _read_web_logs)),
+        ]
+        print(f"🛰️ Ingestion service listening on http://{self.host}:{self.port}/transactions")
+
+    async def stop(self):
+        """Stops intake, then commits whatever is still queued."""
+        self._server.close()
+        await self._server.wait_closed()
+        for name in SOURCES:
+            await self.queues[name].join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ------------------------
+    # Sources
+    # ------------------------
+    async def _tail_pos_file(self):
+        """
+        Follows the POS silo from a byte offset; only complete new lines are read.
+        The offset travels with each batch and is saved once that batch is in
+        Bronze, so a restart resumes instead of re-copying the whole silo.
+        """
+        tail = load_tail_state()
+        offset, header = tail["offset"], tail["header"]
+        while True:
+            if os.path.exists(POS_FILE) and os.path.getsize(POS_FILE) > offset:
+                # Strings only: the archive part keeps the silo's values as written
+                df, offset, header = await asyncio.to_thread(tail_csv, POS_FILE, offset, header, str)
+                if not df.empty:
+                    rows = df.to_dict("records")
+                    await self.queues["pos_file"].put((rows, {"offset": offset, "header": header}))
+            elif os.path.exists(POS_FILE) and os.path.getsize(POS_FILE) < offset:
+                offset, header = 0, None  # File was replaced: start over
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _watch_snapshot(self, name, path, reader):
+        """
+        Snapshot silos (warehouse, web logs) are re-read whenever they change
+        and committed whole, so one Bronze part is always one full snapshot.
+        """
+        last_mtime = None
+        while True:
+            if os.path.exists(path) and os.path.getmtime(path) != last_mtime:
+                last_mtime = os.path.getmtime(path)
+                records = await asyncio.to_thread(reader, path)
+                await self.queues[name].put((records, None))
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _handle_connection(self, reader, writer):
+        """Minimal HTTP/1.1 endpoint: POST /transactions with a JSON list of records."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await _respond(writer, 413, {"error": "batch too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                if method != "POST" or path != "/transactions":
+                    await _respond(writer, 404, {"error": "not found"})
+                else:
+                    try:
+                        records = json.loads(body)
+                        if isinstance(records, dict):
+                            records = records.get("transactions", [])
+                    except json.JSONDecodeError:
+                        await _respond(writer, 400, {"error": "invalid JSON"})
+                        continue
+
+                    # Reject malformed batches up front; a bad batch must never reach a committer
+                    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                        await _respond(writer, 400, {"error": "expected a JSON list of transaction objects"})
+                        continue
+
+                    # Backpressure: the store waits here while the queue is full
+                    await self.queues["store_api"].put((records, None))
+                    await _respond(writer, 202, {"accepted": len(records)})
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # ------------------------
+    # Bronze commits
+    # ------------------------
+    async def _committer(self, name):
+        """Drains one source queue into micro-batches and commits each to Bronze."""
+        queue = self.queues[name]
+        while True:
+            batches = [await queue.get()]
+            size = len(batches[0][0])
+            deadline = time.monotonic() + MAX_BATCH_DELAY
+
+            while size < MAX_BATCH_RECORDS:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batches.append(batch)
+                size += len(batch[0])
+
+            if name in SNAPSHOT_FORMATS:
+                records = batches[-1][0]   # Only the newest queued snapshot is current
+            else:
+                records = [r for batch, _ in batches for r in batch]
+            checkpoints = [checkpoint for _, checkpoint in batches if checkpoint is not None]
+            try:
+                if records:
+                    await asyncio.to_thread(self._commit, name, records)
+                    self.stats[name] += len(records)
+                if checkpoints:
+                    await asyncio.to_thread(save_tail_state, checkpoints[-1])
+            except Exception as e:
+                # Keep the committer alive: one failed micro-batch must not stall the source
+                print(f"❌ Bronze commit failed for {name} ({len(records)} records): {e}")
+            finally:
+                for _ in batches:
+                    queue.task_done()
+
+    def _commit(self, name, records):
+        """Writes one micro-batch as a new part file (temp + rename, so readers see whole parts)."""
+        self._seq += 1
+        ext = SNAPSHOT_FORMATS.get(name, "csv")
+        path = part_path(SOURCES[name], name, self._seq, ext, self.bronze_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        df = pd.DataFrame(records)
+        df["ingestion_timestamp"] = datetime.now()
+        df["source"] = name
+
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        if ext == "jsonl":
+            # Time-ordered JSON Lines, so web_sessions can stream it in chunks
+            if "timestamp" in df.columns:
+                df = df.iloc[pd.to_datetime(df["timestamp"], format="mixed").argsort(kind="stable")]
+            df.to_json(tmp_path, orient="records", lines=True, date_format="iso")
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def _read_warehouse(path):
+    return pd.read_csv(path).to_dict("records")
+
+
+def _read_web_logs(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_tail_state():
+    if not os.path.exists(TAIL_STATE_FILE):
+        return {"offset": 0, "header": None}
+    with open(TAIL_STATE_FILE) as f:
+        state = json.load(f)
+    # The silo was replaced (e.g. regenerated) while the service was down
+    if not os.path.exists(POS_FILE) or os.path.getsize(POS_FILE) < state["offset"]:
+        return {"offset": 0, "header": None}
+    return state
+
+
+def save_tail_state(state):
+    write_json_atomic(state, TAIL_STATE_FILE)
+
+
+async def _respond(writer, status, payload):
+    reasons = {202: "Accepted", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large"}
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+# --------------------------------------------------
+# Local stand-in client (stores posting batches)
+# --------------------------------------------------
+async def post_transactions(records, host=HOST, port=PORT, connection=None):
+    """
+    POSTs one batch to the ingestion service. Pass an open (reader, writer)
+    pair as connection to reuse it; the response status code is returned.
+    """
+    reader, writer = connection or await asyncio.open_connection(host, port)
+    body = json.dumps(records).encode()
+    writer.write(
+        f"POST /transactions HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+
+    if connection is None:
+        writer.close()
+    return int(status_line.split()[1])
+
+
+def make_store_batch(store_id, size):
+    """Synthetic transactions shaped like the POS silo."""
+    now = datetime.now().isoformat()
+    return [{
+        "transaction_id": str(uuid.uuid4()),
+        "store_id": store_id,
+        "product_id": f"P{random.randint(1, 20):03d}",
+        "quantity": random.randint(1, 3),
+        "total_amount": round(random.uniform(100, 5000), 2),
+        "payment_mode": random.choice(["UPI", "Credit Card", "Cash", "Debit Card"]),
+        "timestamp": now,
+        "customer_id": f"C{random.randint(1, 100):03d}",
+    } for _ in range(size)]
+
+
+async def simulate_stores(n_stores, batches_per_store, batch_size, host=HOST, port=PORT):
+    """Concurrent store connections, each posting batches over one keep-alive connection."""
+
+    async def store(i):
+        connection = await asyncio.open_connection(host, port)
+        try:
+            for _ in range(batches_per_store):
+                await post_transactions(make_store_batch(f"S{i + 1:03d}", batch_size), host, port, connection)
+        finally:
+            connection[1].close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(store(i) for i in range(n_stores)))
+    elapsed = time.perf_counter() - start
+    total = n_stores * batches_per_store * batch_size
+    print(f"   - {n_stores} stores posted {total} transactions in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+    return total
+
+
+async def run_service(args):
+    service = IngestionService(args.host, args.port)
+    await service.start()
+    try:
+        if args.simulate_stores:
+            await simulate_stores(args.simulate_stores, args.batches, args.batch_size, service.host, service.port)
+            await service.stop()
+            print(f"✅ Committed to Bronze: {service.stats}")
+        else:
+            await asyncio.Event().wait()  # Serve until interrupted
+    finally:
+        if service._tasks and not all(t.done() for t in service._tasks):
+            await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retail Setu async ingestion service")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--simulate-stores", type=int, default=0,
+                        help="Run N local stand-in stores against the service, then exit")
+    parser.add_argument("--batches", type=int, default=10, help="Batches per simulated store")
+    parser.add_argument("--batch-size", type=int, default=100, help="Transactions per batch")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_service(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Ingestion service stopped.")
+
+
+if __name__ == "__main__":
+    main()
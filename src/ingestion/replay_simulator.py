@@ -0,0 +1,133 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from stream_inventory import StreamingInventoryState
+
+# Configuration
+DATA_DIR = "data"
+TARGET_FILE = f"{DATA_DIR}/silo_pos_transactions.csv"
+MIN_SLEEP = 0.001     # Finest pacing granularity (seconds)
+REPORT_EVERY = 5.0    # Seconds between progress lines
+
+
+def load_recording(source, start=None, end=None):
+    """Recorded Bronze transactions (a CSV or a directory of part files) in event-time order."""
+    if os.path.isdir(source):
+        # Parts sit in date=YYYY-MM-DD/ subdirectories of the sink
+        parts = sorted(glob.glob(os.path.join(source, "**", "part-*.csv"), recursive=True))
+        if not parts:
+            return pd.DataFrame(columns=['transaction_id', 'timestamp'])
+        df = pd.concat([pd.read_csv(p) for p in parts], ignore_index=True)
+        df = df.drop(columns=['ingestion_timestamp', 'source'], errors='ignore')
+    else:
+        df = pd.read_csv(source)
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed', errors='coerce')
+    df = df.dropna(subset=['timestamp'])
+    if start:
+        df = df[df['timestamp'] >= pd.Timestamp(start)]
+    if end:
+        df = df[df['timestamp'] < pd.Timestamp(end)]
+    return df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+def replay(df, target=TARGET_FILE, speedup=1.0, rebase=True, run_tag=None, inventory=True):
+    """
+    Re-emits events on their original schedule compressed by `speedup`.
+
+    Event i is due at (t_i - t_0) / speedup seconds after the replay starts.
+    Every due event is written in one append, so a slow disk or a burst never
+    makes the replay drift: it catches up instead of falling further behind.
+    """
+    if df.empty:
+        print("⚠️ Nothing to replay.")
+        return
+
+    t0 = df['timestamp'].iloc[0]
+    offsets = ((df['timestamp'] - t0).dt.total_seconds() / speedup).values
+    run_tag = run_tag or time.strftime("r%Y%m%d%H%M%S")
+
+    # Fresh ids so the replay isn't deduplicated against the recording
+    out = df.copy()
+    out['transaction_id'] = out['transaction_id'].astype(str) + f"-{run_tag}"
+
+    # Appended rows must line up with the target's existing columns
+    write_header = not os.path.exists(target)
+    if not write_header:
+        out = out.reindex(columns=pd.read_csv(target, nrows=0).columns)
+
+    state = StreamingInventoryState() if inventory else None
+
+    print(f"⏯️ Replaying {len(df)} events spanning {df['timestamp'].iloc[-1] - t0} at {speedup:g}x "
+          f"(~{offsets[-1]:.1f}s) -> {target}")
+
+    wall_start = time.perf_counter()
+    replay_start = pd.Timestamp.now()
+    emitted, max_lag, last_report = 0, 0.0, wall_start
+
+    while emitted < len(out):
+        elapsed = time.perf_counter() - wall_start
+        due = np.searchsorted(offsets, elapsed, side='right')
+
+        if due == emitted:
+            time.sleep(max(offsets[emitted] - elapsed, MIN_SLEEP))
+            continue
+
+        batch = out.iloc[emitted:due].copy()
+        max_lag = max(max_lag, elapsed - offsets[emitted])
+
+        # Event time on the compressed timeline (keeps the original gaps / speedup)
+        if rebase:
+            batch['timestamp'] = replay_start + pd.to_timedelta(offsets[emitted:due], unit='s')
+        batch['timestamp'] = batch['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+        batch.to_csv(target, mode='a', header=write_header, index=False)
+        write_header = False
+
+        if state is not None:
+            for alert in state.apply_events(batch.to_dict('records')):
+                print(f"🚨 [STOCK ALERT] {alert['alert_type']}: {alert['product_id']} "
+                      f"({alert['stock_before']} -> {alert['stock_after']})")
+
+        emitted = due
+        now = time.perf_counter()
+        if now - last_report >= REPORT_EVERY:
+            rate = emitted / (now - wall_start)
+            print(f"   - {emitted}/{len(out)} events ({rate:,.0f}/s), max lag {max_lag * 1000:.0f} ms")
+            last_report = now
+
+    total = time.perf_counter() - wall_start
+    print(f"✅ Replay finished: {emitted} events in {total:.1f}s ({emitted / max(total, 1e-9):,.0f}/s), "
+          f"max lag {max_lag * 1000:.0f} ms.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accelerated replay of recorded Bronze transactions")
+    parser.add_argument("--source", required=True,
+                        help="Recorded POS CSV or a Bronze part directory (not the target itself)")
+    parser.add_argument("--target", default=TARGET_FILE, help="POS silo file to append to")
+    parser.add_argument("--speedup", type=float, default=1.0, help="e.g. 1, 10, 1000")
+    parser.add_argument("--start", help="Only replay events at/after this time (e.g. a trading day)")
+    parser.add_argument("--end", help="Only replay events before this time")
+    parser.add_argument("--keep-timestamps", action="store_true",
+                        help="Emit original event times instead of rebasing them onto the replay clock")
+    parser.add_argument("--no-inventory", action="store_true", help="Skip live stock-out detection")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.source) == os.path.abspath(args.target):
+        parser.error("--source and --target must differ (the replay would re-read its own output)")
+
+    df = load_recording(args.source, args.start, args.end)
+    try:
+        replay(df, args.target, args.speedup, rebase=not args.keep_timestamps, inventory=not args.no_inventory)
+    except KeyboardInterrupt:
+        print("\n🛑 Replay stopped.")
+
+
+if __name__ == "__main__":
+    main()
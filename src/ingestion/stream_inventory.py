@@ -0,0 +1,124 @@
+import pandas as pd
+import csv
+import os
+import time
+from datetime import datetime
+
+# Configuration
+DATA_DIR = "data"
+WAREHOUSE_FILE = f"{DATA_DIR}/silo_warehouse.csv"
+ALERTS_FILE = f"{DATA_DIR}/stream_stock_alerts.csv"
+LOW_STOCK_THRESHOLD = 20  # Same cut-off the Gold layer used for CRITICAL stock
+RESEED_CHECK_SECONDS = 1.0  # How often single events look for a new warehouse snapshot
+
+ALERT_FIELDS = [
+    'alert_timestamp',
+    'event_timestamp',
+    'latency_ms',
+    'alert_type',
+    'product_id',
+    'stock_before',
+    'stock_after',
+    'transaction_id'
+]
+
+
+class StreamingInventoryState:
+    """
+    In-memory available stock per product, seeded from the warehouse snapshot
+    and decremented by each POS event as it arrives. Work per event is a dict
+    lookup, so alert latency does not depend on how much history exists.
+    """
+
+    def __init__(self, warehouse_file=WAREHOUSE_FILE, alerts_file=ALERTS_FILE,
+                 low_threshold=LOW_STOCK_THRESHOLD):
+        self.warehouse_file = warehouse_file
+        self.alerts_file = alerts_file
+        self.low_threshold = low_threshold
+        self.stock = {}
+        self._seed_mtime = None
+        self.seed()
+
+    def seed(self):
+        """(Re)loads stock from the warehouse snapshot, summed across warehouses."""
+        self._checked_at = time.monotonic()
+        if not os.path.exists(self.warehouse_file):
+            self.stock = {}
+            self._seed_mtime = None
+            return
+
+        df = pd.read_csv(self.warehouse_file, usecols=['product_id', 'stock_level'])
+        totals = df.groupby('product_id')['stock_level'].sum()
+        self.stock = totals.fillna(0).astype(int).to_dict()
+        self._seed_mtime = os.path.getmtime(self.warehouse_file)
+
+    def _reseed_if_restocked(self, force=False):
+        # A new warehouse snapshot is the new baseline (e.g. after a restock).
+        # Stat the file at most every RESEED_CHECK_SECONDS, not on every event.
+        now = time.monotonic()
+        if not force and now - self._checked_at < RESEED_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        if os.path.exists(self.warehouse_file):
+            if os.path.getmtime(self.warehouse_file) != self._seed_mtime:
+                self.seed()
+
+    def apply_event(self, txn):
+        """
+        Decrements stock for one POS event and returns any threshold-crossing
+        alerts it caused (already written to the alerts dataset).
+        """
+        self._reseed_if_restocked()
+        alerts = self._apply(txn)
+        if alerts:
+            self._write_alerts(alerts)
+        return alerts
+
+    def apply_events(self, txns):
+        """
+        Same as apply_event for a batch of events: the warehouse snapshot is
+        checked once up front and the alerts are written in one append.
+        """
+        self._reseed_if_restocked(force=True)
+        alerts = [alert for txn in txns for alert in self._apply(txn)]
+        if alerts:
+            self._write_alerts(alerts)
+        return alerts
+
+    def _apply(self, txn):
+        product_id = txn['product_id']
+        if product_id not in self.stock:
+            return []
+
+        before = self.stock[product_id]
+        after = before - int(txn['quantity'])
+        self.stock[product_id] = after
+
+        alerts = []
+        if before > 0 >= after:
+            alerts.append(self._build_alert('STOCK_OUT', txn, before, after))
+        elif before >= self.low_threshold > after:
+            alerts.append(self._build_alert('LOW_STOCK', txn, before, after))
+        return alerts
+
+    def _build_alert(self, alert_type, txn, before, after):
+        now = datetime.now()
+        event_time = pd.Timestamp(txn['timestamp']).to_pydatetime()
+        return {
+            'alert_timestamp': now.isoformat(),
+            'event_timestamp': event_time.isoformat(),
+            'latency_ms': round((now - event_time).total_seconds() * 1000, 1),
+            'alert_type': alert_type,
+            'product_id': txn['product_id'],
+            'stock_before': before,
+            'stock_after': after,
+            'transaction_id': txn['transaction_id']
+        }
+
+    def _write_alerts(self, alerts):
+        write_header = not os.path.exists(self.alerts_file)
+        with open(self.alerts_file, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=ALERT_FIELDS)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(alerts)
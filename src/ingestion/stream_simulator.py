@@ -3,6 +3,7 @@ import time
 import random
 from faker import Faker
 import os
+from stream_inventory import StreamingInventoryState
 
 fake = Faker('en_IN')
 
@@ -28,6 +29,9 @@ def generate_single_transaction():
         "customer_id": f"C{random.randint(1, 100):03d}"
     }
 
+# Live stock state (alerts the moment an order pushes a product below threshold)
+inventory_state = StreamingInventoryState()
+
 # Infinite Loop to simulate Real-Time
 try:
     while True:
@@ -40,8 +44,13 @@ try:
         df_new.to_csv(POS_FILE, mode='a', header=not os.path.exists(POS_FILE), index=False)
 
         print(f"⚡ [REAL-TIME] New Order: {new_txn['transaction_id']} | ₹{new_txn['total_amount']}")
+
+        # 3. Update live stock and raise threshold alerts immediately
+        for alert in inventory_state.apply_event(new_txn):
+            print(f"🚨 [STOCK ALERT] {alert['alert_type']}: {alert['product_id']} "
+                  f"({alert['stock_before']} -> {alert['stock_after']}) in {alert['latency_ms']} ms")
         
-        # 3. Wait
+        # 4. Wait
         time.sleep(STREAM_DELAY)
 
 except KeyboardInterrupt:
@@ -1,42 +1,148 @@
+import argparse
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "transformation"))
+from arrow_io import save_table, load_table, table_exists, arrow_path, write_json_atomic
 
 # Configuration
 DATA_DIR = "data"
 INPUT_FILE = f"{DATA_DIR}/gold_daily_sales.csv"
 OUTPUT_FILE = f"{DATA_DIR}/gold_sales_forecast.csv"
+MODEL_STATE_FILE = f"{DATA_DIR}/forecast_model_state.json"
+
+# Per-SKU/per-store forecasting (Replenishment)
+SERIES_INPUT_FILE = f"{DATA_DIR}/silver_pos_transactions.csv"
+SERIES_OUTPUT_FILE = f"{DATA_DIR}/gold_sku_forecast.csv"
+SERIES_PARQUET_PATH = os.path.join(DATA_DIR, "gold_parquet", "sku_forecast")
+SERIES_KEYS = ['store_id', 'product_id']
+FORECAST_HORIZON = 7
+HISTORY_DAYS = 90          # Only the most recent days feed the series models
+SERIES_PER_SHARD = 20000   # Series solved together in one worker task
+PARALLEL_MIN_SERIES = 50000  # Below this, a process pool costs more than it saves
+
+def file_fingerprint(path):
+    """SHA-256 of a file's bytes, read in blocks so large inputs stay cheap."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_location(csv_path):
+    """The file a stage input actually lives in (Arrow hand-off, else legacy CSV)."""
+    path = arrow_path(csv_path)
+    return path if os.path.exists(path) else csv_path
+
+
+def rows_fingerprint(df):
+    """Order-sensitive hash of the training rows (Date + Revenue)."""
+    hashed = pd.util.hash_pandas_object(df[['Date', 'Total_Revenue']], index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()
+
+
+def load_model_state():
+    if not os.path.exists(MODEL_STATE_FILE):
+        return {}
+    try:
+        with open(MODEL_STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_model_state(state):
+    write_json_atomic(state, MODEL_STATE_FILE)
+
+
+def trend_features(day_index):
+    """Design matrix for the revenue model: intercept + day index."""
+    return np.column_stack([np.ones(len(day_index)), np.asarray(day_index, dtype=float)])
+
 
 def generate_forecast():
     print("🔮 STARTING: AI Demand Forecasting Model...")
     
-    if not os.path.exists(INPUT_FILE):
+    if not table_exists(INPUT_FILE):
         print("⚠️ No historical data found. Skipping forecast.")
         return
 
+    # 0. Skip entirely if the input is byte-for-byte what we last forecast from
+    state = load_model_state()
+    input_hash = file_fingerprint(input_location(INPUT_FILE))
+    if state.get('input_hash') == input_hash and table_exists(OUTPUT_FILE):
+        print("   - Input unchanged since last run. Reusing existing forecast.")
+        return
+
     # 1. Load Data
-    df = pd.read_csv(INPUT_FILE)
+    df = load_table(INPUT_FILE)
     df['Date'] = pd.to_datetime(df['Date'])
+    df = df.sort_values('Date').reset_index(drop=True)
     
     # 2. Feature Engineering (Convert Date to Number for Regression)
     # We map dates to "Day 0, Day 1, Day 2..."
-    df['day_index'] = (df['Date'] - df['Date'].min()).dt.days
-    
-    X = df[['day_index']]  # Input: Time
-    y = df['Total_Revenue'] # Output: Sales
+    origin = df['Date'].min()
+    df['day_index'] = (df['Date'] - origin).dt.days
+
+    # Train on closed days only: the latest day is still collecting sales,
+    # so including it would force a refit on every streamed order.
+    train = df[df['Date'] < df['Date'].max()]
+    if len(train) < 2:
+        train = df
 
     # 3. Train the Model (The "AI" Part)
-    model = LinearRegression()
-    model.fit(X, y)
+    # The model is kept as its sufficient statistics (X'X, X'y). New closed
+    # days are folded in with a rank update instead of refitting all history.
+    incremental = (
+        state.get('origin') == str(origin.date())
+        and 'last_trained_date' in state
+    )
+    if incremental:
+        last_trained = pd.Timestamp(state['last_trained_date'])
+        seen = train[train['Date'] <= last_trained]
+        incremental = rows_fingerprint(seen) == state.get('history_hash')
+
+    if incremental:
+        new_rows = train[train['Date'] > last_trained]
+        xtx = np.array(state['xtx'])
+        xty = np.array(state['xty'])
+        if not new_rows.empty:
+            X_new = trend_features(new_rows['day_index'])
+            xtx += X_new.T @ X_new
+            xty += X_new.T @ new_rows['Total_Revenue'].values
+        print(f"   - Model Updated Incrementally (+{len(new_rows)} day(s)).")
+    else:
+        X = trend_features(train['day_index'])
+        xtx = X.T @ X
+        xty = X.T @ train['Total_Revenue'].values
+        print(f"   - Model Retrained on {len(train)} day(s).")
+
+    coef = np.linalg.lstsq(xtx, xty, rcond=None)[0]
     
-    print(f"   - Model Trained. Coefficient: {model.coef_[0]:.2f}")
+    print(f"   - Model Trained. Coefficient: {coef[1]:.2f}")
+
+    save_model_state({
+        **state,
+        'input_hash': input_hash,
+        'origin': str(origin.date()),
+        'last_trained_date': str(train['Date'].max().date()),
+        'history_hash': rows_fingerprint(train),
+        'xtx': xtx.tolist(),
+        'xty': xty.tolist(),
+        'coef': coef.tolist(),
+    })
 
     # 4. Predict Next 7 Days
     last_day = df['day_index'].max()
-    future_days = np.array([[last_day + i] for i in range(1, 8)])
+    future_days = np.arange(last_day + 1, last_day + 8)
     
-    predictions = model.predict(future_days)
+    predictions = trend_features(future_days) @ coef
     
     # 5. Create Forecast DataFrame
     future_dates = [df['Date'].max() + pd.Timedelta(days=i) for i in range(1, 8)]
@@ -54,8 +160,133 @@ def generate_forecast():
     final_df = pd.concat([df[['Date', 'Total_Revenue', 'Type']], df_forecast])
     
     # Save
-    final_df.to_csv(OUTPUT_FILE, index=False)
+    save_table(final_df, OUTPUT_FILE)
     print(f"✅ Forecast generated for next 7 days: {OUTPUT_FILE}")
 
+
+def build_design_matrix(day_index, origin):
+    """
+    Shared regression features for every series:
+    intercept + linear trend + day-of-week dummies (Monday is the baseline).
+    """
+    day_index = np.asarray(day_index)
+    dow = (origin + pd.to_timedelta(day_index, unit='D')).dayofweek.values
+    X = np.zeros((len(day_index), 8))
+    X[:, 0] = 1.0
+    X[:, 1] = day_index
+    rows = np.flatnonzero(dow > 0)
+    X[rows, dow[rows] + 1] = 1.0
+    return X
+
+
+def _forecast_shard(task):
+    """
+    Solves one block of series with a single batched least-squares step.
+    Every series shares the same design matrix, so the fit is one matrix
+    product against its pseudo-inverse instead of one model per series.
+    """
+    series_codes, day_codes, quantities, n_series, n_days, X_pinv, X_future = task
+
+    # Densify only this shard: rows = series, columns = days (missing days = 0 sales)
+    Y = np.zeros((n_series, n_days))
+    np.add.at(Y, (series_codes, day_codes), quantities)
+
+    coef = Y @ X_pinv.T
+    return np.clip(coef @ X_future.T, 0, None)
+
+
+def generate_series_forecast():
+    print("🔮 STARTING: Per-SKU/Store Demand Forecasting...")
+
+    if not table_exists(SERIES_INPUT_FILE):
+        print("⚠️ No Silver POS data found. Skipping series forecast.")
+        return
+
+    # 1. Load Data (only the columns the models need)
+    df = load_table(SERIES_INPUT_FILE, columns=SERIES_KEYS + ['quantity', 'timestamp'])
+    df['Date'] = pd.to_datetime(df['timestamp'], format='mixed').dt.normalize()
+
+    # Same closed-days rule as generate_forecast: the latest day is still
+    # collecting sales, so it is neither trained on nor a reason to refit.
+    last_closed = df['Date'].max() - pd.Timedelta(days=1)
+    df = df[df['Date'] <= last_closed]
+    if df.empty:
+        print("⚠️ No closed days yet. Skipping series forecast.")
+        return
+
+    state = load_model_state()
+    if state.get('series_last_closed') == str(last_closed.date()) and table_exists(SERIES_OUTPUT_FILE):
+        print(f"   - Already fitted through {last_closed.date()}. Reusing existing series forecast.")
+        return
+
+    last_date = last_closed
+    origin = max(df['Date'].min(), last_date - pd.Timedelta(days=HISTORY_DAYS - 1))
+    df = df[df['Date'] >= origin]
+
+    # 2. Encode series and days as integer codes
+    series_codes, series_index = pd.MultiIndex.from_frame(df[SERIES_KEYS]).factorize()
+    day_codes = (df['Date'] - origin).dt.days.values
+    quantities = df['quantity'].values.astype(float)
+    n_series = len(series_index)
+    # Span origin..last closed day, even when its last days had no sales
+    n_days = (last_date - origin).days + 1
+
+    # 3. Shared features for history and horizon
+    X = build_design_matrix(np.arange(n_days), origin)
+    X_pinv = np.linalg.pinv(X)
+    X_future = build_design_matrix(np.arange(n_days, n_days + FORECAST_HORIZON), origin)
+
+    # 4. Shard series into blocks (sorted so each block is a contiguous slice)
+    order = np.argsort(series_codes, kind='stable')
+    series_codes, day_codes, quantities = series_codes[order], day_codes[order], quantities[order]
+    bounds = np.arange(0, n_series + SERIES_PER_SHARD, SERIES_PER_SHARD).clip(max=n_series)
+    cuts = np.searchsorted(series_codes, bounds)
+
+    tasks = []
+    for i in range(len(bounds) - 1):
+        lo, hi = cuts[i], cuts[i + 1]
+        tasks.append((
+            series_codes[lo:hi] - bounds[i], day_codes[lo:hi], quantities[lo:hi],
+            bounds[i + 1] - bounds[i], n_days, X_pinv, X_future
+        ))
+
+    if n_series >= PARALLEL_MIN_SERIES and len(tasks) > 1:
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(_forecast_shard, tasks))
+    else:
+        results = [_forecast_shard(task) for task in tasks]
+
+    predictions = np.vstack(results) if results else np.empty((0, FORECAST_HORIZON))
+    print(f"   - Fitted {n_series} series over {n_days} days in {len(tasks)} shard(s).")
+
+    # 5. Long-format forecast table keyed by series
+    future_dates = pd.date_range(last_date + pd.Timedelta(days=1), periods=FORECAST_HORIZON)
+    keys = pd.DataFrame(list(series_index), columns=SERIES_KEYS)
+
+    df_forecast = keys.loc[keys.index.repeat(FORECAST_HORIZON)].reset_index(drop=True)
+    df_forecast['Date'] = np.tile(future_dates.values, n_series)
+    df_forecast['Forecast_Quantity'] = predictions.ravel().round(2)
+
+    # Save (Arrow for the dashboard, partitioned Parquet for replenishment jobs)
+    save_table(df_forecast, SERIES_OUTPUT_FILE)
+    df_forecast.to_parquet(
+        SERIES_PARQUET_PATH,
+        engine="pyarrow",
+        partition_cols=["store_id"],
+        existing_data_behavior="delete_matching",
+        index=False
+    )
+    save_model_state({**load_model_state(), 'series_last_closed': str(last_closed.date())})
+    print(f"✅ Series forecast generated for next {FORECAST_HORIZON} days: {SERIES_OUTPUT_FILE}")
+
+
 if __name__ == "__main__":
-    generate_forecast()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Revenue and per-SKU/store demand forecasting")
+    parser.add_argument("--series", action="store_true",
+                        help="Run the nightly per-SKU/store forecast (refits at most once per closed day)")
+    args = parser.parse_args()
+
+    if args.series:
+        generate_series_forecast()
+    else:
+        generate_forecast()
\ No newline at end of file
@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "transformation"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "models"))
+from arrow_io import save_table, load_table, table_exists, arrow_path, write_json_atomic, replace_directory
+from cleaning_rules import clean_pos_data
+from process_silver_layer import read_pos_history, SILVER_POS_FILE
+from silver_store import upsert_pos_transactions, delete_pos_transactions
+from silver_changes import load_silver_state, save_silver_state, new_silver_state
+from gold_kpi_logic import generate_gold_layer
+from gold_publisher import publish_gold_snapshot
+import customer_analytics
+import event_time_windows
+import forecasting_engine
+import inventory_health
+import streaming_sketches
+
+# Configuration
+# Partitions are built under data/backfill/, then the range is published into
+# live Silver and everything derived from it is rebuilt (see publish_to_live).
+DATA_DIR = "data"
+BACKFILL_DIR = f"{DATA_DIR}/backfill"
+STAGING_DIR = f"{BACKFILL_DIR}/_staging"
+SILVER_OUT = f"{BACKFILL_DIR}/silver"
+DAILY_OUT = f"{BACKFILL_DIR}/gold_daily"
+MERGED_DAILY = f"{BACKFILL_DIR}/gold_daily_sales_backfill.csv"
+
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+# Incremental state built from Silver or the POS stream. A new Silver change-log
+# generation already makes velocity and customer state rebuild; these are
+# removed as well so nothing carries totals from before the backfill.
+DERIVED_STATE = [
+    arrow_path(inventory_health.VELOCITY_STATE),
+    arrow_path(inventory_health.FIRST_SALE_STATE),
+    customer_analytics.CUSTOMER_STATE_DIR,
+    arrow_path(event_time_windows.WINDOWS_FILE),   # Holds the window stream's state
+    event_time_windows.SEEN_DIR,
+    streaming_sketches.SKETCH_STATE_FILE,
+    forecasting_engine.MODEL_STATE_FILE,
+]
+
+
+def run_key(start, end, grain, by_store):
+    """Identifies a backfill request, so its checkpoint survives restarts."""
+    raw = f"{start}|{end}|{grain}|{by_store}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def checkpoint_path(key):
+    return f"{BACKFILL_DIR}/_checkpoint_{key}.json"
+
+
+def load_checkpoint(key):
+    path = checkpoint_path(key)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["completed"])
+
+
+def save_checkpoint(key, args, completed):
+    write_json_atomic({"request": args, "completed": sorted(completed)}, checkpoint_path(key), indent=2)
+
+
+def partition_dir(base, task_id):
+    period, store = task_id.split("__")
+    return os.path.join(base, period, store)
+
+
+def publish_partition(df, base, task_id):
+    """
+    Replaces one partition as a unit: write into a temp dir, then swap it in.
+    Re-running a task produces the same partition, so retries are safe.
+    """
+    target = partition_dir(base, task_id)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_dir = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    save_table(df, os.path.join(tmp_dir, "part.csv"))
+    replace_directory(tmp_dir, target)
+
+
+def range_mask(timestamps, start, end):
+    """Rows whose timestamp falls on a day in [start, end]."""
+    ts = pd.to_datetime(timestamps, format="mixed", errors="coerce")
+    return (ts >= pd.Timestamp(start)) & (ts < pd.Timestamp(end) + pd.Timedelta(days=1))
+
+
+def plan_tasks(start, end, grain, by_store):
+    """
+    Reads Bronze once, keeps the requested date range and stages one Arrow
+    slice per partition (period x store).
+    Returns (task ids, the Bronze position that was read up to).
+    """
+    df, source = read_pos_history()
+    if df.empty:
+        return [], source
+
+    ts = pd.to_datetime(df["timestamp"], format="mixed", errors="coerce")
+    in_range = range_mask(ts, start, end)
+    df = df[in_range].copy()
+
+    period = ts[in_range].dt.strftime(PERIOD_FORMATS[grain])
+    store = df["store_id"].astype(str) if by_store else pd.Series("ALL", index=df.index)
+    df["_task"] = f"{grain}=" + period + "__store=" + store
+
+    shutil.rmtree(STAGING_DIR, ignore_errors=True)
+    os.makedirs(STAGING_DIR)
+    tasks = []
+    for task_id, part in df.groupby("_task"):
+        save_table(part.drop(columns="_task"), os.path.join(STAGING_DIR, f"{task_id}.csv"))
+        tasks.append(task_id)
+    return sorted(tasks), source
+
+
+def run_task(task_id):
+    """Bronze slice -> cleaned Silver partition + daily store aggregates."""
+    df = load_table(os.path.join(STAGING_DIR, f"{task_id}.csv"))
+    clean = clean_pos_data(df)
+
+    daily = clean.assign(Date=clean["timestamp"].dt.date).groupby(["Date", "store_id"]).agg(
+        Total_Revenue=("total_amount", "sum"),
+        Total_Quantity=("quantity", "sum"),
+        Orders=("transaction_id", "nunique")
+    ).reset_index()
+
+    publish_partition(clean, SILVER_OUT, task_id)
+    publish_partition(daily, DAILY_OUT, task_id)
+    return task_id, len(clean)
+
+
+def merge_daily_outputs(tasks):
+    """Combines the daily partitions of this backfill into one Gold-shaped table."""
+    parts = [load_table(os.path.join(partition_dir(DAILY_OUT, t), "part.csv")) for t in tasks]
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=["Date", "Total_Revenue"])
+    daily = pd.concat(parts, ignore_index=True)
+    merged = daily.groupby("Date", as_index=False)["Total_Revenue"].sum().sort_values("Date")
+    save_table(merged, MERGED_DAILY)
+    return merged
+
+
+def reset_derived_state():
+    for path in DERIVED_STATE:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def publish_to_live(tasks, start, end, source):
+    """
+    Replaces the live Silver rows of [start, end] with the backfilled
+    partitions and starts a new Silver change-log generation, resets the
+    derived state, then rebuilds the stream views, Gold and the forecast and
+    publishes a Gold snapshot. Re-running it gives the same result.
+    """
+    parts = [load_table(os.path.join(partition_dir(SILVER_OUT, t), "part.csv")) for t in tasks]
+    parts = [p for p in parts if not p.empty]
+    rebuilt = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    live = load_table(SILVER_POS_FILE) if table_exists(SILVER_POS_FILE) else pd.DataFrame()
+    replaced = live[range_mask(live["timestamp"], start, end)] if not live.empty else live
+    silver = pd.concat([live.drop(replaced.index), rebuilt], ignore_index=True)
+    silver = silver.drop_duplicates(subset="transaction_id", keep="last")
+    silver = silver.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+    # The Silver stage resumes from where it was; rows it hasn't read yet are merged by id later
+    state = load_silver_state()
+    position = {k: state[k] for k in ("offset", "header", "parts")} if state else source
+
+    save_table(silver, SILVER_POS_FILE)
+    if not replaced.empty:
+        delete_pos_transactions(set(replaced["transaction_id"]) - set(silver["transaction_id"]))
+    if not rebuilt.empty:
+        upsert_pos_transactions(rebuilt)
+    save_silver_state(new_silver_state(**position))
+    print(f"   - Published {len(rebuilt)} rows into live Silver (replacing {len(replaced)}).")
+
+    reset_derived_state()
+    event_time_windows.run_streaming_windows()
+    streaming_sketches.run_streaming_sketches()
+    generate_gold_layer()
+    forecasting_engine.generate_forecast()
+    publish_gold_snapshot()
+
+
+def run_backfill(start, end, grain="day", by_store=False, workers=None, restart=False, publish=True):
+    print(f"⏪ STARTING: Backfill {start} -> {end} (by {grain}{' x store' if by_store else ''})...")
+    request = {"start": str(start), "end": str(end), "grain": grain, "by_store": by_store}
+    key = run_key(start, end, grain, by_store)
+    os.makedirs(BACKFILL_DIR, exist_ok=True)
+
+    completed = set() if restart else load_checkpoint(key)
+    tasks, source = plan_tasks(start, end, grain, by_store)
+    pending = [t for t in tasks
+               if t not in completed or not os.path.exists(partition_dir(DAILY_OUT, t))]
+
+    print(f"   - {len(tasks)} partitions planned, {len(tasks) - len(pending)} already done (checkpoint {key}).")
+
+    started = time.perf_counter()
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_task, t): t for t in pending}
+        for future in as_completed(futures):
+            task_id = futures[future]
+            try:
+                _, rows = future.result()
+            except Exception as e:
+                failures.append(task_id)
+                print(f"   - ❌ {task_id} failed: {e}")
+                continue
+            completed.add(task_id)
+            save_checkpoint(key, request, completed)  # Resume point after every task
+            print(f"   - ✅ {task_id}: {rows} rows")
+
+    shutil.rmtree(STAGING_DIR, ignore_errors=True)
+
+    if failures:
+        print(f"⚠️ {len(failures)} partition(s) failed. Re-run the same command to retry them.")
+        return False
+
+    merge_daily_outputs(tasks)
+    if publish:
+        publish_to_live(tasks, start, end, source)
+    print(f"✅ Backfill complete in {time.perf_counter() - started:.1f}s: {MERGED_DAILY}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel, resumable backfill of Silver/Gold partitions")
+    parser.add_argument("--start", required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="Last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--grain", choices=list(PERIOD_FORMATS), default="day")
+    parser.add_argument("--by-store", action="store_true", help="Also split partitions by store_id")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and redo every partition")
+    parser.add_argument("--no-publish", action="store_true",
+                        help="Only build the data/backfill/ partitions; leave live Silver/Gold untouched")
+    args = parser.parse_args()
+
+    ok = run_backfill(args.start, args.end, args.grain, args.by_store, args.workers, args.restart,
+                      not args.no_publish)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
+import argparse
 import time
 import subprocess
 import sys
 import os
+from datetime import date, datetime
+from stage_metrics import StageFailed, profile_target, run_stage, write_metrics
 
 # Global variables to track the stream simulator process
 stream_process = None
+# Day the nightly stages last ran (they run on the first cycle of each day)
+last_nightly_run = None
 
 def start_stream_simulator():
     """Starts the stream simulator in background if not already running."""
@@ -18,44 +23,96 @@ def start_stream_simulator():
         )
         time.sleep(2)  # Give it time to start
 
-def run_pipeline():
+
+# Stage -> (script, output files). Stages report their own row/byte counts;
+# the output list is only a byte-count fallback for stages that don't.
+PIPELINE_STAGES = [
+    ("silver", "src/transformation/process_silver_layer.py",
+     ["data/silver_pos_transactions.csv", "data/silver_warehouse.csv"]),
+    # Streaming path: only events appended since the last cycle are read
+    ("windows", "src/transformation/event_time_windows.py",
+     ["data/gold_daily_store_sales.csv", "data/gold_daily_store_sales_deltas.csv"]),
+    # Fixed-memory top-N and distinct counts over the same stream
+    ("sketches", "src/transformation/streaming_sketches.py",
+     ["data/gold_live_top_products.csv", "data/gold_live_top_stores.csv", "data/gold_live_cardinality.csv"]),
+    # SCD runs BEFORE Gold so Gold can use the latest history if needed
+    ("scd", "src/transformation/scd_logic.py",
+     ["data/dim_customers_scd2.csv"]),
+    ("gold", "src/transformation/gold_kpi_logic.py",
+     ["data/gold_daily_sales.csv", "data/gold_monthly_sales.csv", "data/gold_top_products.csv",
+      "data/gold_city_sales.csv", "data/gold_inventory_health.csv", "data/gold_customer_metrics.csv",
+      "data/gold_market_basket.csv", "data/gold_inventory_turnover.csv", "data/gold_seasonal_trend.csv",
+      "data/gold_customer_rfm.csv", "data/gold_cohort_retention.csv"]),
+    ("web", "src/transformation/web_sessions.py",
+     ["data/gold_web_sessions.csv", "data/gold_web_funnel.csv", "data/gold_web_checkout_conversions.csv"]),
+    ("forecast", "src/models/forecasting_engine.py",
+     ["data/gold_sales_forecast.csv"]),
+    # Star-schema facts plus today's inventory snapshot (the last cycle of a day wins)
+    ("facts", "src/transformation/fact_builder.py",
+     ["data/fact_sales.csv", "data/fact_inventory.csv"]),
+    # Publish only after every writer succeeded, so readers get complete versions
+    ("publish", "src/transformation/gold_publisher.py",
+     []),
+]
+
+# Stage -> (script, arguments, output files). Heavy jobs that only need closed
+# days: run on the first cycle of each day instead of every 5 seconds.
+NIGHTLY_STAGES = [
+    ("series_forecast", "src/models/forecasting_engine.py", ["--series"],
+     ["data/gold_sku_forecast.csv"]),
+]
+
+def run_pipeline(profile_stage=None):
     """
-    Executes the silver, SCD, and gold transformation scripts.
+    Executes the silver, SCD, gold and forecasting scripts,
+    recording per-stage metrics (JSON lines + Prometheus text file).
     """
     print("🔄 Running transformation pipeline...")
-    
-    # Define the scripts to run
-    silver_script = "src/transformation/process_silver_layer.py"
-    scd_script = "src/transformation/scd_logic.py"     # <--- NEW: History Tracking
-    gold_script = "src/transformation/gold_kpi_logic.py"
-    ml_script = "src/models/forecasting_engine.py"     # Optional
-    
-    python_executable = sys.executable
+
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    target = profile_target(profile_stage)
+    stage_metrics = []
 
     try:
-        # 1. Run Silver Layer Transformation
-        subprocess.run([python_executable, silver_script], check=True)
-        
-        # 2. Run SCD (History Tracking) - CRITICAL UPDATE
-        # We run this BEFORE Gold so Gold can use the latest history if needed
-        if os.path.exists(scd_script):
-             subprocess.run([python_executable, scd_script], check=True)
-        
-        # 3. Run Gold Layer/KPI Logic
-        subprocess.run([python_executable, gold_script], check=True)
-        
-        # 4. Run AI Forecasting Model (Conditional)
-        if os.path.exists(ml_script):
-            subprocess.run([python_executable, ml_script], check=True)
+        for name, script, outputs in PIPELINE_STAGES:
+            # Optional stages (SCD, forecasting) are skipped if not deployed
+            if not os.path.exists(script):
+                continue
+
+            metrics = run_stage(name, script, outputs, profile=(name == target))
+            stage_metrics.append(metrics)
+            print(f"   ⏱️ {name}: {metrics['wall_seconds']:.2f}s")
+            if metrics["profile"]:
+                print(f"   🔬 Profile saved: {metrics['profile']}")
+
+        global last_nightly_run
+        if last_nightly_run != date.today():
+            for name, script, args, outputs in NIGHTLY_STAGES:
+                metrics = run_stage(name, script, outputs, profile=(name == target), args=args)
+                stage_metrics.append(metrics)
+                print(f"   🌙 {name}: {metrics['wall_seconds']:.2f}s")
+            last_nightly_run = date.today()
         
         print("✅ Data Pipeline Refreshed")
         
+    except StageFailed as e:
+        # Later stages are skipped this cycle; the failed run is still recorded
+        stage_metrics.append(e.metrics)
+        print(f"❌ Stage {e.metrics['stage']} failed: {e}")
     except subprocess.CalledProcessError as e:
         print(f"❌ Error occurred while running pipeline scripts: {e}")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
+    finally:
+        if stage_metrics:
+            write_metrics(run_id, stage_metrics)
 
 def main():
+    parser = argparse.ArgumentParser(description="Retail Setu pipeline runner")
+    parser.add_argument("--profile-stage", choices=[stage[0] for stage in PIPELINE_STAGES + NIGHTLY_STAGES],
+                        help="Capture cProfile output for this stage on every cycle")
+    args = parser.parse_args()
+
     print("🚀 Starting Data Pipeline Runner...")
     print("📊 This will run: Stream Simulator + Silver + SCD + Gold")
     print("Press Ctrl+C to stop.")
@@ -65,7 +122,7 @@ def main():
     
     try:
         while True:
-            run_pipeline()
+            run_pipeline(args.profile_stage)
             # Wait for 5 seconds before the next transformation run
             time.sleep(5)
     except KeyboardInterrupt:
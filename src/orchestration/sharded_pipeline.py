@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "transformation"))
+from arrow_io import save_table, load_table, table_exists, write_json_atomic, replace_directory
+from cleaning_rules import clean_pos_data, clean_inventory_data
+from process_silver_layer import read_pos_history, read_csv_with_retry
+from silver_store import upsert_pos_transactions, upsert_warehouse_stock
+from silver_changes import new_silver_state, save_silver_state
+from bronze_io import latest_snapshot, INGESTION_COLUMNS, WAREHOUSE_SINK
+from gold_kpi_logic import (SALES_PARTIALS, sales_partials, combine_partials, write_sales_kpis,
+                            write_inventory_health, write_customer_kpis)
+from gold_publisher import publish_gold_snapshot
+
+# Configuration
+DATA_DIR = "data"
+INV_SOURCE = f"{DATA_DIR}/silo_warehouse.csv"
+SILVER_POS_PATH = f"{DATA_DIR}/silver_pos_transactions.csv"
+SILVER_INV_PATH = f"{DATA_DIR}/silver_warehouse.csv"
+DIM_PROD_PATH = f"{DATA_DIR}/dim_products.csv"
+SHARD_DIR = f"{DATA_DIR}/shards"   # Shared directory (local disk or a mount every host sees)
+
+PLAN_WAIT_SECONDS = 600            # How long a worker waits for the coordinator's plan
+PLAN_POLL_SECONDS = 1.0
+
+
+def shard_of(store_ids, n_shards):
+    """Stable hash partitioning by store_id (same answer on every host)."""
+    hashes = pd.util.hash_array(np.asarray(store_ids, dtype=object).astype(str).astype(object))
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def shard_name(shard):
+    return f"shard={shard:05d}"
+
+
+def plan_path(shard_dir):
+    return os.path.join(shard_dir, "_plan.json")
+
+
+def done_path(shard_dir, shard):
+    return os.path.join(shard_dir, "partials", shard_name(shard), "_DONE")
+
+
+def load_plan(shard_dir):
+    with open(plan_path(shard_dir)) as f:
+        return json.load(f)
+
+
+def partition_pos(n_shards, shard_dir=SHARD_DIR):
+    """
+    Reads Bronze once and writes one Arrow input per shard. Dedup and
+    cleaning stay with the workers: duplicates share a store_id, so they
+    always land in the same shard.
+    """
+    df, source = read_pos_history()
+
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.makedirs(os.path.join(shard_dir, "input"))
+
+    shards = shard_of(df["store_id"].values, n_shards) if not df.empty else np.empty(0, dtype=np.int64)
+    for shard in range(n_shards):
+        part = df[shards == shard]
+        save_table(part, os.path.join(shard_dir, "input", f"{shard_name(shard)}.csv"))
+
+    # Written last: workers on other hosts wait for the plan before starting (see wait_for_plan)
+    write_json_atomic({"shards": n_shards, "rows": len(df), "source": source}, plan_path(shard_dir))
+    return len(df)
+
+
+def wait_for_plan(shard_dir, timeout=PLAN_WAIT_SECONDS):
+    """Blocks until the coordinator's plan exists (inputs are complete once it does)."""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(plan_path(shard_dir)):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No partition plan in {shard_dir} after {timeout}s")
+        time.sleep(PLAN_POLL_SECONDS)
+    return load_plan(shard_dir)
+
+
+def run_shard(shard, shard_dir=SHARD_DIR):
+    """
+    Worker: clean + dedup one shard and write its Silver part and partials.
+    The shard's output dir is swapped in whole, then marked done, so a
+    re-run (or a second host picking up the same shard) is harmless.
+    """
+    plan = wait_for_plan(shard_dir)
+    if not 0 <= shard < plan["shards"]:
+        raise ValueError(f"{shard_name(shard)} is outside the plan ({plan['shards']} shards)")
+
+    df = load_table(os.path.join(shard_dir, "input", f"{shard_name(shard)}.csv"))
+    clean = clean_pos_data(df) if not df.empty else df
+
+    target = os.path.join(shard_dir, "partials", shard_name(shard))
+    tmp_dir = f"{target}.tmp-{platform.node()}-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    if not clean.empty:
+        save_table(clean, os.path.join(tmp_dir, "silver.csv"))
+        for name, part in sales_partials(clean).items():
+            save_table(part, os.path.join(tmp_dir, f"{name}.csv"))
+
+    with open(os.path.join(tmp_dir, "_DONE"), "w") as f:
+        json.dump({"rows": len(clean), "host": platform.node()}, f)
+
+    replace_directory(tmp_dir, target)
+    return shard, len(clean)
+
+
+def load_partials(shard_dir, n_shards, name):
+    paths = [os.path.join(shard_dir, "partials", shard_name(s), f"{name}.csv") for s in range(n_shards)]
+    parts = [load_table(p) for p in paths if table_exists(p)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def refresh_silver_inventory():
+    """Warehouse stock is small and unsharded: clean it once on the coordinator."""
+    df_inv = read_csv_with_retry(latest_snapshot(WAREHOUSE_SINK, INV_SOURCE))
+    df_inv = df_inv.drop(columns=INGESTION_COLUMNS, errors='ignore')
+    if df_inv.empty:
+        return
+    df_clean_inv = clean_inventory_data(df_inv)
+    save_table(df_clean_inv, SILVER_INV_PATH)
+    upsert_warehouse_stock(df_clean_inv)
+
+
+def merge_partials(shard_dir=SHARD_DIR):
+    """
+    Coordinator: assembles Silver from the shard parts, builds every Gold
+    table with the same KPI functions as gold_kpi_logic (additive sales
+    partials merged by groupby-sum; inventory health and customer analytics
+    from the assembled Silver), then publishes a Gold snapshot.
+    """
+    plan = load_plan(shard_dir)
+    n_shards = plan["shards"]
+    missing = [s for s in range(n_shards) if not os.path.exists(done_path(shard_dir, s))]
+    if missing:
+        print(f"⚠️ {len(missing)} shard(s) not finished yet: {missing[:10]}")
+        return False
+
+    # Silver is replaced wholesale: a new change-log generation makes the
+    # incremental consumers rebuild, and Silver resumes from the plan's position
+    silver = load_partials(shard_dir, n_shards, "silver")
+    if not silver.empty:
+        silver = silver.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        save_table(silver, SILVER_POS_PATH)
+        upsert_pos_transactions(silver)
+        save_silver_state(new_silver_state(**plan["source"]))
+
+    refresh_silver_inventory()
+    df_inv = load_table(SILVER_INV_PATH) if table_exists(SILVER_INV_PATH) else pd.DataFrame(columns=["stock_level"])
+    df_prod = load_table(DIM_PROD_PATH)
+
+    partials = combine_partials({name: [load_partials(shard_dir, n_shards, name)] for name in SALES_PARTIALS})
+    write_sales_kpis(partials, df_inv, df_prod)
+    if not silver.empty:
+        write_inventory_health(silver, df_inv, df_prod)
+        write_customer_kpis(silver)
+
+    publish_gold_snapshot()
+    return True
+
+
+def run_sharded(n_shards, workers=None, shard_dir=SHARD_DIR):
+    print(f"🧩 STARTING: Sharded Pipeline ({n_shards} shards by store_id)...")
+    started = time.perf_counter()
+
+    rows = partition_pos(n_shards, shard_dir)
+    print(f"   - Partitioned {rows} rows in {time.perf_counter() - started:.1f}s.")
+
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_shard, s, shard_dir): s for s in range(n_shards)}
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                _, shard_rows = future.result()
+            except Exception as e:
+                failures.append(shard)
+                print(f"   - ❌ {shard_name(shard)} failed: {e}")
+                continue
+            print(f"   - ✅ {shard_name(shard)}: {shard_rows} rows")
+
+    if failures:
+        print(f"⚠️ {len(failures)} shard(s) failed. Re-run them with: worker --shard {' '.join(map(str, failures))}")
+        return False
+
+    ok = merge_partials(shard_dir)
+    if ok:
+        print(f"✅ Sharded pipeline complete in {time.perf_counter() - started:.1f}s.")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store-sharded Bronze -> Silver -> Gold pipeline")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help="Directory shared by the coordinator and workers")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="Partition, process every shard locally and merge (default)")
+    run.add_argument("--shards", type=int, default=os.cpu_count())
+    run.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+
+    partition = sub.add_parser("partition", help="Split Bronze POS into shard inputs")
+    partition.add_argument("--shards", type=int, required=True)
+
+    worker = sub.add_parser("worker", help="Process the given shards (e.g. one invocation per host)")
+    worker.add_argument("--shard", type=int, nargs="+", required=True)
+
+    sub.add_parser("merge", help="Merge finished shard partials into Gold")
+
+    args = parser.parse_args()
+
+    if args.command == "partition":
+        rows = partition_pos(args.shards, args.shard_dir)
+        print(f"✅ Partitioned {rows} rows into {args.shards} shards: {args.shard_dir}")
+        ok = True
+    elif args.command == "worker":
+        for shard in args.shard:
+            _, rows = run_shard(shard, args.shard_dir)
+            print(f"✅ {shard_name(shard)}: {rows} rows")
+        ok = True
+    elif args.command == "merge":
+        ok = merge_partials(args.shard_dir)
+    else:
+        shards = getattr(args, "shards", None) or os.cpu_count()
+        ok = run_sharded(shards, getattr(args, "workers", None), args.shard_dir)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
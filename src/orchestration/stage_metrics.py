@@ -0,0 +1,156 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "transformation"))
+from arrow_io import arrow_path, write_text_atomic, STAGE_REPORT_ENV
+
+# Configuration
+LOG_DIR = "logs"
+METRICS_JSONL = f"{LOG_DIR}/pipeline_metrics.jsonl"
+METRICS_PROM = f"{LOG_DIR}/pipeline_metrics.prom"
+PROFILE_DIR = f"{LOG_DIR}/profiles"
+REPORT_DIR = f"{LOG_DIR}/stage_reports"   # Per-stage I/O counts written by the stage itself
+
+# Opt-in profiling without a restart: put a stage name in this file
+# (or set RETAILSETU_PROFILE_STAGE) and the next cycles capture cProfile output.
+PROFILE_CONTROL_FILE = f"{LOG_DIR}/profile_stage"
+PROFILE_ENV_VAR = "RETAILSETU_PROFILE_STAGE"
+
+PROM_METRICS = [
+    ("wall_seconds", "Wall-clock time of the last run of the stage."),
+    ("cpu_seconds", "User + system CPU time of the last run of the stage."),
+    ("rows_in", "Rows the stage read."),
+    ("rows_out", "Rows the stage wrote."),
+    ("bytes_read", "Bytes the stage read."),
+    ("bytes_written", "Bytes the stage wrote."),
+    ("peak_rss_bytes", "Peak resident memory of the stage process."),
+    ("exit_code", "Exit code of the last run of the stage (0 = success)."),
+]
+
+
+class StageFailed(subprocess.CalledProcessError):
+    """A stage exited non-zero; carries the metrics of the failed run."""
+
+    def __init__(self, returncode, cmd, metrics):
+        super().__init__(returncode, cmd)
+        self.metrics = metrics
+
+
+def output_bytes(paths, modified_since):
+    """
+    Size of the declared outputs written after a time (stat only, no reads).
+    Fallback for stages that don't go through arrow_io and so send no report.
+    """
+    size = 0
+    for path in paths:
+        if os.path.isfile(arrow_path(path)):
+            path = arrow_path(path)
+        if os.path.isfile(path) and os.path.getmtime(path) >= modified_since:
+            size += os.path.getsize(path)
+    return size
+
+
+def read_stage_report(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def profile_target(cli_stage=None):
+    """Stage to profile this cycle: CLI flag, then env var, then control file."""
+    if cli_stage:
+        return cli_stage
+    if os.environ.get(PROFILE_ENV_VAR):
+        return os.environ[PROFILE_ENV_VAR]
+    if os.path.exists(PROFILE_CONTROL_FILE):
+        with open(PROFILE_CONTROL_FILE) as f:
+            return f.read().strip() or None
+    return None
+
+
+def run_stage(name, script, outputs=(), profile=False, args=()):
+    """
+    Runs one pipeline script as a child process and measures it.
+    Row and byte counts come from the stage's own report (what it actually
+    read and wrote), so the runner never re-scans its inputs.
+    Raises StageFailed (a subprocess.CalledProcessError) on failure, with the
+    metrics of the failed run attached so they are recorded too.
+    """
+    cmd = [sys.executable, script, *args]
+    profile_path = None
+    if profile:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile_path = f"{PROFILE_DIR}/{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof"
+        cmd = [sys.executable, "-m", "cProfile", "-o", profile_path, script, *args]
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    report_path = f"{REPORT_DIR}/{name}.json"
+    if os.path.exists(report_path):
+        os.remove(report_path)
+
+    started_at = time.time()
+    wall_start = time.perf_counter()
+    proc = subprocess.Popen(cmd, env={**os.environ, STAGE_REPORT_ENV: report_path})
+
+    # wait4 gives this child's own CPU time and peak RSS
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        cpu = usage.ru_utime + usage.ru_stime
+        peak = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        proc.wait()
+        cpu, peak = None, None
+
+    wall = time.perf_counter() - wall_start
+
+    report = read_stage_report(report_path)
+    bytes_written = report.get("bytes_written", output_bytes(outputs, started_at))
+
+    metrics = {
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "stage": name,
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4) if cpu is not None else None,
+        "rows_in": report.get("rows_in"),
+        "rows_out": report.get("rows_out"),
+        "bytes_read": report.get("bytes_read"),
+        "bytes_written": bytes_written,
+        "peak_rss_bytes": peak,
+        "exit_code": proc.returncode,
+        "profile": profile_path,
+    }
+    if proc.returncode != 0:
+        raise StageFailed(proc.returncode, cmd, metrics)
+    return metrics
+
+
+def write_metrics(run_id, stage_metrics):
+    """Appends one JSON line per stage and rewrites the Prometheus text file."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    with open(METRICS_JSONL, "a") as f:
+        for metrics in stage_metrics:
+            f.write(json.dumps({"run_id": run_id, **metrics}) + "\n")
+
+    lines = []
+    for key, help_text in PROM_METRICS:
+        metric = f"retailsetu_stage_{key}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for metrics in stage_metrics:
+            if metrics.get(key) is not None:
+                lines.append(f'{metric}{{stage="{metrics["stage"]}"}} {metrics[key]}')
+
+    lines.append("# HELP retailsetu_pipeline_last_run_timestamp_seconds Unix time the last cycle finished.")
+    lines.append("# TYPE retailsetu_pipeline_last_run_timestamp_seconds gauge")
+    lines.append(f"retailsetu_pipeline_last_run_timestamp_seconds {time.time():.3f}")
+
+    # Scrapers never read a half-written file
+    write_text_atomic("\n".join(lines) + "\n", METRICS_PROM)
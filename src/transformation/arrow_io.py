@@ -0,0 +1,134 @@
+import atexit
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Stage hand-off format: Arrow IPC (Feather v2), uncompressed so readers can
+# memory-map the file instead of parsing it. Paths are still named after the
+# historic CSV files; the Arrow file sits next to it with an .arrow suffix.
+ARROW_SUFFIX = ".arrow"
+
+# Schema metadata key for state saved together with a table's rows
+TABLE_METADATA_KEY = b"retailsetu"
+
+# Set RETAILSETU_CSV_EXPORT=1 to keep writing the legacy CSV copies as well
+CSV_EXPORT = os.environ.get("RETAILSETU_CSV_EXPORT", "0") == "1"
+
+# The pipeline runner names a JSON file here; the stage's own I/O counts are
+# written to it on exit (rows/bytes actually read and written, not file sizes).
+STAGE_REPORT_ENV = "RETAILSETU_STAGE_REPORT"
+_io_totals = {"rows_in": 0, "bytes_read": 0, "rows_out": 0, "bytes_written": 0}
+
+
+def record_read(rows, nbytes):
+    """Counts input read outside load_table (tailed silo lines, raw CSV/JSON)."""
+    _io_totals["rows_in"] += int(rows)
+    _io_totals["bytes_read"] += int(nbytes)
+
+
+def record_write(rows, nbytes):
+    _io_totals["rows_out"] += int(rows)
+    _io_totals["bytes_written"] += int(nbytes)
+
+
+def write_text_atomic(text, path):
+    """Write-then-rename, so a crash or a concurrent reader never sees a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(data, path, **kwargs):
+    """State/manifest files: JSON written with write_text_atomic."""
+    write_text_atomic(json.dumps(data, **kwargs), path)
+
+
+def replace_directory(tmp_dir, target):
+    """
+    Swaps a fully written temp dir in for `target` (a partition or shard
+    output). Both renames are atomic, so readers see the old or the new
+    directory, and a retried writer just swaps again.
+    """
+    old_dir = f"{target}.old-{os.getpid()}"
+    if os.path.exists(target):
+        os.rename(target, old_dir)
+    os.rename(tmp_dir, target)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _write_stage_report():
+    write_json_atomic(_io_totals, os.environ[STAGE_REPORT_ENV])
+
+
+if os.environ.get(STAGE_REPORT_ENV):
+    atexit.register(_write_stage_report)
+
+
+def arrow_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ARROW_SUFFIX
+
+
+def table_exists(csv_path):
+    return os.path.exists(arrow_path(csv_path)) or os.path.exists(csv_path)
+
+
+def save_table(df, csv_path, metadata=None):
+    """
+    Writes a stage output as Arrow IPC (schema preserved, no text encoding).
+    Written to a temp file and renamed, so a reader that has the old file
+    mapped keeps a consistent view. `metadata` (JSON) is stored in the schema,
+    so state that must match the rows is replaced together with them.
+    """
+    path = arrow_path(csv_path)
+    tmp_path = f"{path}.tmp"
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata is not None:
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}), TABLE_METADATA_KEY: json.dumps(metadata).encode()
+        })
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    record_write(len(df), os.path.getsize(path))
+
+    if CSV_EXPORT:
+        tmp_csv = f"{csv_path}.tmp"
+        df.to_csv(tmp_csv, index=False)
+        os.replace(tmp_csv, csv_path)
+        _io_totals["bytes_written"] += os.path.getsize(csv_path)
+
+
+def load_table(csv_path, columns=None):
+    """
+    Memory-maps the Arrow hand-off file if present (no parsing, no type
+    inference); falls back to the CSV for raw silo files and older outputs.
+    """
+    path = arrow_path(csv_path)
+    if os.path.exists(path):
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        record_read(table.num_rows, table.nbytes)
+        return table.to_pandas()
+    df = pd.read_csv(csv_path, usecols=columns)
+    record_read(len(df), os.path.getsize(csv_path))
+    return df
+
+
+def load_table_metadata(csv_path):
+    """The metadata save_table stored with a table (None if absent). Only the schema is read."""
+    path = arrow_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return json.loads(metadata[TABLE_METADATA_KEY]) if TABLE_METADATA_KEY in metadata else None
+
+
+def count_rows(path):
+    """Row count of an Arrow file from its record batch metadata (data is not read)."""
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
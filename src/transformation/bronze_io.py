@@ -0,0 +1,142 @@
+import csv
+import glob
+import io
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from arrow_io import record_read
+
+# Configuration
+DATA_DIR = "data"
+BRONZE_DIR = f"{DATA_DIR}/bronze"
+
+# Parts land under <sink>/date=YYYY-MM-DD/ and are named
+# part-<commit time>-<source>-<seq>.<ext>, so readers only list recent dirs.
+PART_TIME_FORMAT = "%Y%m%d_%H%M%S_%f"
+INGESTION_COLUMNS = ['ingestion_timestamp', 'source']
+
+# Sinks and sources written by the ingestion service (async_ingestion_service.SOURCES)
+POS_SINK = "pos"
+STORE_API_SOURCE = "store_api"
+WAREHOUSE_SINK = "warehouse"
+WEB_LOGS_SINK = "web_logs"
+
+# Parts renamed into place out of name order (several committers, restarts)
+# are still picked up if they are at most this much older than the newest seen
+PART_LOOKBACK = pd.Timedelta(minutes=10)
+
+
+# ------------------------
+# Silo tailing
+# ------------------------
+def read_appended_lines(path, offset):
+    """
+    Complete lines appended after a byte offset. A half-written last line is
+    left for the next read. Returns (bytes, new offset).
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b"\n") + 1
+    return chunk[:end], offset + end
+
+
+def tail_csv(path, offset, header, dtype=None):
+    """
+    New rows of an append-only CSV silo since `offset`. The header is read
+    once (at offset 0) and carried by the caller after that.
+    Returns (DataFrame, new offset, header).
+    """
+    data, new_offset = read_appended_lines(path, offset)
+    if not data:
+        return pd.DataFrame(), offset, header
+
+    text = data.decode("utf-8")
+    if header is None:
+        first, _, text = text.partition("\n")
+        header = next(csv.reader([first]))
+    df = pd.read_csv(io.StringIO(text), names=header, header=None, dtype=dtype) \
+        if text.strip() else pd.DataFrame(columns=header)
+    record_read(len(df), len(data))
+    return df, new_offset, header
+
+
+# ------------------------
+# Bronze parts
+# ------------------------
+def part_path(sink, source, seq, ext="csv", bronze_dir=BRONZE_DIR, now=None):
+    now = now or datetime.now()
+    name = f"part-{now.strftime(PART_TIME_FORMAT)}-{source}-{seq:06d}.{ext}"
+    return os.path.join(bronze_dir, sink, f"date={now:%Y-%m-%d}", name)
+
+
+def part_time(path):
+    return pd.Timestamp(datetime.strptime(os.path.basename(path).split("-")[1], PART_TIME_FORMAT))
+
+
+def part_source(path):
+    return os.path.basename(path).split("-")[2]
+
+
+def list_parts(sink, sources=None, since=None, bronze_dir=BRONZE_DIR):
+    """Part files of a sink in commit order, optionally only some sources / dates from `since` on."""
+    dirs = glob.glob(os.path.join(bronze_dir, sink, "date=*"))
+    if since is not None:
+        dirs = [d for d in dirs if d.rsplit("=", 1)[1] >= f"{since:%Y-%m-%d}"]
+    parts = [p for d in dirs for p in glob.glob(os.path.join(d, "part-*"))]
+    if sources is not None:
+        parts = [p for p in parts if part_source(p) in sources]
+    return sorted(parts, key=os.path.basename)
+
+
+def read_parts(paths):
+    """Concatenated CSV parts without the ingestion metadata columns."""
+    if not paths:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+    record_read(len(df), sum(os.path.getsize(p) for p in paths))
+    return df.drop(columns=INGESTION_COLUMNS, errors='ignore')
+
+
+def new_part_cursor():
+    return {"watermark": None, "seen": []}
+
+
+def read_new_parts(sink, cursor, sources=None, bronze_dir=BRONZE_DIR):
+    """
+    Parts committed since `cursor` (see new_part_cursor). Parts are immutable
+    once renamed into place, so a name identifies its rows. The cursor holds
+    the newest commit time read plus the names read within PART_LOOKBACK of
+    it, so it stays small however many parts have been consumed.
+    Returns (DataFrame, new cursor).
+    """
+    if isinstance(cursor, list):
+        # Older state files kept every consumed part name
+        cursor = {"watermark": max(map(part_time, cursor)).isoformat() if cursor else None, "seen": cursor}
+    watermark = pd.Timestamp(cursor["watermark"]) if cursor.get("watermark") else None
+    since = watermark - PART_LOOKBACK if watermark is not None else None
+    seen = set(cursor.get("seen", []))
+
+    parts = [p for p in list_parts(sink, sources, since, bronze_dir)
+             if os.path.basename(p) not in seen and (since is None or part_time(p) >= since)]
+    if not parts:
+        return pd.DataFrame(), cursor
+
+    newest = max(part_time(parts[-1]), watermark) if watermark is not None else part_time(parts[-1])
+    names = seen | {os.path.basename(p) for p in parts}
+    keep = sorted(n for n in names if part_time(n) >= newest - PART_LOOKBACK)
+    return read_parts(parts), {"watermark": newest.isoformat(), "seen": keep}
+
+
+def latest_snapshot(sink, silo_path, bronze_dir=BRONZE_DIR):
+    """
+    Path of the newest full snapshot of a snapshot silo (warehouse, web logs):
+    the last Bronze part the ingestion service committed, unless the silo
+    file itself has changed since (e.g. the service isn't running).
+    """
+    parts = list_parts(sink, bronze_dir=bronze_dir)
+    if parts and (not os.path.exists(silo_path) or os.path.getmtime(parts[-1]) >= os.path.getmtime(silo_path)):
+        return parts[-1]
+    return silo_path
@@ -1,15 +1,44 @@
 import pandas as pd
 import numpy as np
 
+# Events stamped further ahead than this are treated as future-dated (data contract)
+MAX_CLOCK_SKEW = pd.Timedelta(minutes=5)
+
+def filter_future_events(df, now=None, ts_col='timestamp'):
+    """
+    DATA CONTRACT: Drops events dated in the future (beyond a small clock skew).
+    Expects ts_col already parsed to datetime. Returns (kept, rejected).
+    """
+    cutoff = (now or pd.Timestamp.now()) + MAX_CLOCK_SKEW
+    future = df[ts_col] > cutoff
+    return df[~future], df[future]
+
+def split_stream_contract(df, now=None):
+    """
+    DATA CONTRACT for streamed POS rows (same rules as the batch Silver layer):
+    parses types, then drops unparseable/negative rows and future-dated rows.
+    Returns (kept, rejected) with a reject_reason on the rejected rows.
+    """
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed', errors='coerce')
+    df['total_amount'] = pd.to_numeric(df['total_amount'], errors='coerce')
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
+
+    invalid = df['timestamp'].isna() | (df['total_amount'] < 0)
+    rejected = [df[invalid].assign(reject_reason='invalid')]
+    df, future = filter_future_events(df[~invalid], now)
+    rejected.append(future.assign(reject_reason='future_dated'))
+    return df, pd.concat(rejected, ignore_index=True)
+
 def clean_pos_data(df):
     """
     Cleans the Raw POS Data (Bronze -> Silver).
     """
     print("🧹 Starting POS Data Cleaning...")
     
-    # 1. Drop Duplicates
+    # 1. Drop Duplicates (a re-sent transaction is a correction: the latest version wins)
     initial_count = len(df)
-    df = df.drop_duplicates(subset=['transaction_id'])
+    df = df.drop_duplicates(subset=['transaction_id'], keep='last')
     print(f"   - Removed {initial_count - len(df)} duplicate rows.")
 
     # 2. DATA CONTRACT: Remove Negative Amounts
@@ -20,6 +49,11 @@ def clean_pos_data(df):
     
     # 3. Standardize Dates
     df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed')
+
+    # 4. DATA CONTRACT: Remove Future Dates
+    df, future_rows = filter_future_events(df)
+    if not future_rows.empty:
+        print(f"   - ⚠️ FOUND {len(future_rows)} INVALID ROWS (Future Date). Removing them...")
     
     print("✅ POS Data Cleaned Successfully.")
     return df
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from arrow_io import save_table, load_table, table_exists, write_json_atomic
+from silver_changes import changes_since
+
+# Configuration
+DATA_DIR = "data"
+SILVER_POS_PATH = f"{DATA_DIR}/silver_pos_transactions.csv"
+GOLD_CUSTOMER_RFM = f"{DATA_DIR}/gold_customer_rfm.csv"
+GOLD_COHORT_RETENTION = f"{DATA_DIR}/gold_cohort_retention.csv"
+
+# Incremental state: one row per customer + distinct (customer, active month)
+# pairs, hash-partitioned by customer so a cycle rewrites only the partitions
+# of customers it touched; the cursor is the Silver change-log position
+CUSTOMER_STATE_DIR = f"{DATA_DIR}/customer_state"
+CUSTOMER_CURSOR = f"{CUSTOMER_STATE_DIR}/_cursor.json"
+CUSTOMER_PARTITIONS = 16
+
+RFM_BINS = 5
+
+# (segment, condition on R and F scores); first match wins
+RFM_SEGMENTS = [
+    ("Champions", lambda r, f: (r >= 4) & (f >= 4)),
+    ("Loyal Customers", lambda r, f: (r >= 3) & (f >= 4)),
+    ("Potential Loyalists", lambda r, f: (r >= 4) & (f >= 2)),
+    ("New Customers", lambda r, f: r >= 4),
+    ("At Risk", lambda r, f: (r <= 2) & (f >= 3)),
+    ("Hibernating", lambda r, f: (r <= 2) & (f <= 2)),
+]
+
+
+def month_index(ts):
+    """Months since year 0 as an integer, so period arithmetic is plain subtraction."""
+    return ts.dt.year.values * 12 + ts.dt.month.values - 1
+
+
+def summarize_transactions(df):
+    """Per-customer partial aggregates and distinct active months for one batch."""
+    customers = df.groupby('customer_id').agg(
+        first_purchase=('timestamp', 'min'),
+        last_purchase=('timestamp', 'max'),
+        frequency=('transaction_id', 'nunique'),
+        monetary=('total_amount', 'sum')
+    ).reset_index()
+
+    activity = pd.DataFrame({
+        'customer_id': df['customer_id'].values,
+        'period': month_index(df['timestamp'])
+    }).drop_duplicates()
+
+    return customers, activity
+
+
+def cohort_retention(customers, activity):
+    """
+    Acquisition-month cohort x months-since-acquisition retention, counted with
+    a single bincount over (cohort, age) codes.
+    """
+    cohort_of = pd.Series(month_index(customers['first_purchase']), index=customers['customer_id'])
+    cohort = cohort_of.reindex(activity['customer_id']).values
+    age = activity['period'].values - cohort
+
+    valid = age >= 0
+    cohort, age = cohort[valid], age[valid]
+    if len(cohort) == 0:
+        return pd.DataFrame(columns=['cohort', 'period_index', 'active_customers', 'cohort_size', 'retention_rate'])
+
+    cohort_codes, cohort_values = pd.factorize(cohort, sort=True)
+    n_ages = int(age.max()) + 1
+    counts = np.bincount(cohort_codes * n_ages + age, minlength=len(cohort_values) * n_ages)
+    matrix = counts.reshape(len(cohort_values), n_ages)
+
+    # Only ages that have elapsed for each cohort
+    latest = int(activity['period'].max())
+    cohort_grid = np.repeat(cohort_values, n_ages)
+    age_grid = np.tile(np.arange(n_ages), len(cohort_values))
+    size = np.repeat(matrix[:, 0], n_ages)
+    elapsed = cohort_grid + age_grid <= latest
+
+    retention = pd.DataFrame({
+        'cohort': [f"{v // 12:04d}-{v % 12 + 1:02d}" for v in cohort_grid[elapsed]],
+        'period_index': age_grid[elapsed],
+        'active_customers': matrix.ravel()[elapsed],
+        'cohort_size': size[elapsed],
+    })
+    retention['retention_rate'] = (retention['active_customers'] / retention['cohort_size']).round(4)
+    return retention
+
+
+def rfm_scores(customers, as_of=None):
+    """Recency/frequency/monetary quantile scores (1-5) and named segments."""
+    as_of = as_of or customers['last_purchase'].max()
+    rfm = customers[['customer_id', 'frequency', 'monetary']].copy()
+    rfm['recency_days'] = (as_of - customers['last_purchase']).dt.days.values
+
+    def score(values, ascending=True):
+        pct = values.rank(method='average', pct=True, ascending=ascending)
+        return np.ceil(pct * RFM_BINS).clip(1, RFM_BINS).astype(int)
+
+    rfm['R'] = score(rfm['recency_days'], ascending=False)  # More recent = higher score
+    rfm['F'] = score(rfm['frequency'])
+    rfm['M'] = score(rfm['monetary'])
+    rfm['rfm_score'] = rfm['R'].astype(str) + rfm['F'].astype(str) + rfm['M'].astype(str)
+
+    r, f = rfm['R'].values, rfm['F'].values
+    rfm['segment'] = np.select(
+        [cond(r, f) for _, cond in RFM_SEGMENTS],
+        [name for name, _ in RFM_SEGMENTS],
+        default="Need Attention"
+    )
+    rfm['monetary'] = rfm['monetary'].round(2)
+    return rfm
+
+
+def partition_of(customer_ids):
+    """Stable partition number per customer id (same on every run and machine)."""
+    hashes = pd.util.hash_array(np.asarray(customer_ids, dtype=object).astype(str).astype(object))
+    return (hashes % CUSTOMER_PARTITIONS).astype(int)
+
+
+def partition_paths(partition):
+    return (f"{CUSTOMER_STATE_DIR}/customers-{partition:02d}.csv",
+            f"{CUSTOMER_STATE_DIR}/activity-{partition:02d}.csv")
+
+
+def load_state():
+    """(customers, activity, cursor), or None if there is no complete state yet."""
+    if not os.path.exists(CUSTOMER_CURSOR):
+        return None
+    with open(CUSTOMER_CURSOR) as f:
+        cursor = json.load(f)["cursor"]
+    paths = [partition_paths(p) for p in range(CUSTOMER_PARTITIONS)]
+    if not all(table_exists(c) and table_exists(a) for c, a in paths):
+        return None
+    customers = pd.concat([load_table(c) for c, _ in paths], ignore_index=True)
+    activity = pd.concat([load_table(a) for _, a in paths], ignore_index=True)
+    for col in ['first_purchase', 'last_purchase']:
+        customers[col] = pd.to_datetime(customers[col])
+    return customers, activity, cursor
+
+
+def save_partitions(customers, activity, partitions):
+    os.makedirs(CUSTOMER_STATE_DIR, exist_ok=True)
+    customer_part = partition_of(customers['customer_id'])
+    activity_part = partition_of(activity['customer_id'])
+    for p in partitions:
+        customers_path, activity_path = partition_paths(p)
+        save_table(customers[customer_part == p], customers_path)
+        save_table(activity[activity_part == p], activity_path)
+
+
+def build_customer_analytics(df_sales, full_refresh=False):
+    """
+    Brings the customer state up to date with Silver, then derives the RFM
+    table and retention matrix. Returns (customers, rfm, retention).
+
+    Only customers that appear in the Silver change log since the last run
+    are re-aggregated, from all of their Silver rows. That covers new rows,
+    rows that reach Silver out of order and corrected re-sends of an existing
+    transaction_id alike, and re-running after a crash gives the same state.
+    Without a usable cursor (first run, Silver rebuilt) the state is rebuilt.
+    """
+    df = df_sales[['customer_id', 'transaction_id', 'total_amount', 'timestamp']].copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.dropna(subset=['customer_id', 'timestamp']).drop_duplicates(subset='transaction_id', keep='last')
+
+    state = None if full_refresh else load_state()
+    changes, head = changes_since(state[2] if state else None)
+
+    if state is None or changes is None:
+        customers, activity = summarize_transactions(df)
+        shutil.rmtree(CUSTOMER_STATE_DIR, ignore_errors=True)
+        save_partitions(customers, activity, range(CUSTOMER_PARTITIONS))
+        write_json_atomic({"cursor": head}, CUSTOMER_CURSOR)
+    else:
+        customers, activity, cursor = state
+        affected = changes['customer_id'].dropna().unique() if not changes.empty else []
+        if len(affected):
+            fresh_customers, fresh_activity = summarize_transactions(df[df['customer_id'].isin(affected)])
+            customers = pd.concat([customers[~customers['customer_id'].isin(affected)], fresh_customers],
+                                  ignore_index=True)
+            activity = pd.concat([activity[~activity['customer_id'].isin(affected)], fresh_activity],
+                                 ignore_index=True)
+            save_partitions(customers, activity, np.unique(partition_of(affected)))
+        if head != cursor:
+            write_json_atomic({"cursor": head}, CUSTOMER_CURSOR)
+
+    return customers, rfm_scores(customers), cohort_retention(customers, activity)
+
+
+def run_customer_analytics(full_refresh=False):
+    print("👥 STARTING: Customer Analytics (Cohorts + RFM)...")
+
+    if not table_exists(SILVER_POS_PATH):
+        print("ERROR: Silver POS data not found.")
+        return
+
+    df_sales = load_table(SILVER_POS_PATH)
+    _, rfm, retention = build_customer_analytics(df_sales, full_refresh)
+    save_table(rfm, GOLD_CUSTOMER_RFM)
+    save_table(retention, GOLD_COHORT_RETENTION)
+    print(f"✅ RFM scored {len(rfm)} customers across {retention['cohort'].nunique()} cohorts.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cohort retention and RFM segmentation")
+    parser.add_argument("--full-refresh", action="store_true", help="Rebuild state from all Silver history")
+    args = parser.parse_args()
+    run_customer_analytics(args.full_refresh)
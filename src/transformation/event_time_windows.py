@@ -0,0 +1,243 @@
+import argparse
+import glob
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from cleaning_rules import split_stream_contract
+from bronze_io import tail_csv, read_new_parts, new_part_cursor, POS_SINK, STORE_API_SOURCE
+from arrow_io import save_table, load_table, table_exists, load_table_metadata, arrow_path
+
+# Configuration
+DATA_DIR = "data"
+SOURCE_FILE = f"{DATA_DIR}/silo_pos_transactions.csv"
+WINDOWS_FILE = f"{DATA_DIR}/gold_daily_store_sales.csv"   # Also holds the committed stream state
+SEEN_DIR = f"{DATA_DIR}/event_window_seen"                 # Per-id contributions of open windows
+DELTAS_FILE = f"{DATA_DIR}/gold_daily_store_sales_deltas.csv"
+REJECTED_FILE = f"{DATA_DIR}/rejected_stream_events.csv"
+
+ALLOWED_LATENESS = pd.Timedelta(hours=48)  # How long a day/store window stays open
+WINDOW_KEYS = ['window_date', 'store_id']
+MEASURES = ['revenue', 'quantity', 'orders']
+DELTA_COLUMNS = WINDOW_KEYS + [f"{m}_delta" for m in MEASURES] + MEASURES + ['is_late']
+SEEN_COLUMNS = WINDOW_KEYS + ['revenue', 'quantity']
+
+
+class EventTimeWindowAggregator:
+    """
+    Daily x store revenue windows keyed by event time.
+
+    The watermark trails the latest event time seen by the allowed lateness.
+    A window stays open until the watermark passes its end: late events for
+    open windows update just that bucket and are published as a delta, while
+    events for closed windows are rejected instead of silently rewriting
+    history.
+
+    Each transaction's contribution is remembered while its window is open
+    (`seen`), so a re-sent transaction_id is dropped if identical and, if
+    changed, replaces its earlier contribution instead of adding to it.
+    """
+
+    def __init__(self, allowed_lateness=ALLOWED_LATENESS, windows=None, max_event_time=None, seen=None):
+        self.allowed_lateness = allowed_lateness
+        self.max_event_time = max_event_time
+        if windows is None or windows.empty:
+            index = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)], names=WINDOW_KEYS)
+            self.windows = pd.DataFrame(columns=MEASURES, index=index, dtype=float)
+        else:
+            self.windows = windows.set_index(WINDOW_KEYS)[MEASURES].astype(float)
+        if seen is None or seen.empty:
+            self.seen = pd.DataFrame(columns=SEEN_COLUMNS, index=pd.Index([], name='transaction_id'))
+        else:
+            self.seen = seen.set_index('transaction_id')[SEEN_COLUMNS]
+
+    @property
+    def watermark(self):
+        if self.max_event_time is None:
+            return None
+        return self.max_event_time - self.allowed_lateness
+
+    def process_batch(self, df, now=None):
+        """
+        Folds one micro-batch into the windows.
+        Returns (deltas, rejected): changed buckets with their increments and
+        new totals, and the rows refused by the contract, the watermark or as
+        exact repeats of a transaction already counted.
+        """
+        # Same data contract as the batch Silver layer; within a batch the latest version wins
+        df, rejected = split_stream_contract(df, now)
+        df = df.drop_duplicates(subset='transaction_id', keep='last')
+        rejected = [rejected]
+
+        # Lateness is judged against the watermark *before* this batch,
+        # so the outcome doesn't depend on row order inside the batch.
+        df['window_date'] = df['timestamp'].dt.normalize()
+        watermark = self.watermark
+        if watermark is not None:
+            closed = df['window_date'] + pd.Timedelta(days=1) <= watermark
+            rejected.append(df[closed].drop(columns='window_date').assign(reject_reason='too_late'))
+            df = df[~closed]
+
+        contrib = pd.DataFrame({
+            'window_date': df['window_date'].values,
+            'store_id': df['store_id'].values,
+            'revenue': df['total_amount'].values.astype(float),
+            'quantity': df['quantity'].values.astype(float),
+        }, index=pd.Index(df['transaction_id'].values, name='transaction_id'))
+
+        # Ids already counted: identical re-sends are dropped, corrections swap the old contribution out
+        previous = self.seen[self.seen.index.isin(contrib.index)]
+        repeat = contrib.loc[previous.index]
+        same = ((repeat == previous) | (repeat.isna() & previous.isna())).all(axis=1)
+        duplicates = same.index[same.values]
+        rejected.append(df[df['transaction_id'].isin(duplicates)].drop(columns='window_date')
+                        .assign(reject_reason='duplicate'))
+        contrib = contrib.drop(duplicates)
+        previous = previous.drop(duplicates)
+
+        rejected = pd.concat(rejected, ignore_index=True)
+
+        if contrib.empty:
+            return pd.DataFrame(columns=DELTA_COLUMNS), rejected
+
+        batch_max = df.loc[df['transaction_id'].isin(contrib.index), 'timestamp'].max()
+        late_cutoff = self.max_event_time.normalize() if self.max_event_time is not None else None
+
+        added = contrib.assign(orders=1.0).groupby(WINDOW_KEYS)[MEASURES].sum()
+        removed = previous.assign(orders=1.0).groupby(WINDOW_KEYS)[MEASURES].sum()
+        increments = added.sub(removed, fill_value=0.0)
+
+        # Touch only the affected buckets
+        current = self.windows.reindex(increments.index, fill_value=0.0)
+        updated = current + increments
+        untouched = self.windows.drop(increments.index, errors='ignore')
+        self.windows = updated if untouched.empty else pd.concat([untouched, updated])
+
+        if self.max_event_time is None or batch_max > self.max_event_time:
+            self.max_event_time = batch_max
+
+        # Remember contributions only while their window can still change
+        kept = self.seen.drop(contrib.index, errors='ignore')
+        seen = contrib if kept.empty else pd.concat([kept, contrib])
+        self.seen = seen[seen['window_date'] + pd.Timedelta(days=1) > self.watermark]
+
+        deltas = increments.add_suffix('_delta').join(updated).reset_index()
+        deltas['is_late'] = False if late_cutoff is None else deltas['window_date'] < late_cutoff
+        return deltas[DELTA_COLUMNS], rejected
+
+    def windows_frame(self):
+        return self.windows.reset_index().sort_values(WINDOW_KEYS)
+
+    def seen_frame(self):
+        return self.seen.reset_index()
+
+
+# --------------------------------------------------
+# Streaming driver (tails the POS silo)
+# --------------------------------------------------
+def new_state():
+    # Silo byte offset + cursor over the store-API Bronze parts already folded in,
+    # and how far the appended outputs reached when this state was committed
+    return {"offset": 0, "header": None, "parts": new_part_cursor(), "max_event_time": None,
+            "batch": 0, "deltas_size": 0, "rejected_size": 0}
+
+
+def load_state():
+    """
+    The committed state is stored with the windows table itself, so windows
+    and source offsets are always replaced together (one rename).
+    """
+    committed = load_table_metadata(WINDOWS_FILE)
+    return {**new_state(), **committed} if committed else new_state()
+
+
+def seen_path(batch):
+    return f"{SEEN_DIR}/batch-{batch:08d}.csv"
+
+
+def rollback_appended(path, size):
+    """Cuts off rows a crashed run appended after the last committed state."""
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)
+
+
+def append_csv(df, path):
+    if not df.empty:
+        df.to_csv(path, mode='a', header=not os.path.exists(path) or os.path.getsize(path) == 0, index=False)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def run_streaming_windows(allowed_lateness=ALLOWED_LATENESS):
+    print("🪟 STARTING: Event-Time Windowed Aggregation...")
+
+    if not os.path.exists(SOURCE_FILE):
+        print("⚠️ No POS source found. Skipping.")
+        return
+
+    state = load_state()
+
+    # The silo was replaced (e.g. regenerated): rebuild from scratch
+    if os.path.getsize(SOURCE_FILE) < state["offset"]:
+        print("   - Source file shrank. Rebuilding windows from the start.")
+        state = new_state()
+        shutil.rmtree(SEEN_DIR, ignore_errors=True)
+
+    rollback_appended(DELTAS_FILE, state["deltas_size"])
+    rollback_appended(REJECTED_FILE, state["rejected_size"])
+
+    # New silo lines plus transactions posted through the store API
+    batch, offset, header = tail_csv(SOURCE_FILE, state["offset"], state["header"])
+    posted, parts = read_new_parts(POS_SINK, state["parts"], sources=[STORE_API_SOURCE])
+    if not posted.empty:
+        batch = pd.concat([batch, posted], ignore_index=True) if not batch.empty else posted
+    if batch.empty:
+        print("   - No new events.")
+        return
+
+    windows, seen = None, None
+    if state["batch"]:
+        windows = load_table(WINDOWS_FILE)
+        windows['window_date'] = pd.to_datetime(windows['window_date'])
+        if table_exists(seen_path(state["batch"])):
+            seen = load_table(seen_path(state["batch"]))
+
+    max_event_time = pd.Timestamp(state["max_event_time"]) if state["max_event_time"] else None
+    agg = EventTimeWindowAggregator(allowed_lateness, windows, max_event_time, seen)
+
+    deltas, rejected = agg.process_batch(batch)
+
+    # Deltas and rejects are appended tagged with their batch; the windows
+    # table (with the new state) is written last and commits the batch
+    batch_id = state["batch"] + 1
+    published_at = datetime.now().isoformat(timespec='seconds')
+    deltas_size = append_csv(deltas.assign(batch_id=batch_id, published_at=published_at), DELTAS_FILE)
+    rejected_size = append_csv(rejected.assign(batch_id=batch_id, rejected_at=published_at), REJECTED_FILE)
+
+    os.makedirs(SEEN_DIR, exist_ok=True)
+    save_table(agg.seen_frame(), seen_path(batch_id))
+    save_table(agg.windows_frame(), WINDOWS_FILE, metadata={
+        "offset": offset,
+        "header": header,
+        "parts": parts,
+        "max_event_time": agg.max_event_time.isoformat() if agg.max_event_time is not None else None,
+        "batch": batch_id,
+        "deltas_size": deltas_size,
+        "rejected_size": rejected_size,
+    })
+    current_seen = os.path.normpath(arrow_path(seen_path(batch_id)))
+    for path in glob.glob(f"{SEEN_DIR}/batch-*"):
+        if os.path.normpath(path) != current_seen:
+            os.remove(path)
+
+    late = int(deltas['is_late'].sum()) if not deltas.empty else 0
+    print(f"✅ {len(batch)} events -> {len(deltas)} window deltas ({late} late), {len(rejected)} rejected. "
+          f"Watermark: {agg.watermark}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event-time windowed daily store sales")
+    parser.add_argument("--allowed-lateness-hours", type=float, default=ALLOWED_LATENESS.total_seconds() / 3600)
+    args = parser.parse_args()
+    run_streaming_windows(pd.Timedelta(hours=args.allowed_lateness_hours))
@@ -1,9 +1,18 @@
 import pandas as pd
+import json
 import os
+from datetime import date
+from arrow_io import save_table, load_table, table_exists, write_json_atomic
 
 # Base data directory
 DATA_PATH = "data"
 
+# Periodic-snapshot inventory fact (delta encoded)
+SNAPSHOT_PATH = os.path.join(DATA_PATH, "fact_inventory_snapshots")
+SNAPSHOT_MANIFEST = os.path.join(SNAPSHOT_PATH, "_manifest.json")
+SNAPSHOT_KEYS = ["store_id", "product_id"]
+FULL_CHECKPOINT_EVERY = 7  # Every Nth snapshot is stored in full
+
 
 def build_fact_sales():
     """
@@ -12,10 +21,10 @@ def build_fact_sales():
     """
     pos_path = os.path.join(DATA_PATH, "silver_pos_transactions.csv")
 
-    if not os.path.exists(pos_path):
-        raise FileNotFoundError("silver_pos_transactions.csv not found in data/")
+    if not table_exists(pos_path):
+        raise FileNotFoundError("silver_pos_transactions not found in data/")
 
-    df = pd.read_csv(pos_path)
+    df = load_table(pos_path)
 
     # Convert timestamp
     df["sale_timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
@@ -43,22 +52,22 @@ def build_fact_sales():
     ]
 
     output_path = os.path.join(DATA_PATH, "fact_sales.csv")
-    fact_sales.to_csv(output_path, index=False)
+    save_table(fact_sales, output_path)
 
     print("✅ fact_sales created successfully.")
 
 
 def build_fact_inventory():
     """
-    Builds fact_inventory table from silver_inventory.csv
+    Builds fact_inventory table from silver_warehouse.csv
     Grain: One row per store per product snapshot
     """
-    inventory_path = os.path.join(DATA_PATH, "silver_inventory.csv")
+    inventory_path = os.path.join(DATA_PATH, "silver_warehouse.csv")
 
-    if not os.path.exists(inventory_path):
-        raise FileNotFoundError("silver_inventory.csv not found in data/")
+    if not table_exists(inventory_path):
+        raise FileNotFoundError("silver_warehouse not found in data/")
 
-    df = pd.read_csv(inventory_path)
+    df = load_table(inventory_path)
 
     # Convert restock date
     df["inventory_date"] = pd.to_datetime(df["last_restocked"], errors="coerce").dt.date
@@ -78,11 +87,100 @@ def build_fact_inventory():
     ]
 
     output_path = os.path.join(DATA_PATH, "fact_inventory.csv")
-    fact_inventory.to_csv(output_path, index=False)
+    save_table(fact_inventory, output_path)
 
     print("✅ fact_inventory created successfully.")
 
 
+
+def _load_snapshot_manifest():
+    if not os.path.exists(SNAPSHOT_MANIFEST):
+        return {"snapshots": []}
+    with open(SNAPSHOT_MANIFEST) as f:
+        return json.load(f)
+
+
+def _save_snapshot_manifest(manifest):
+    write_json_atomic(manifest, SNAPSHOT_MANIFEST, indent=2)
+
+
+def _snapshot_file(snapshot_date):
+    return os.path.join(SNAPSHOT_PATH, f"snapshot_date={snapshot_date}", "part.csv")
+
+
+def read_inventory_as_of(as_of_date, manifest=None):
+    """
+    Rebuilds stock per store x product as of a date: the latest full
+    checkpoint on or before it, with the later deltas applied in order.
+    """
+    as_of_date = str(pd.Timestamp(as_of_date).date())
+    manifest = manifest or _load_snapshot_manifest()
+    entries = [e for e in manifest["snapshots"] if e["date"] <= as_of_date]
+
+    full_idx = max((i for i, e in enumerate(entries) if e["kind"] == "full"), default=None)
+    if full_idx is None:
+        return pd.DataFrame(columns=SNAPSHOT_KEYS + ["stock_level", "snapshot_date"])
+
+    parts = [load_table(_snapshot_file(e["date"])) for e in entries[full_idx:]]
+    state = pd.concat(parts, ignore_index=True).drop_duplicates(SNAPSHOT_KEYS, keep="last")
+    state = state[~state["is_deleted"]].drop(columns="is_deleted")
+    state["snapshot_date"] = as_of_date
+    return state.reset_index(drop=True)
+
+
+def build_fact_inventory_snapshot(snapshot_date=None):
+    """
+    Appends today's warehouse state to the periodic-snapshot inventory fact.
+    Only rows whose stock_level changed since the previous snapshot are stored
+    (removed rows as tombstones), with a full checkpoint every
+    FULL_CHECKPOINT_EVERY snapshots to bound as-of reconstruction.
+    Re-running the latest date replaces it.
+    """
+    inventory_path = os.path.join(DATA_PATH, "silver_warehouse.csv")
+
+    if not table_exists(inventory_path):
+        raise FileNotFoundError("silver_warehouse not found in data/")
+
+    snapshot_date = str(pd.Timestamp(snapshot_date or date.today()).date())
+    current = load_table(inventory_path)[SNAPSHOT_KEYS + ["stock_level"]]
+    current = current.drop_duplicates(SNAPSHOT_KEYS, keep="last")
+
+    manifest = _load_snapshot_manifest()
+    snapshots = manifest["snapshots"]
+    if snapshots and snapshot_date < snapshots[-1]["date"]:
+        raise ValueError(f"Snapshot {snapshot_date} is older than the latest ({snapshots[-1]['date']})")
+    if snapshots and snapshot_date == snapshots[-1]["date"]:
+        snapshots.pop()  # Idempotent re-run of the latest snapshot
+
+    since_full = next((i for i, e in enumerate(reversed(snapshots)) if e["kind"] == "full"), None)
+    is_full = since_full is None or since_full + 1 >= FULL_CHECKPOINT_EVERY
+
+    if is_full:
+        part = current.assign(is_deleted=False)
+    else:
+        previous = read_inventory_as_of(snapshots[-1]["date"], manifest)
+        merged = current.merge(
+            previous[SNAPSHOT_KEYS + ["stock_level"]], on=SNAPSHOT_KEYS,
+            how="outer", suffixes=("", "_prev"), indicator=True
+        )
+        removed = merged["_merge"] == "right_only"
+        changed = (merged["_merge"] == "left_only") | (
+            (merged["_merge"] == "both") & (merged["stock_level"] != merged["stock_level_prev"])
+        )
+        part = merged[changed | removed][SNAPSHOT_KEYS + ["stock_level"]].copy()
+        part["is_deleted"] = removed[changed | removed].values
+
+    os.makedirs(os.path.dirname(_snapshot_file(snapshot_date)), exist_ok=True)
+    save_table(part.reset_index(drop=True), _snapshot_file(snapshot_date))
+
+    snapshots.append({"date": snapshot_date, "kind": "full" if is_full else "delta", "rows": len(part)})
+    _save_snapshot_manifest(manifest)
+
+    print(f"✅ fact_inventory snapshot {snapshot_date} stored ({'full' if is_full else 'delta'}, "
+          f"{len(part)} of {len(current)} rows).")
+
+
 if __name__ == "__main__":
     build_fact_sales()
-    build_fact_inventory()
\ No newline at end of file
+    build_fact_inventory()
+    build_fact_inventory_snapshot()
\ No newline at end of file
@@ -1,5 +1,8 @@
 import pandas as pd
-import os
+import numpy as np
+from inventory_health import build_inventory_health
+from customer_analytics import build_customer_analytics
+from arrow_io import save_table, load_table, table_exists
 
 # Define Paths
 DATA_DIR = "data"
@@ -15,133 +18,155 @@ GOLD_INV_HEALTH = f"{DATA_DIR}/gold_inventory_health.csv"
 GOLD_CITY_SALES = f"{DATA_DIR}/gold_city_sales.csv"
 GOLD_CUSTOMER_METRICS = f"{DATA_DIR}/gold_customer_metrics.csv"
 GOLD_MARKET_BASKET = f"{DATA_DIR}/gold_market_basket.csv"
-
-
-def generate_gold_layer():
-    print("STARTING: Silver -> Gold Transformation (KPI Calculation)...")
-
-    if not os.path.exists(SILVER_POS_PATH):
-        print("ERROR: Silver POS data not found.")
-        return
-
-    df_sales = pd.read_csv(SILVER_POS_PATH)
-    df_inv = pd.read_csv(SILVER_INV_PATH)
-    df_prod = pd.read_csv(DIM_PROD_PATH)
-
-    df_sales['timestamp'] = pd.to_datetime(df_sales['timestamp'])
-    df_sales['date'] = df_sales['timestamp'].dt.date
-    df_sales['year'] = df_sales['timestamp'].dt.year
-    df_sales['month'] = df_sales['timestamp'].dt.month
-
+GOLD_CUSTOMER_RFM = f"{DATA_DIR}/gold_customer_rfm.csv"
+GOLD_COHORT_RETENTION = f"{DATA_DIR}/gold_cohort_retention.csv"
+GOLD_TURNOVER = f"{DATA_DIR}/gold_inventory_turnover.csv"
+GOLD_SEASONAL = f"{DATA_DIR}/gold_seasonal_trend.csv"
+
+# Sales partial -> (group keys, summed measures). Every partial is additive, so
+# the sharded pipeline computes them per store shard and merges with a groupby-sum
+# (a transaction belongs to exactly one store: basket pairs never overlap).
+SALES_PARTIALS = {
+    "daily": (["date"], ["total_amount"]),
+    "monthly": (["year", "month"], ["total_amount"]),
+    "products": (["product_id"], ["quantity"]),
+    "stores": (["store_id"], ["total_amount"]),
+    "seasonal": (["month"], ["quantity"]),
+    "basket": (["product_1", "product_2"], ["frequency"]),
+}
+
+
+def sales_partials(df_sales):
+    """Additive sales aggregates, keyed and named as in SALES_PARTIALS."""
+    ts = pd.to_datetime(df_sales['timestamp'])
+    df = df_sales.assign(date=ts.dt.date, year=ts.dt.year, month=ts.dt.month)
+    partials = {
+        name: df.groupby(keys, as_index=False)[measures].sum()
+        for name, (keys, measures) in SALES_PARTIALS.items() if name != "basket"
+    }
+
+    # Product pairs per transaction via a self-join (no Python loop over baskets)
+    items = df[['transaction_id', 'product_id']].drop_duplicates()
+    pairs = items.merge(items, on='transaction_id', suffixes=('_1', '_2'))
+    pairs = pairs[pairs['product_id_1'] < pairs['product_id_2']]
+    partials["basket"] = pairs.groupby(['product_id_1', 'product_id_2']).size().reset_index(
+        name='frequency'
+    ).rename(columns={'product_id_1': 'product_1', 'product_id_2': 'product_2'})
+    return partials
+
+
+def combine_partials(parts_by_name):
+    """Merges partials of several shards ({name: [frames]}) into one set."""
+    combined = {}
+    for name, (keys, measures) in SALES_PARTIALS.items():
+        parts = [p for p in parts_by_name.get(name, []) if not p.empty]
+        if not parts:
+            combined[name] = pd.DataFrame(columns=keys + measures)
+            continue
+        combined[name] = pd.concat(parts, ignore_index=True).groupby(keys, as_index=False)[measures].sum()
+    return combined
+
+
+def write_sales_kpis(partials, df_inv, df_prod):
+    """Daily/monthly revenue, top products, city sales, basket, turnover and seasonality."""
     # ------------------------
     # 1️⃣ Daily Revenue
     # ------------------------
-    daily_revenue = df_sales.groupby('date')['total_amount'].sum().reset_index()
+    daily_revenue = partials["daily"].sort_values('date')
     daily_revenue.columns = ['Date', 'Total_Revenue']
-    daily_revenue.to_csv(GOLD_DAILY_SALES, index=False)
+    save_table(daily_revenue, GOLD_DAILY_SALES)
 
     # ------------------------
     # 2️⃣ Monthly Revenue
     # ------------------------
-    monthly_revenue = df_sales.groupby(['year', 'month'])['total_amount'].sum().reset_index()
-    monthly_revenue.to_csv(GOLD_MONTHLY_SALES, index=False)
+    save_table(partials["monthly"].sort_values(['year', 'month']), GOLD_MONTHLY_SALES)
 
     # ------------------------
     # 3️⃣ Top Products
     # ------------------------
-    top_products = df_sales.groupby('product_id')['quantity'].sum().reset_index()
-    top_products = top_products.merge(
+    top_products = partials["products"].merge(
         df_prod[['product_id', 'product_name']],
         on='product_id',
         how='left'
     )
     top_products = top_products.sort_values(by='quantity', ascending=False)
-    top_products.to_csv(GOLD_TOP_PRODUCTS, index=False)
+    save_table(top_products, GOLD_TOP_PRODUCTS)
 
     # ------------------------
     # 4️⃣ City-wise Sales
     # ------------------------
-    if 'store_id' in df_sales.columns:
-        city_sales = df_sales.groupby('store_id')['total_amount'].sum().reset_index()
-        city_sales.to_csv(GOLD_CITY_SALES, index=False)
+    save_table(partials["stores"], GOLD_CITY_SALES)
 
     # ------------------------
-    # 5️⃣ Inventory Health
+    # 5️⃣ Market Basket (Simple Pair Frequency)
     # ------------------------
-    inv_health = df_inv.merge(
-        df_prod[['product_id', 'product_name', 'category']],
-        on='product_id',
-        how='left'
-    )
-    inv_health['status'] = inv_health['stock_level'].apply(
-        lambda x: 'CRITICAL' if x < 20 else 'Healthy'
-    )
-    inv_health.to_csv(GOLD_INV_HEALTH, index=False)
+    save_table(partials["basket"].sort_values(by='frequency', ascending=False), GOLD_MARKET_BASKET)
 
     # ------------------------
-    # 6️⃣ Customer Metrics (New vs Returning + CLV)
+    # 6️⃣ Inventory Turnover Ratio
     # ------------------------
-    customer_metrics = df_sales.groupby('customer_id').agg(
-        total_spent=('total_amount', 'sum'),
-        total_orders=('transaction_id', 'nunique')
-    ).reset_index()
+    # Simplified turnover = Total quantity sold / Average stock level
+    total_sold = partials["products"]['quantity'].sum()
+    avg_stock = df_inv['stock_level'].mean()
 
-    customer_metrics['customer_type'] = customer_metrics['total_orders'].apply(
-        lambda x: 'Returning' if x > 1 else 'New'
-    )
+    turnover_ratio = total_sold / avg_stock if avg_stock != 0 else 0
 
-    customer_metrics.to_csv(GOLD_CUSTOMER_METRICS, index=False)
+    turnover_df = pd.DataFrame({
+        "metric": ["Inventory Turnover Ratio"],
+        "value": [turnover_ratio]
+    })
+    save_table(turnover_df, GOLD_TURNOVER)
 
     # ------------------------
-    # 7️⃣ Market Basket (Simple Pair Frequency)
+    # 7️⃣ Seasonal Demand Trend
     # ------------------------
-    basket = df_sales.groupby(['transaction_id'])['product_id'].apply(list)
+    seasonal_trend = partials["seasonal"].sort_values('month')
+    seasonal_trend.columns = ['Month', 'Total_Quantity_Sold']
+    save_table(seasonal_trend, GOLD_SEASONAL)
 
-    pair_counts = {}
 
-    for products in basket:
-        unique_products = list(set(products))
-        for i in range(len(unique_products)):
-            for j in range(i + 1, len(unique_products)):
-                pair = tuple(sorted([unique_products[i], unique_products[j]]))
-                pair_counts[pair] = pair_counts.get(pair, 0) + 1
+def write_inventory_health(df_sales, df_inv, df_prod):
+    # Velocity-driven days of cover, safety stock and reorder point
+    inv_health = build_inventory_health(df_sales, df_inv, df_prod, date_col='timestamp')
+    save_table(inv_health, GOLD_INV_HEALTH)
 
-    market_basket_df = pd.DataFrame(
-        [(k[0], k[1], v) for k, v in pair_counts.items()],
-        columns=['product_1', 'product_2', 'frequency']
-    )
 
-    market_basket_df = market_basket_df.sort_values(by='frequency', ascending=False)
-    market_basket_df.to_csv(GOLD_MARKET_BASKET, index=False)
+def write_customer_kpis(df_sales):
+    """Customer Metrics (New vs Returning + CLV), Cohorts and RFM."""
+    # Incremental per-customer state; only customers changed since the last run are re-aggregated
+    customers, rfm, retention = build_customer_analytics(df_sales)
 
-    print("SUCCESS: Extended Gold KPIs generated.")
-    
-    # ------------------------
-    # 8️⃣ Inventory Turnover Ratio
-    # ------------------------
-    # Simplified turnover = Total quantity sold / Average stock level
+    customer_metrics = pd.DataFrame({
+        'customer_id': customers['customer_id'],
+        'total_spent': customers['monetary'],
+        'total_orders': customers['frequency']
+    })
+    customer_metrics['customer_type'] = np.where(customer_metrics['total_orders'] > 1, 'Returning', 'New')
 
-    total_sold = df_sales['quantity'].sum()
-    avg_stock = df_inv['stock_level'].mean()
+    save_table(customer_metrics, GOLD_CUSTOMER_METRICS)
+    save_table(rfm, GOLD_CUSTOMER_RFM)
+    save_table(retention, GOLD_COHORT_RETENTION)
 
-    turnover_ratio = total_sold / avg_stock if avg_stock != 0 else 0
 
-    turnover_df = pd.DataFrame({
-        "metric": ["Inventory Turnover Ratio"],
-        "value": [turnover_ratio]
-    })
+def generate_gold_layer():
+    print("STARTING: Silver -> Gold Transformation (KPI Calculation)...")
 
-    turnover_df.to_csv(f"{DATA_DIR}/gold_inventory_turnover.csv", index=False)
-    
-    # ------------------------
-    # 9️⃣ Seasonal Demand Trend
-    # ------------------------
-    seasonal_trend = df_sales.groupby('month')['quantity'].sum().reset_index()
-    seasonal_trend.columns = ['Month', 'Total_Quantity_Sold']
+    if not table_exists(SILVER_POS_PATH):
+        print("ERROR: Silver POS data not found.")
+        return
+
+    df_sales = load_table(SILVER_POS_PATH)
+    df_inv = load_table(SILVER_INV_PATH)
+    df_prod = load_table(DIM_PROD_PATH)
+
+    df_sales['timestamp'] = pd.to_datetime(df_sales['timestamp'])
+
+    write_sales_kpis(sales_partials(df_sales), df_inv, df_prod)
+    write_inventory_health(df_sales, df_inv, df_prod)
+    write_customer_kpis(df_sales)
 
-    seasonal_trend.to_csv(f"{DATA_DIR}/gold_seasonal_trend.csv", index=False)
+    print("SUCCESS: Extended Gold KPIs generated.")
 
 
 if __name__ == "__main__":
     generate_gold_layer()
-    
\ No newline at end of file
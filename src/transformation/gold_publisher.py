@@ -0,0 +1,125 @@
+import glob
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+from arrow_io import write_json_atomic
+
+# Configuration
+DATA_DIR = "data"
+SNAPSHOT_DIR = f"{DATA_DIR}/gold_snapshots"
+MANIFEST_FILE = f"{SNAPSHOT_DIR}/MANIFEST.json"
+
+# Everything the dashboard treats as curated output
+GOLD_PATTERNS = ["gold_*.arrow", "gold_*.csv", "fact_*.arrow", "fact_*.csv", "dim_*.csv"]
+# Append-only logs grow with history and are never read through a snapshot
+APPEND_ONLY_FILES = {"gold_daily_store_sales_deltas.csv"}
+# Dimensions still rewritten in place by their writers: copied, not linked
+IN_PLACE_FILES = {"dim_customers_scd2.csv", "dim_products.csv"}
+
+KEEP_VERSIONS = 3          # Newest versions always retained
+GC_GRACE_SECONDS = 60      # Never delete a version younger than this (readers may be pinned to it)
+
+
+def read_manifest():
+    """Current manifest, or None if nothing has been published yet."""
+    try:
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def current_snapshot_dir():
+    """Directory of the published version readers should pin to (or None)."""
+    manifest = read_manifest()
+    if manifest is None:
+        return None
+    path = os.path.join(SNAPSHOT_DIR, manifest["current"])
+    return path if os.path.isdir(path) else None
+
+
+def resolve_gold_path(filename, snapshot_dir=None):
+    """
+    Path of a Gold file inside a pinned snapshot, falling back to the live
+    data dir. Either the CSV or its Arrow sibling counts as present.
+    """
+    if snapshot_dir is not None:
+        path = os.path.join(snapshot_dir, filename)
+        if os.path.exists(path) or os.path.exists(os.path.splitext(path)[0] + ".arrow"):
+            return path
+    return os.path.join(DATA_DIR, filename)
+
+
+def write_manifest(manifest):
+    # Readers see the old manifest or the new one, never half of one
+    write_json_atomic(manifest, MANIFEST_FILE, indent=2)
+
+
+def collect_garbage(manifest):
+    """Removes old versions (and abandoned staging dirs) outside the retention window."""
+    keep = set(manifest["versions"][:KEEP_VERSIONS])
+    now = time.time()
+
+    for entry in os.listdir(SNAPSHOT_DIR):
+        path = os.path.join(SNAPSHOT_DIR, entry)
+        if not os.path.isdir(path) or entry in keep:
+            continue
+        if now - os.path.getmtime(path) < GC_GRACE_SECONDS:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+    manifest["versions"] = [v for v in manifest["versions"] if os.path.isdir(os.path.join(SNAPSHOT_DIR, v))]
+
+
+def publish_gold_snapshot():
+    """
+    Publishes the Gold files of this run as one immutable version:
+    link into a staging dir -> rename to the version dir -> swap the manifest.
+
+    Stage outputs are replaced by temp file + rename, never modified in place,
+    so a hard link pins the current bytes at no copy cost; the next write
+    gets a new inode and the snapshot keeps the old one.
+    """
+    print("📤 STARTING: Gold Snapshot Publish...")
+
+    files = sorted({f for pattern in GOLD_PATTERNS for f in glob.glob(os.path.join(DATA_DIR, pattern))})
+    files = [f for f in files if os.path.basename(f) not in APPEND_ONLY_FILES]
+    if not files:
+        print("⚠️ No Gold files found. Nothing to publish.")
+        return None
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    version = datetime.now().strftime("v%Y%m%d_%H%M%S_%f")
+    staging = os.path.join(SNAPSHOT_DIR, f".staging_{version}")
+    os.makedirs(staging)
+
+    for path in files:
+        target = os.path.join(staging, os.path.basename(path))
+        if os.path.basename(path) in IN_PLACE_FILES:
+            shutil.copy2(path, target)
+            continue
+        try:
+            os.link(path, target)
+        except OSError:
+            shutil.copy2(path, target)  # e.g. filesystems without hard links
+    os.rename(staging, os.path.join(SNAPSHOT_DIR, version))
+
+    previous = read_manifest() or {"versions": []}
+    manifest = {
+        "current": version,
+        "published_at": datetime.now().isoformat(timespec="seconds"),
+        "files": [os.path.basename(p) for p in files],
+        "versions": [version] + [v for v in previous["versions"] if v != version],
+    }
+    collect_garbage(manifest)
+    write_manifest(manifest)
+
+    print(f"✅ Published Gold snapshot {version} ({len(files)} files).")
+    return version
+
+
+if __name__ == "__main__":
+    publish_gold_snapshot()
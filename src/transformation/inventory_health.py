@@ -0,0 +1,180 @@
+import pandas as pd
+import numpy as np
+from arrow_io import save_table, load_table, table_exists, load_table_metadata
+from silver_changes import changes_since
+
+# Configuration
+DATA_DIR = "data"
+FACT_SALES_PATH = f"{DATA_DIR}/fact_sales.csv"
+SILVER_INV_PATH = f"{DATA_DIR}/silver_warehouse.csv"
+DIM_PROD_PATH = f"{DATA_DIR}/dim_products.csv"
+GOLD_INV_HEALTH = f"{DATA_DIR}/gold_inventory_health.csv"
+
+# First sale per store x product, kept between runs so new SKUs are averaged
+# over the days they have actually been selling (not the full window)
+FIRST_SALE_STATE = f"{DATA_DIR}/inventory_first_sale_state.csv"
+# Daily units per store x product over the window + Silver change-log cursor
+VELOCITY_STATE = f"{DATA_DIR}/inventory_velocity_buckets.csv"
+
+VELOCITY_WINDOW_DAYS = 28   # Rolling window for sales velocity
+LEAD_TIME_DAYS = 7          # Supplier lead time used for the reorder point
+SERVICE_LEVEL_Z = 1.65      # ~95% cycle service level
+BUCKET_KEYS = ['store_id', 'product_id']
+
+
+def _load_first_sale():
+    if table_exists(FIRST_SALE_STATE):
+        first_sale = load_table(FIRST_SALE_STATE)
+        first_sale['first_sale'] = pd.to_datetime(first_sale['first_sale'])
+        return first_sale
+    return pd.DataFrame({'store_id': pd.Series(dtype=object), 'product_id': pd.Series(dtype=object),
+                         'first_sale': pd.Series(dtype='datetime64[ns]')})
+
+
+def _unit_rows(df, date_col, signed=False):
+    """Units per sale row on its day; change-log rows carry their sign (+1 added, -1 replaced)."""
+    if df.empty:
+        return pd.DataFrame(columns=['date'] + BUCKET_KEYS + ['units'])
+    units = df['quantity'] * df['change'] if signed else df['quantity']
+    return pd.DataFrame({'date': pd.to_datetime(df[date_col]).dt.normalize(),
+                         **{k: df[k] for k in BUCKET_KEYS}, 'units': units})
+
+
+def update_velocity_state(df_sales, date_col='date'):
+    """
+    Daily unit buckets per store x product for the rolling window, plus the
+    first sale date of every store x product.
+
+    The buckets are kept between runs with a cursor into the Silver change log
+    (saved in the same file, so they can't disagree). Each run folds in only
+    the changes since then: new rows add units to their own day, late rows
+    included, and corrected rows retract the version they replaced. Days that
+    leave the window are dropped. Without a usable cursor (first run, Silver
+    rebuilt) everything is rebuilt from df_sales. Returns (buckets, first_sale).
+    """
+    cursor = load_table_metadata(VELOCITY_STATE)
+    changes, head = changes_since(cursor["cursor"] if cursor else None)
+
+    if changes is None:
+        rows = _unit_rows(df_sales, date_col)
+        buckets = pd.DataFrame(columns=['date'] + BUCKET_KEYS + ['units'])
+        first_sale = _load_first_sale().iloc[0:0]
+    else:
+        rows = _unit_rows(changes, 'timestamp', signed=True)
+        buckets = load_table(VELOCITY_STATE)
+        buckets['date'] = pd.to_datetime(buckets['date'])
+        first_sale = _load_first_sale()
+
+    if not rows.empty:
+        # First sales only move earlier; a retraction doesn't un-launch a SKU
+        added = rows[rows['units'] > 0]
+        seen = added.groupby(BUCKET_KEYS, as_index=False)['date'].min().rename(columns={'date': 'first_sale'})
+        first_sale = pd.concat([first_sale, seen], ignore_index=True).groupby(BUCKET_KEYS, as_index=False)['first_sale'].min()
+        save_table(first_sale, FIRST_SALE_STATE)
+
+        daily = rows.groupby(['date'] + BUCKET_KEYS, as_index=False)['units'].sum()
+        if not buckets.empty:
+            daily = pd.concat([buckets, daily], ignore_index=True)
+            daily = daily.groupby(['date'] + BUCKET_KEYS, as_index=False)['units'].sum()
+        buckets = daily
+        buckets = buckets[buckets['units'] != 0]
+
+    if not buckets.empty:
+        window_start = buckets['date'].max() - pd.Timedelta(days=VELOCITY_WINDOW_DAYS - 1)
+        buckets = buckets[buckets['date'] >= window_start].reset_index(drop=True)
+    if changes is None or not rows.empty:
+        save_table(buckets, VELOCITY_STATE, metadata={"cursor": head})
+    return buckets, first_sale
+
+
+def compute_velocity(buckets, first_sale, keys):
+    """
+    Mean and standard deviation of daily units at the given grain. Days
+    without sales count as zero, so both moments come from the sums of units
+    and squared units alone. They are taken over the days each key has been
+    selling (from its first sale, capped at the window), so a SKU launched a
+    few days ago isn't diluted by days before it existed.
+    """
+    daily = buckets.groupby(['date'] + keys, as_index=False)['units'].sum()
+    daily['units_sq'] = daily['units'] ** 2
+    agg = daily.groupby(keys, as_index=False)[['units', 'units_sq']].sum()
+
+    started = first_sale.groupby(keys, as_index=False)['first_sale'].min()
+    started = agg[keys].merge(started, on=keys, how='left')['first_sale']
+    observed = (buckets['date'].max() - started).dt.days + 1
+    days = observed.fillna(VELOCITY_WINDOW_DAYS).clip(1, VELOCITY_WINDOW_DAYS).values
+
+    mean = agg['units'] / days
+    var = (agg['units_sq'] / days - mean ** 2).clip(lower=0)
+    return pd.DataFrame({**{k: agg[k] for k in keys}, 'velocity': mean, 'velocity_std': np.sqrt(var)})
+
+
+def compute_inventory_health(df_inv, buckets, first_sale):
+    """
+    Joins sales velocity to each warehouse x product and derives days of
+    cover, safety stock and reorder point in one vectorized pass.
+
+    Warehouses (e.g. Mumbai_WH) don't share ids with the stores that sell, so
+    product demand is split evenly over the locations that stock the product.
+    """
+    health = df_inv.copy()
+    health['store_id'] = health['store_id'].astype(str)
+
+    product_vel = compute_velocity(buckets, first_sale, ['product_id'])
+    health = health.merge(product_vel, on='product_id', how='left')
+
+    locations = health.groupby('product_id')['store_id'].transform('nunique')
+    health['velocity'] = health['velocity'].fillna(0) / locations
+    health['velocity_std'] = health['velocity_std'].fillna(0) / locations
+
+    stock = health['stock_level'].values.astype(float)
+    velocity = health['velocity'].values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        health['days_of_cover'] = np.where(velocity > 0, stock / velocity, np.inf)
+    health['safety_stock'] = SERVICE_LEVEL_Z * health['velocity_std'] * np.sqrt(LEAD_TIME_DAYS)
+    health['reorder_point'] = velocity * LEAD_TIME_DAYS + health['safety_stock']
+
+    health['status'] = np.select(
+        [stock <= 0, stock <= health['safety_stock'], stock <= health['reorder_point']],
+        ['CRITICAL', 'CRITICAL', 'REORDER'],
+        default='Healthy'
+    )
+
+    for col in ['velocity', 'velocity_std', 'days_of_cover', 'safety_stock', 'reorder_point']:
+        health[col] = health[col].round(2)
+
+    return health
+
+
+def build_inventory_health(df_sales, df_inv, df_prod, date_col='date'):
+    """Velocity refresh + health metrics + product attributes, ready for Gold."""
+    buckets, first_sale = update_velocity_state(df_sales, date_col)
+    health = compute_inventory_health(df_inv, buckets, first_sale)
+    return health.merge(
+        df_prod[['product_id', 'product_name', 'category']],
+        on='product_id',
+        how='left'
+    )
+
+
+def run_inventory_health():
+    print("📦 STARTING: Inventory Health Engine...")
+
+    if not table_exists(FACT_SALES_PATH) or not table_exists(SILVER_INV_PATH):
+        print("ERROR: fact_sales or Silver warehouse data not found.")
+        return
+
+    df_sales = load_table(FACT_SALES_PATH, columns=BUCKET_KEYS + ['quantity', 'sale_date'])
+    df_inv = load_table(SILVER_INV_PATH)
+    df_prod = load_table(DIM_PROD_PATH)
+
+    health = build_inventory_health(df_sales, df_inv, df_prod, date_col='sale_date')
+    save_table(health, GOLD_INV_HEALTH)
+
+    critical = (health['status'] == 'CRITICAL').sum()
+    print(f"✅ Inventory health refreshed: {len(health)} SKU-locations, {critical} critical.")
+
+
+if __name__ == "__main__":
+    run_inventory_health()
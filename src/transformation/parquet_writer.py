@@ -1,5 +1,5 @@
-import pandas as pd
 import os
+from arrow_io import load_table, table_exists
 
 
 DATA_PATH = "data"
@@ -9,10 +9,10 @@ PARQUET_BASE_PATH = os.path.join(DATA_PATH, "gold_parquet")
 def write_fact_sales_parquet():
     sales_path = os.path.join(DATA_PATH, "fact_sales.csv")
 
-    if not os.path.exists(sales_path):
-        raise FileNotFoundError("fact_sales.csv not found")
+    if not table_exists(sales_path):
+        raise FileNotFoundError("fact_sales not found")
 
-    df = pd.read_csv(sales_path)
+    df = load_table(sales_path)
 
     output_path = os.path.join(PARQUET_BASE_PATH, "fact_sales")
 
@@ -29,10 +29,10 @@ def write_fact_sales_parquet():
 def write_fact_inventory_parquet():
     inventory_path = os.path.join(DATA_PATH, "fact_inventory.csv")
 
-    if not os.path.exists(inventory_path):
-        raise FileNotFoundError("fact_inventory.csv not found")
+    if not table_exists(inventory_path):
+        raise FileNotFoundError("fact_inventory not found")
 
-    df = pd.read_csv(inventory_path)
+    df = load_table(inventory_path)
 
     output_path = os.path.join(PARQUET_BASE_PATH, "fact_inventory")
 
@@ -1,13 +1,22 @@
+import numpy as np
 import pandas as pd
 import os
 import time
 from cleaning_rules import clean_pos_data, clean_inventory_data
+from silver_store import upsert_pos_transactions, upsert_warehouse_stock, SILVER_DB
+from silver_changes import (load_silver_state, save_silver_state, new_silver_state,
+                            write_change_part, pending_change_part, prune_change_parts)
+from bronze_io import (tail_csv, read_new_parts, new_part_cursor, latest_snapshot,
+                       INGESTION_COLUMNS, POS_SINK, STORE_API_SOURCE, WAREHOUSE_SINK)
+from arrow_io import save_table, load_table, table_exists, arrow_path, record_read
 
 # Configuration
 DATA_DIR = "data"
 SILVER_POS_FILE = f"{DATA_DIR}/silver_pos_transactions.csv"
 # FIX: Changed from 'silver_inventory.csv' to 'silver_warehouse.csv' to match Gold Layer
 SILVER_INV_FILE = f"{DATA_DIR}/silver_warehouse.csv" 
+SILO_POS_FILE = f"{DATA_DIR}/silo_pos_transactions.csv"
+SILO_WAREHOUSE_FILE = f"{DATA_DIR}/silo_warehouse.csv"
 
 def read_csv_with_retry(filepath, retries=5, delay=1):
     """
@@ -15,32 +24,139 @@ def read_csv_with_retry(filepath, retries=5, delay=1):
     """
     for attempt in range(retries):
         try:
-            return pd.read_csv(filepath)
+            df = pd.read_csv(filepath)
+            record_read(len(df), os.path.getsize(filepath))
+            return df
         except (PermissionError, FileNotFoundError, pd.errors.EmptyDataError):
             if attempt < retries - 1:
                 time.sleep(delay)  # Wait and try again
     return pd.DataFrame() # Return empty if failed
 
+def read_pos_history():
+    """
+    Every POS row: the whole silo plus all store-API parts in Bronze (the
+    pos_file parts are byte copies of the silo, so they are not read again).
+    Returns (DataFrame, source position) for seeding incremental Silver state.
+    """
+    df, offset, header = pd.DataFrame(), 0, None
+    if os.path.exists(SILO_POS_FILE):
+        df, offset, header = tail_csv(SILO_POS_FILE, 0, None)
+    posted, parts = read_new_parts(POS_SINK, new_part_cursor(), sources=[STORE_API_SOURCE])
+    if not posted.empty:
+        df = pd.concat([df, posted], ignore_index=True) if not df.empty else posted
+    return df, {"offset": offset, "header": header, "parts": parts}
+
+def merge_pos_batch(silver, batch):
+    """
+    Folds a cleaned batch into Silver by transaction_id; the latest version of
+    a transaction wins and an identical re-send is a no-op.
+    Returns (silver, changes): changes has the new or changed rows (change=+1)
+    and the versions they replaced (change=-1).
+    """
+    batch = batch.drop_duplicates(subset='transaction_id', keep='last')
+    if silver is None or silver.empty:
+        return batch.reset_index(drop=True), batch.assign(change=1)
+
+    old = silver[silver['transaction_id'].isin(batch['transaction_id'])]
+    if not old.empty:
+        columns = [c for c in batch.columns if c in old.columns and c != 'transaction_id']
+        pairs = batch[['transaction_id'] + columns].merge(old[['transaction_id'] + columns],
+                                                          on='transaction_id', suffixes=('', '_old'))
+        same = np.ones(len(pairs), dtype=bool)
+        for c in columns:
+            a, b = pairs[c], pairs[f"{c}_old"]
+            same &= ((a == b) | (a.isna() & b.isna())).values
+        unchanged = pairs['transaction_id'][same]
+        batch = batch[~batch['transaction_id'].isin(unchanged)]
+        old = old[~old['transaction_id'].isin(unchanged)]
+
+    silver = pd.concat([silver[~silver['transaction_id'].isin(batch['transaction_id'])], batch],
+                       ignore_index=True)
+    changes = pd.concat([old.assign(change=-1), batch.assign(change=1)], ignore_index=True)
+    return silver, changes
+
+def apply_changes(silver, changes):
+    """Re-applies a logged change part (idempotent: rows are replaced by id)."""
+    added = changes[changes['change'] == 1].drop(columns='change')
+    return pd.concat([silver[~silver['transaction_id'].isin(added['transaction_id'])], added],
+                     ignore_index=True)
+
+def run_pos_silver():
+    """
+    Incremental POS Silver: only silo lines appended since the last run and
+    store-API parts not yet read are cleaned and merged. Each cycle's changes
+    go to the Silver change log, which downstream state (inventory velocity,
+    customer analytics) folds in instead of re-reading history.
+    """
+    state = load_silver_state()
+
+    # A run that crashed after logging its changes: finish it first
+    if state is not None and table_exists(SILVER_POS_FILE):
+        pending = pending_change_part(state)
+        if pending is not None:
+            changes, state = pending
+            save_table(apply_changes(load_table(SILVER_POS_FILE), changes), SILVER_POS_FILE)
+            upsert_pos_transactions(changes[changes['change'] == 1].drop(columns='change'))
+            save_silver_state(state)
+            print(f"   - Recovered unfinished Silver run ({len(changes)} logged changes).")
+
+    # First run, lost output, or the silo was replaced (e.g. regenerated): rebuild
+    rebuild = (
+        state is None
+        or not table_exists(SILVER_POS_FILE)
+        or (os.path.exists(SILO_POS_FILE) and os.path.getsize(SILO_POS_FILE) < state["offset"])
+    )
+    if rebuild:
+        df_pos, source = read_pos_history()
+        state = new_silver_state(**source)
+        silver = None
+        print("   - Rebuilding Silver POS from full history (new change-log generation).")
+    else:
+        df_pos = pd.DataFrame()
+        offset, header = state["offset"], state["header"]
+        if os.path.exists(SILO_POS_FILE):
+            df_pos, offset, header = tail_csv(SILO_POS_FILE, offset, header)
+        posted, parts = read_new_parts(POS_SINK, state["parts"], sources=[STORE_API_SOURCE])
+        if not posted.empty:
+            df_pos = pd.concat([df_pos, posted], ignore_index=True) if not df_pos.empty else posted
+        source = {"offset": offset, "header": header, "parts": parts}
+        silver = load_table(SILVER_POS_FILE) if not df_pos.empty else None
+
+    if df_pos.empty:
+        save_silver_state({**state, **source})
+        print("   - No new POS rows.")
+        return
+
+    silver, changes = merge_pos_batch(silver, clean_pos_data(df_pos))
+    next_state = {**state, **source, "seq": state["seq"] + (0 if rebuild or changes.empty else 1)}
+
+    # Log first (redo record), then Silver, then the state that commits both
+    if not rebuild and not changes.empty:
+        write_change_part(changes, state, next_state)
+    save_table(silver, SILVER_POS_FILE)
+    upserted = upsert_pos_transactions(silver if rebuild else changes[changes['change'] == 1].drop(columns='change'))
+    save_silver_state(next_state)
+    prune_change_parts(next_state)
+
+    print(f"💾 Saved Silver Data: {arrow_path(SILVER_POS_FILE)} ({len(df_pos)} new input rows, "
+          f"{int((changes['change'] == 1).sum())} new/changed; + {upserted} rows to indexed store {SILVER_DB})")
+
 def run_silver_transformation():
     print("STARTING: Bronze -> Silver Transformation Pipeline...")
 
     # --- 1. Process POS Data ---
-    df_pos = read_csv_with_retry(f"{DATA_DIR}/silo_pos_transactions.csv")
-    
-    if not df_pos.empty:
-        df_clean_pos = clean_pos_data(df_pos)
-        df_clean_pos.to_csv(SILVER_POS_FILE, index=False)
-        print(f"💾 Saved Silver Data: {SILVER_POS_FILE}")
-    else:
-        print("⚠️ Skipping POS processing (File empty or locked).")
+    run_pos_silver()
 
     # --- 2. Process Inventory Data ---
-    df_inv = read_csv_with_retry(f"{DATA_DIR}/silo_warehouse.csv")
+    # Latest warehouse snapshot (Bronze part from the ingestion service, else the silo)
+    df_inv = read_csv_with_retry(latest_snapshot(WAREHOUSE_SINK, SILO_WAREHOUSE_FILE))
+    df_inv = df_inv.drop(columns=INGESTION_COLUMNS, errors='ignore')
     
     if not df_inv.empty:
         df_clean_inv = clean_inventory_data(df_inv)
-        df_clean_inv.to_csv(SILVER_INV_FILE, index=False)
-        print(f"💾 Saved Silver Data: {SILVER_INV_FILE}")
+        save_table(df_clean_inv, SILVER_INV_FILE)
+        upsert_warehouse_stock(df_clean_inv)
+        print(f"💾 Saved Silver Data: {arrow_path(SILVER_INV_FILE)} (+ indexed store {SILVER_DB})")
     else:
         print("⚠️ Skipping Inventory processing.")
 
@@ -0,0 +1,111 @@
+import glob
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from arrow_io import write_json_atomic, record_read, record_write
+
+# Configuration
+DATA_DIR = "data"
+# Where the incremental Silver POS stage is: silo offset, Bronze part cursor,
+# and the head of its change log (generation + next part number)
+SILVER_POS_STATE = f"{DATA_DIR}/silver_pos_state.json"
+CHANGES_DIR = f"{DATA_DIR}/silver_changes"
+CHANGE_RETENTION = 1000   # Parts kept; a consumer further behind rebuilds from Silver
+
+# Every change part holds the Silver rows one cycle added (change=+1) and the
+# versions they replaced (change=-1). A new generation (first run, silo
+# replaced, backfill) means "history was rewritten": consumers rebuild.
+
+
+def load_silver_state():
+    if not os.path.exists(SILVER_POS_STATE):
+        return None
+    with open(SILVER_POS_STATE) as f:
+        return json.load(f)
+
+
+def save_silver_state(state):
+    write_json_atomic(state, SILVER_POS_STATE)
+
+
+def new_silver_state(**source):
+    """Fresh generation; parts of older generations are dropped."""
+    if os.path.isdir(CHANGES_DIR):
+        shutil.rmtree(CHANGES_DIR)
+    return {"generation": uuid.uuid4().hex[:12], "seq": 0, **source}
+
+
+def head_cursor(state):
+    return {"generation": state["generation"], "seq": state["seq"]}
+
+
+def change_part_path(generation, seq):
+    return os.path.join(CHANGES_DIR, generation, f"part-{seq:08d}.arrow")
+
+
+def write_change_part(changes, state, next_state):
+    """
+    Writes the changes that take Silver from `state` to `next_state`. The part
+    is written before Silver and the state file, so it doubles as a redo log:
+    after a crash the Silver stage re-applies it (see pending_change_part).
+    """
+    path = change_part_path(state["generation"], state["seq"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(changes, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}), b"next_state": json.dumps(next_state).encode()
+    })
+    tmp_path = f"{path}.tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    record_write(len(changes), os.path.getsize(path))
+
+
+def _read_part(path):
+    table = feather.read_table(path, memory_map=True)
+    record_read(table.num_rows, table.nbytes)
+    return table
+
+
+def pending_change_part(state):
+    """(changes, next_state) of a part written by a run that didn't finish, else None."""
+    path = change_part_path(state["generation"], state["seq"])
+    if not os.path.exists(path):
+        return None
+    table = _read_part(path)
+    return table.to_pandas(), json.loads(table.schema.metadata[b"next_state"])
+
+
+def changes_since(cursor):
+    """
+    Silver changes committed after a consumer's cursor.
+    Returns (changes, head): changes is None when the consumer has to rebuild
+    from the full Silver table (no cursor yet, new generation, or parts it
+    needs were already pruned); head is the cursor to store afterwards.
+    """
+    state = load_silver_state()
+    if state is None:
+        return None, None
+    head = head_cursor(state)
+    if not cursor or cursor.get("generation") != head["generation"]:
+        return None, head
+
+    paths = [change_part_path(head["generation"], seq) for seq in range(cursor["seq"], head["seq"])]
+    if not all(os.path.exists(p) for p in paths):
+        return None, head
+    if not paths:
+        return pd.DataFrame(), head
+    return pa.concat_tables([_read_part(p) for p in paths], promote_options="default").to_pandas(), head
+
+
+def prune_change_parts(state):
+    oldest = state["seq"] - CHANGE_RETENTION
+    for path in glob.glob(os.path.join(CHANGES_DIR, state["generation"], "part-*.arrow")):
+        if int(os.path.basename(path)[5:13]) < oldest:
+            os.remove(path)
@@ -0,0 +1,205 @@
+import sqlite3
+import os
+from contextlib import closing
+
+import pandas as pd
+
+from arrow_io import save_table, load_table, table_exists
+
+# Configuration
+DATA_DIR = "data"
+SILVER_DB = f"{DATA_DIR}/silver.db"
+BUSY_TIMEOUT_MS = 5000
+
+POS_COLUMNS = [
+    'transaction_id',
+    'store_id',
+    'product_id',
+    'customer_id',
+    'quantity',
+    'total_amount',
+    'payment_mode',
+    'timestamp',
+    'sale_date'
+]
+WAREHOUSE_COLUMNS = ['store_id', 'product_id', 'stock_level', 'last_restocked']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pos_transactions (
+    transaction_id TEXT PRIMARY KEY,
+    store_id       TEXT,
+    product_id     TEXT,
+    customer_id    TEXT,
+    quantity       INTEGER,
+    total_amount   REAL,
+    payment_mode   TEXT,
+    timestamp      TEXT,
+    sale_date      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pos_customer  ON pos_transactions (customer_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_pos_date      ON pos_transactions (sale_date, store_id);
+CREATE INDEX IF NOT EXISTS idx_pos_timestamp ON pos_transactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_pos_product   ON pos_transactions (product_id, sale_date);
+
+CREATE TABLE IF NOT EXISTS warehouse_stock (
+    store_id       TEXT,
+    product_id     TEXT,
+    stock_level    INTEGER,
+    last_restocked TEXT,
+    PRIMARY KEY (store_id, product_id)
+);
+"""
+
+
+def connect_writer(db_path=SILVER_DB):
+    """
+    Writer connection. WAL mode lets the dashboard and ad-hoc tools keep
+    reading while the pipeline writes.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def connect_reader(db_path=SILVER_DB):
+    """Read-only connection (never blocks the writer, never takes write locks)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _upsert(conn, table, columns, keys, rows):
+    """
+    INSERT .. ON CONFLICT DO UPDATE, skipping rows whose values are unchanged
+    so re-running a batch is idempotent and rewrites no pages.
+    """
+    updates = [c for c in columns if c not in keys]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+        + ", ".join(f"{c} = excluded.{c}" for c in updates)
+        + " WHERE " + " OR ".join(f"{c} IS NOT excluded.{c}" for c in updates)
+    )
+    with conn:
+        conn.executemany(sql, rows)
+
+
+def _records(df, columns):
+    # NaN -> NULL; numpy scalars -> Python types sqlite3 understands
+    df = df[columns].astype(object).where(df[columns].notna(), None)
+    return df.itertuples(index=False, name=None)
+
+
+def row_hashes_path(db_path=SILVER_DB):
+    """Sidecar with a hash per upserted POS row (Arrow, next to the database)."""
+    return os.path.splitext(db_path)[0] + "_pos_hashes.csv"
+
+
+def _load_row_hashes(db_path):
+    # Hashes only describe this database; without it every row is new again
+    if not os.path.exists(db_path) or not table_exists(row_hashes_path(db_path)):
+        return pd.Series(dtype='uint64')
+    stored = load_table(row_hashes_path(db_path))
+    return pd.Series(stored['row_hash'].values, index=stored['transaction_id'].values)
+
+
+def upsert_pos_transactions(df, db_path=SILVER_DB):
+    """
+    Upserts cleaned POS rows keyed by transaction_id. Rebuilds, backfills and
+    the sharded merge pass whole tables, so rows are first compared by hash
+    against what was last written and only new or changed rows reach SQLite.
+    Returns the number of rows sent to the database.
+    """
+    df = df.drop_duplicates(subset='transaction_id', keep='last')
+    df = df.assign(timestamp=pd.to_datetime(df['timestamp'], format='mixed'))
+
+    # Hash the values as they are; only rows that go to SQLite get formatted
+    hashed_columns = [c for c in POS_COLUMNS if c != 'sale_date']
+    hashes = pd.util.hash_pandas_object(df[hashed_columns], index=False).values
+    stored = _load_row_hashes(db_path)
+    # Positional lookup keeps the uint64 hashes exact (no float NaN for new ids)
+    position = stored.index.get_indexer(df['transaction_id'])
+    known = position >= 0
+    changed = ~known
+    changed[known] = stored.values[position[known]] != hashes[known]
+
+    if changed.any():
+        rows = df[changed]
+        rows = rows.assign(
+            timestamp=rows['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S.%f'),
+            sale_date=rows['timestamp'].dt.strftime('%Y-%m-%d')
+        )
+        with closing(connect_writer(db_path)) as conn:
+            _upsert(conn, 'pos_transactions', POS_COLUMNS, ['transaction_id'], _records(rows, POS_COLUMNS))
+
+        merged = pd.concat([
+            stored[~stored.index.isin(df['transaction_id'])],
+            pd.Series(hashes, index=df['transaction_id'].values)
+        ])
+        save_table(pd.DataFrame({'transaction_id': merged.index, 'row_hash': merged.values}),
+                   row_hashes_path(db_path))
+    return int(changed.sum())
+
+
+def delete_pos_transactions(transaction_ids, db_path=SILVER_DB):
+    """Removes POS rows (e.g. dropped by a backfill) from the database and its hash sidecar."""
+    ids = [str(t) for t in transaction_ids]
+    if not ids or not os.path.exists(db_path):
+        return 0
+    with closing(connect_writer(db_path)) as conn:
+        with conn:
+            conn.executemany("DELETE FROM pos_transactions WHERE transaction_id = ?", [(t,) for t in ids])
+
+    stored = _load_row_hashes(db_path)
+    kept = stored[~stored.index.isin(ids)]
+    save_table(pd.DataFrame({'transaction_id': kept.index, 'row_hash': kept.values}), row_hashes_path(db_path))
+    return len(ids)
+
+
+def upsert_warehouse_stock(df, db_path=SILVER_DB):
+    """Upserts the cleaned warehouse snapshot keyed by (store_id, product_id)."""
+    df = df.copy()
+    for col in WAREHOUSE_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df['last_restocked'] = df['last_restocked'].astype(str)
+    with closing(connect_writer(db_path)) as conn:
+        _upsert(conn, 'warehouse_stock', WAREHOUSE_COLUMNS, ['store_id', 'product_id'],
+                _records(df, WAREHOUSE_COLUMNS))
+
+
+# ------------------------
+# Indexed read helpers
+# ------------------------
+def _query(sql, params=(), db_path=SILVER_DB):
+    with closing(connect_reader(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def get_transaction(transaction_id, db_path=SILVER_DB):
+    return _query("SELECT * FROM pos_transactions WHERE transaction_id = ?", (transaction_id,), db_path)
+
+
+def customer_transactions(customer_id, db_path=SILVER_DB):
+    return _query(
+        "SELECT * FROM pos_transactions WHERE customer_id = ? ORDER BY timestamp",
+        (customer_id,), db_path
+    )
+
+
+def transactions_between(start_date, end_date, store_id=None, db_path=SILVER_DB):
+    """Transactions with start_date <= sale_date <= end_date (YYYY-MM-DD)."""
+    sql = "SELECT * FROM pos_transactions WHERE sale_date BETWEEN ? AND ?"
+    params = [str(start_date), str(end_date)]
+    if store_id is not None:
+        sql += " AND store_id = ?"
+        params.append(store_id)
+    return _query(sql + " ORDER BY timestamp", params, db_path)
+
+
+def recent_transactions(limit=10, db_path=SILVER_DB):
+    """Latest transactions by event time (walks the timestamp index backwards)."""
+    return _query("SELECT * FROM pos_transactions ORDER BY timestamp DESC LIMIT ?", (limit,), db_path)
@@ -0,0 +1,413 @@
+import argparse
+import base64
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cleaning_rules import split_stream_contract
+from bronze_io import tail_csv, read_new_parts, new_part_cursor, POS_SINK, STORE_API_SOURCE
+from arrow_io import save_table, write_json_atomic
+
+# Configuration
+DATA_DIR = "data"
+SOURCE_FILE = f"{DATA_DIR}/silo_pos_transactions.csv"
+SKETCH_DIR = f"{DATA_DIR}/sketches"
+SKETCH_STATE_FILE = f"{SKETCH_DIR}/pos_sketches.json"
+GOLD_LIVE_TOP_PRODUCTS = f"{DATA_DIR}/gold_live_top_products.csv"
+GOLD_LIVE_TOP_STORES = f"{DATA_DIR}/gold_live_top_stores.csv"
+GOLD_LIVE_CARDINALITY = f"{DATA_DIR}/gold_live_cardinality.csv"
+
+TOP_K_CAPACITY = 200     # Space-Saving counters (error <= total / capacity)
+CMS_WIDTH = 2048         # Count-Min columns (error <= e / width * total)
+CMS_DEPTH = 5            # Count-Min rows (failure probability e^-depth)
+HLL_PRECISION = 14       # 2^14 registers, ~0.8% standard error
+STORE_HLL_PRECISION = 12  # Per-store registers, ~1.6% standard error
+TOP_N = 20
+DEDUP_RETENTION = pd.Timedelta(hours=48)  # How long a transaction id is remembered (event time)
+DEDUP_SEED = 99
+
+
+def hash_values(values, seed=0):
+    """64-bit hashes of arbitrary keys (stable across processes and runs)."""
+    hash_key = f"retailsetu{seed:06d}"
+    return pd.util.hash_array(np.asarray(values, dtype=object), hash_key=hash_key, categorize=True)
+
+
+def _encode(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _decode(text, dtype, shape):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype).reshape(shape).copy()
+
+
+def _bit_length(values):
+    """Exact bit length of uint64 values (float64 is exact on 32-bit halves)."""
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    hi_bits = np.frexp(hi)[1]
+    lo_bits = np.frexp(lo)[1]
+    return np.where(hi > 0, hi_bits + 32, lo_bits)
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch for weighted point queries (never underestimates).
+    Sketches with the same width/depth merge by adding their tables.
+    """
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.float64)
+
+    def _columns(self, keys):
+        return [hash_values(keys, seed) % np.uint64(self.width) for seed in range(self.depth)]
+
+    def update(self, keys, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        for row, cols in enumerate(self._columns(keys)):
+            np.add.at(self.table[row], cols.astype(np.intp), weights)
+
+    def estimate(self, keys):
+        if len(keys) == 0:
+            return np.empty(0)
+        rows = [self.table[row, cols.astype(np.intp)] for row, cols in enumerate(self._columns(keys))]
+        return np.min(rows, axis=0)
+
+    @property
+    def total(self):
+        return float(self.table[0].sum())
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches must share width and depth to merge")
+        return CountMinSketch(self.width, self.depth, self.table + other.table)
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "table": _encode(self.table)}
+
+    @classmethod
+    def from_dict(cls, data):
+        table = _decode(data["table"], np.float64, (data["depth"], data["width"]))
+        return cls(data["width"], data["depth"], table)
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary for the heaviest keys.
+
+    Holds at most `capacity` counters. A key's true weight lies in
+    [count - error, count]. A batch is applied as an exact summary and merged
+    in, so updates and partition merges share one vectorized code path.
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY, counters=None):
+        self.capacity = capacity
+        if counters is None:
+            counters = pd.DataFrame({"count": pd.Series(dtype=np.float64), "error": pd.Series(dtype=np.float64)})
+        self.counters = counters
+
+    @property
+    def floor(self):
+        # Weight an unmonitored key may already have had
+        if len(self.counters) < self.capacity:
+            return 0.0
+        return float(self.counters["count"].min())
+
+    def update(self, keys, weights):
+        batch = pd.Series(np.asarray(weights, dtype=np.float64)).groupby(np.asarray(keys)).sum()
+        exact = SpaceSaving(max(self.capacity, len(batch)), pd.DataFrame({"count": batch, "error": 0.0}))
+        self.counters = self.merge(exact).counters
+
+    def merge(self, other):
+        capacity = max(self.capacity, other.capacity)
+        a, b = self.counters, other.counters
+        keys = a.index.union(b.index)
+        a = a.reindex(keys).fillna(self.floor)
+        b = b.reindex(keys).fillna(other.floor)
+        merged = (a + b).sort_values("count", ascending=False, kind="stable").head(capacity)
+        return SpaceSaving(self.capacity, merged)
+
+    def top(self, n=TOP_N):
+        top = self.counters.sort_values("count", ascending=False, kind="stable").head(n)
+        top = top.rename_axis("key").reset_index()
+        top["min_count"] = top["count"] - top["error"]
+        # Rank is certain when the lower bound beats every remaining upper bound
+        rest = self.counters["count"].sort_values(ascending=False).iloc[n:]
+        threshold = max(rest.max() if not rest.empty else 0.0, self.floor)
+        top["guaranteed"] = top["min_count"] >= threshold
+        return top
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "keys": self.counters.index.astype(str).tolist(),
+            "count": self.counters["count"].tolist(),
+            "error": self.counters["error"].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counters = pd.DataFrame({"count": data["count"], "error": data["error"]},
+                                index=pd.Index(data["keys"], dtype=object), dtype=np.float64)
+        return cls(data["capacity"], counters)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter. Re-adding a key is a no-op, so replayed or
+    duplicated events never inflate the estimate; merging is a register max.
+    """
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        hashes = hash_values(values)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return self.m * np.log(self.m / zeros)   # Linear counting for small sets
+        return float(raw)
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(self.m)
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError("HyperLogLogs must share precision to merge")
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": _encode(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        m = 1 << data["precision"]
+        return cls(data["precision"], _decode(data["registers"], np.uint8, (m,)))
+
+
+class RecentIds:
+    """
+    Transaction ids already sketched, so a re-sent transaction isn't added
+    twice (sketches can't retract, so a changed re-send is dropped as well).
+    Kept as 64-bit hashes with their event times; ids older than the
+    retention behind the newest event are forgotten, which bounds the state.
+    """
+
+    def __init__(self, hashes=None, times=None, retention=DEDUP_RETENTION):
+        self.hashes = hashes if hashes is not None else np.empty(0, dtype=np.uint64)
+        self.times = times if times is not None else np.empty(0, dtype=np.int64)
+        self.retention = retention
+
+    def filter_new(self, ids, times):
+        """Mask of rows whose id hasn't been seen (first occurrence within the batch); remembers them."""
+        hashes = hash_values(ids, DEDUP_SEED)
+        new = ~pd.Index(hashes).duplicated() & ~np.isin(hashes, self.hashes)
+
+        times = pd.to_datetime(times).values.astype("datetime64[ns]").astype(np.int64)
+        self.hashes = np.concatenate([self.hashes, hashes[new]])
+        self.times = np.concatenate([self.times, times[new]])
+        if len(self.times):
+            recent = self.times >= self.times.max() - self.retention.value
+            self.hashes, self.times = self.hashes[recent], self.times[recent]
+        return new
+
+    def to_dict(self):
+        return {"hashes": _encode(self.hashes), "times": _encode(self.times)}
+
+    @classmethod
+    def from_dict(cls, data):
+        hashes = _decode(data["hashes"], np.uint64, (-1,))
+        return cls(hashes, _decode(data["times"], np.int64, (len(hashes),)))
+
+
+class POSSketches:
+    """The sketch set kept for the POS stream (one per worker or partition)."""
+
+    def __init__(self, top_products=None, top_stores=None, product_counts=None,
+                 customers=None, orders=None, store_customers=None):
+        self.top_products = top_products or SpaceSaving()
+        self.top_stores = top_stores or SpaceSaving()
+        self.product_counts = product_counts or CountMinSketch()
+        self.customers = customers or HyperLogLog()
+        self.orders = orders or HyperLogLog()
+        self.store_customers = store_customers or {}
+
+    def update(self, df):
+        df = df.dropna(subset=['product_id', 'store_id', 'customer_id', 'transaction_id'])
+        # Space-Saving and Count-Min bounds only hold for non-negative weights
+        quantity = pd.to_numeric(df['quantity'], errors='coerce').fillna(0).clip(lower=0).values
+        revenue = pd.to_numeric(df['total_amount'], errors='coerce').fillna(0).clip(lower=0).values
+
+        self.top_products.update(df['product_id'].values, quantity)
+        self.product_counts.update(df['product_id'].values, quantity)
+        self.top_stores.update(df['store_id'].values, revenue)
+        self.customers.update(df['customer_id'].values)
+        self.orders.update(df['transaction_id'].values)
+
+        for store_id, customers in df.groupby('store_id')['customer_id']:
+            store_hll = self.store_customers.setdefault(str(store_id), HyperLogLog(STORE_HLL_PRECISION))
+            store_hll.update(customers.values)
+
+    def merge(self, other):
+        stores = {}
+        for store_id in set(self.store_customers) | set(other.store_customers):
+            mine, theirs = self.store_customers.get(store_id), other.store_customers.get(store_id)
+            stores[store_id] = mine.merge(theirs) if mine and theirs else (mine or theirs)
+        return POSSketches(
+            self.top_products.merge(other.top_products),
+            self.top_stores.merge(other.top_stores),
+            self.product_counts.merge(other.product_counts),
+            self.customers.merge(other.customers),
+            self.orders.merge(other.orders),
+            stores
+        )
+
+    def to_dict(self):
+        return {
+            "top_products": self.top_products.to_dict(),
+            "top_stores": self.top_stores.to_dict(),
+            "product_counts": self.product_counts.to_dict(),
+            "customers": self.customers.to_dict(),
+            "orders": self.orders.to_dict(),
+            "store_customers": {k: v.to_dict() for k, v in self.store_customers.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            SpaceSaving.from_dict(data["top_products"]),
+            SpaceSaving.from_dict(data["top_stores"]),
+            CountMinSketch.from_dict(data["product_counts"]),
+            HyperLogLog.from_dict(data["customers"]),
+            HyperLogLog.from_dict(data["orders"]),
+            {k: HyperLogLog.from_dict(v) for k, v in data["store_customers"].items()}
+        )
+
+
+# --------------------------------------------------
+# Persistence & Gold outputs
+# --------------------------------------------------
+def new_source():
+    # Silo byte offset + cursor over the store-API Bronze parts already sketched,
+    # and the recently sketched transaction ids (see RecentIds)
+    return {"offset": 0, "header": None, "parts": new_part_cursor(), "recent_ids": None}
+
+
+def load_sketch_state(path=SKETCH_STATE_FILE):
+    if not os.path.exists(path):
+        return new_source(), POSSketches()
+    with open(path) as f:
+        state = json.load(f)
+    return {**new_source(), **state["source"]}, POSSketches.from_dict(state["sketches"])
+
+
+def save_sketch_state(source, sketches, path=SKETCH_STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_json_atomic({"source": source, "sketches": sketches.to_dict()}, path)
+
+
+def merge_sketch_files(paths):
+    """Combines sketch files written by separate workers/partitions into one answer."""
+    merged = POSSketches()
+    for path in paths:
+        merged = merged.merge(load_sketch_state(path)[1])
+    return merged
+
+
+def publish_live_views(sketches, top_n=TOP_N):
+    products = sketches.top_products.top(top_n).rename(columns={
+        'key': 'product_id', 'count': 'est_quantity', 'error': 'max_overcount', 'min_count': 'min_quantity'
+    })
+    # Count-Min gives an independent upper bound for the same products
+    products['cms_quantity'] = sketches.product_counts.estimate(products['product_id'].values)
+    products['est_quantity'] = np.minimum(products['est_quantity'], products['cms_quantity'])
+
+    stores = sketches.top_stores.top(top_n).rename(columns={
+        'key': 'store_id', 'count': 'est_revenue', 'error': 'max_overcount', 'min_count': 'min_revenue'
+    })
+
+    cardinality = [
+        ('ALL', 'distinct_customers', sketches.customers),
+        ('ALL', 'distinct_orders', sketches.orders),
+    ] + [(store_id, 'distinct_customers', hll) for store_id, hll in sorted(sketches.store_customers.items())]
+    cardinality = pd.DataFrame([
+        {'scope': scope, 'metric': metric, 'estimate': round(hll.estimate()),
+         'relative_error': round(hll.relative_error, 4)}
+        for scope, metric, hll in cardinality
+    ])
+
+    save_table(products, GOLD_LIVE_TOP_PRODUCTS)
+    save_table(stores, GOLD_LIVE_TOP_STORES)
+    save_table(cardinality, GOLD_LIVE_CARDINALITY)
+
+
+def run_streaming_sketches(source_file=SOURCE_FILE, state_file=SKETCH_STATE_FILE):
+    print("📐 STARTING: Streaming Sketches (Top-N & Distinct Counts)...")
+
+    if not os.path.exists(source_file):
+        print("⚠️ No POS source found. Skipping.")
+        return
+
+    source, sketches = load_sketch_state(state_file)
+
+    # The silo was replaced (e.g. regenerated): start the sketches over
+    if os.path.getsize(source_file) < source["offset"]:
+        print("   - Source file shrank. Rebuilding sketches from the start.")
+        source, sketches = new_source(), POSSketches()
+
+    # New silo lines plus transactions posted through the store API
+    batch, offset, header = tail_csv(source_file, source["offset"], source["header"])
+    posted, parts = read_new_parts(POS_SINK, source["parts"], sources=[STORE_API_SOURCE])
+    if not posted.empty:
+        batch = pd.concat([batch, posted], ignore_index=True) if not batch.empty else posted
+    if batch.empty:
+        print("   - No new events.")
+        return
+
+    # Same data contract as Silver: no negative amounts, no future-dated events
+    valid, rejected = split_stream_contract(batch)
+
+    # Only transaction ids not sketched yet, so re-sends don't add weight twice
+    recent = RecentIds.from_dict(source["recent_ids"]) if source["recent_ids"] else RecentIds()
+    fresh = recent.filter_new(valid['transaction_id'].values, valid['timestamp'].values)
+    repeats = int((~fresh).sum())
+    valid = valid[fresh]
+
+    sketches.update(valid)
+    save_sketch_state({"offset": offset, "header": header, "parts": parts, "recent_ids": recent.to_dict()},
+                      sketches, state_file)
+    publish_live_views(sketches)
+
+    print(f"✅ {len(valid)} events sketched ({len(rejected)} rejected, {repeats} repeated ids skipped). "
+          f"~{sketches.customers.estimate():.0f} distinct customers, ~{sketches.orders.estimate():.0f} orders.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bounded-memory sketches over the POS stream")
+    parser.add_argument("--merge", nargs="+", metavar="SKETCH_FILE",
+                        help="Merge worker/partition sketch files and publish the global views")
+    args = parser.parse_args()
+
+    if args.merge:
+        publish_live_views(merge_sketch_files(args.merge))
+        print(f"✅ Merged {len(args.merge)} sketch file(s).")
+    else:
+        run_streaming_sketches()
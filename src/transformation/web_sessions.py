@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from arrow_io import save_table, load_table, table_exists, record_read
+from bronze_io import latest_snapshot, INGESTION_COLUMNS, WEB_LOGS_SINK
+
+# Configuration
+DATA_DIR = "data"
+WEB_LOGS_FILE = f"{DATA_DIR}/silo_web_logs.json"   # JSON array, or .jsonl for large days
+SILVER_POS_PATH = f"{DATA_DIR}/silver_pos_transactions.csv"
+GOLD_WEB_SESSIONS = f"{DATA_DIR}/gold_web_sessions.csv"
+GOLD_WEB_FUNNEL = f"{DATA_DIR}/gold_web_funnel.csv"
+GOLD_WEB_CONVERSIONS = f"{DATA_DIR}/gold_web_checkout_conversions.csv"
+
+SESSION_GAP = pd.Timedelta(minutes=30)          # Inactivity that ends a session
+ATTRIBUTION_WINDOW = pd.Timedelta(hours=2)      # Checkout -> POS sale match window
+CHUNK_ROWS = 1_000_000
+FUNNEL_STEPS = {'view_product': 'viewed', 'add_to_cart': 'carted', 'checkout': 'checked_out'}
+
+
+def read_event_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Yields clickstream chunks in event-time order. A JSON array is loaded,
+    sorted globally and then sliced; JSON Lines are streamed as written and
+    must already be time-ordered (see Sessionizer).
+    """
+    record_read(0, os.path.getsize(path))
+    if path.endswith(".jsonl"):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False):
+            record_read(len(chunk), 0)
+            yield chunk.drop(columns=INGESTION_COLUMNS, errors='ignore')
+        return
+
+    with open(path) as f:
+        events = pd.DataFrame(json.load(f))
+    record_read(len(events), 0)
+    if events.empty:
+        return
+    order = np.argsort(pd.to_datetime(events['timestamp'], format='mixed').values, kind='stable')
+    events = events.iloc[order].reset_index(drop=True)
+    for start in range(0, len(events), chunk_rows):
+        yield events.iloc[start:start + chunk_rows]
+
+
+class Sessionizer:
+    """
+    Sort-based sessionization that runs chunk by chunk. Per user only the last
+    event time and session id are carried between chunks, so sessions that
+    straddle a chunk boundary continue with the same id.
+
+    Chunks must arrive in event-time order. An event older than its user's
+    carried last event can't be placed in an earlier chunk's session, so it
+    opens a new session and is counted in `out_of_order`.
+    """
+
+    def __init__(self, gap=SESSION_GAP):
+        self.gap = gap
+        self.carry = pd.DataFrame({'last_ts': pd.Series(dtype='datetime64[ns]'),
+                                   'session_id': pd.Series(dtype=np.int64)})
+        self.next_id = 0
+        self.out_of_order = 0
+
+    def assign(self, chunk):
+        df = chunk.copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed')
+        df = df.sort_values(['user_id', 'timestamp'], kind='stable').reset_index(drop=True)
+
+        users = df['user_id'].values
+        ts = df['timestamp']
+        first_in_chunk = np.r_[True, users[1:] != users[:-1]]
+
+        # Previous event time: within the chunk, or carried over for the user's first row
+        prev_ts = ts.shift()
+        carried_ts = df['user_id'].map(self.carry['last_ts'])
+        prev_ts = prev_ts.where(~first_in_chunk, carried_ts)
+
+        backwards = first_in_chunk & (ts < carried_ts).values
+        self.out_of_order += int(backwards.sum())
+
+        new_session = (prev_ts.isna() | ((ts - prev_ts) > self.gap)).values | backwards
+        new_ids = self.next_id + np.cumsum(new_session) - 1
+        session_id = pd.Series(np.where(new_session, new_ids, np.nan))
+
+        continuing = first_in_chunk & ~new_session
+        session_id[continuing] = df.loc[continuing, 'user_id'].map(self.carry['session_id']).values
+        # Every user's block starts with a known id, so forward fill stays within the user
+        df['web_session_id'] = session_id.ffill().astype(np.int64).values
+        self.next_id += int(new_session.sum())
+
+        last = df.groupby('user_id').tail(1).set_index('user_id')
+        update = pd.DataFrame({'last_ts': last['timestamp'], 'session_id': last['web_session_id']})
+        kept = self.carry[~self.carry.index.isin(update.index)]
+        self.carry = pd.concat([kept, update]) if not kept.empty else update
+        return df
+
+
+def session_partials(df):
+    """Per-session partial aggregates for one chunk (combined across chunks later)."""
+    flags = pd.get_dummies(df['action']).reindex(columns=list(FUNNEL_STEPS) + ['login'], fill_value=False)
+    df = pd.concat([df, flags.astype(np.int64)], axis=1)
+
+    sessions = df.groupby('web_session_id').agg(
+        user_id=('user_id', 'first'),
+        device=('device', 'first'),
+        session_start=('timestamp', 'min'),
+        session_end=('timestamp', 'max'),
+        events=('action', 'size'),
+        views=('view_product', 'sum'),
+        add_to_carts=('add_to_cart', 'sum'),
+        checkouts=('checkout', 'sum'),
+        logins=('login', 'sum')
+    ).reset_index()
+
+    steps = df.groupby(['web_session_id', 'product_id', 'device'])[list(FUNNEL_STEPS)].max().reset_index()
+    checkouts = df.loc[df['action'] == 'checkout', ['web_session_id', 'user_id', 'product_id', 'device', 'timestamp']]
+    return sessions, steps, checkouts
+
+
+def combine_sessions(parts):
+    sessions = pd.concat(parts, ignore_index=True)
+    sessions = sessions.groupby('web_session_id').agg(
+        user_id=('user_id', 'first'),
+        device=('device', 'first'),
+        session_start=('session_start', 'min'),
+        session_end=('session_end', 'max'),
+        events=('events', 'sum'),
+        views=('views', 'sum'),
+        add_to_carts=('add_to_carts', 'sum'),
+        checkouts=('checkouts', 'sum'),
+        logins=('logins', 'sum')
+    ).reset_index()
+    sessions['duration_sec'] = (sessions['session_end'] - sessions['session_start']).dt.total_seconds()
+    return sessions
+
+
+def build_funnel(step_parts):
+    """Sessions reaching view -> cart -> checkout per product and device."""
+    steps = pd.concat(step_parts, ignore_index=True)
+    steps = steps.groupby(['web_session_id', 'product_id', 'device'])[list(FUNNEL_STEPS)].max()
+    # A session only counts at a step if it also reached every earlier step
+    steps = steps.cummin(axis=1)
+    funnel = steps.groupby(['product_id', 'device']).sum().rename(
+        columns={k: f"sessions_{v}" for k, v in FUNNEL_STEPS.items()}
+    ).reset_index()
+
+    funnel['view_to_cart'] = (funnel['sessions_carted'] / funnel['sessions_viewed']).fillna(0).round(4)
+    funnel['cart_to_checkout'] = (funnel['sessions_checked_out'] / funnel['sessions_carted']).fillna(0).round(4)
+    return funnel
+
+
+def match_checkouts_to_pos(checkouts, df_pos):
+    """
+    First POS sale by the same customer within the attribution window after
+    each web checkout (merge_asof, so it's one sorted pass).
+    """
+    if checkouts.empty or df_pos.empty:
+        return checkouts.assign(transaction_id=None, total_amount=np.nan, sale_timestamp=pd.NaT,
+                                same_product=False, converted=False)
+
+    pos = df_pos[['customer_id', 'timestamp', 'transaction_id', 'total_amount', 'product_id']].rename(
+        columns={'customer_id': 'user_id', 'timestamp': 'sale_timestamp', 'product_id': 'sale_product_id'}
+    )
+    pos['sale_timestamp'] = pd.to_datetime(pos['sale_timestamp'])
+    pos = pos.sort_values('sale_timestamp')
+
+    matched = pd.merge_asof(
+        checkouts.sort_values('timestamp'), pos,
+        left_on='timestamp', right_on='sale_timestamp', by='user_id',
+        direction='forward', tolerance=ATTRIBUTION_WINDOW
+    )
+    matched['converted'] = matched['transaction_id'].notna()
+    matched['same_product'] = matched['product_id'] == matched['sale_product_id']
+    return matched.drop(columns='sale_product_id')
+
+
+def run_web_sessions(path=None, chunk_rows=CHUNK_ROWS):
+    print("🖱️ STARTING: Web Sessionization & Funnel...")
+
+    # Default: the newest snapshot (Bronze part from the ingestion service, else the silo)
+    path = path or latest_snapshot(WEB_LOGS_SINK, WEB_LOGS_FILE)
+
+    if not os.path.exists(path):
+        print("⚠️ No web logs found. Skipping.")
+        return
+
+    sessionizer = Sessionizer()
+    session_parts, step_parts, checkout_parts = [], [], []
+
+    for chunk in read_event_chunks(path, chunk_rows):
+        if chunk.empty:
+            continue
+        sessions, steps, checkouts = session_partials(sessionizer.assign(chunk))
+        session_parts.append(sessions)
+        step_parts.append(steps)
+        checkout_parts.append(checkouts)
+
+    if not session_parts:
+        print("⚠️ Web logs are empty. Skipping.")
+        return
+
+    if sessionizer.out_of_order:
+        print(f"⚠️ {sessionizer.out_of_order} event(s) arrived before their user's previous chunk; "
+              f"they started new sessions. Sort JSON Lines input by timestamp for exact sessions.")
+
+    sessions = combine_sessions(session_parts)
+    funnel = build_funnel(step_parts)
+    df_pos = load_table(SILVER_POS_PATH) if table_exists(SILVER_POS_PATH) else pd.DataFrame()
+    conversions = match_checkouts_to_pos(pd.concat(checkout_parts, ignore_index=True), df_pos)
+
+    save_table(sessions, GOLD_WEB_SESSIONS)
+    save_table(funnel, GOLD_WEB_FUNNEL)
+    save_table(conversions, GOLD_WEB_CONVERSIONS)
+
+    print(f"✅ {len(sessions)} sessions, {len(conversions)} checkouts "
+          f"({int(conversions['converted'].sum())} matched to POS sales).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Web sessionization, funnel and POS join")
+    parser.add_argument("--input", default=None,
+                        help="Clickstream JSON array or JSON Lines file (default: latest web-log snapshot)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    run_web_sessions(args.input, args.chunk_rows)
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Stage scripts import their siblings directly (as they do when run from the repo root)
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+for package in ("transformation", "ingestion", "orchestration", "models"):
+    sys.path.insert(0, os.path.abspath(os.path.join(SRC_DIR, package)))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Runs the test from an empty working dir, so stages write to tmp_path/data."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def pos_transactions():
+    """Cleaned Silver-shaped POS rows: 5 stores, 40 customers, ~4 months."""
+    rng = np.random.default_rng(7)
+    n = 600
+    return pd.DataFrame({
+        "transaction_id": [f"T{i:05d}" for i in range(n)],
+        "store_id": rng.choice([f"S{i:03d}" for i in range(1, 6)], n),
+        "product_id": rng.choice([f"P{i:03d}" for i in range(1, 21)], n),
+        "quantity": rng.integers(1, 4, n),
+        "total_amount": rng.uniform(100, 5000, n).round(2),
+        "payment_mode": rng.choice(["UPI", "Cash"], n),
+        "timestamp": pd.Timestamp("2026-06-01") + pd.to_timedelta(rng.integers(0, 120 * 86400, n), unit="s"),
+        "customer_id": rng.choice([f"C{i:03d}" for i in range(1, 41)], n),
+    })
+
+
+@pytest.fixture
+def silver_feed(data_dir):
+    """Appends rows to the POS silo and runs the incremental Silver stage; returns Silver."""
+    from arrow_io import load_table
+    from process_silver_layer import SILO_POS_FILE, SILVER_POS_FILE, run_pos_silver
+
+    def feed(rows):
+        rows.to_csv(SILO_POS_FILE, mode="a", header=not os.path.exists(SILO_POS_FILE), index=False)
+        run_pos_silver()
+        return load_table(SILVER_POS_FILE)
+
+    return feed
+
+
+@pytest.fixture
+def reference_data(data_dir):
+    """Warehouse silo and product dimension matching pos_transactions' products."""
+    products = [f"P{i:03d}" for i in range(1, 21)]
+    pd.DataFrame({
+        "warehouse_id": np.repeat(["Mumbai_WH", "Delhi_WH"], len(products)),
+        "product_id": products * 2,
+        "stock_level": np.arange(2 * len(products)) * 5,
+        "last_restocked": "2026-09-01",
+    }).to_csv(data_dir / "silo_warehouse.csv", index=False)
+    pd.DataFrame({
+        "product_id": products,
+        "product_name": [f"Product {p}" for p in products],
+        "category": "Clothing",
+    }).to_csv(data_dir / "dim_products.csv", index=False)
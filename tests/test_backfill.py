@@ -0,0 +1,58 @@
+import sqlite3
+
+import pandas as pd
+
+import backfill
+import customer_analytics
+import gold_kpi_logic
+import inventory_health
+from arrow_io import load_table, save_table, load_table_metadata
+from gold_kpi_logic import generate_gold_layer
+from gold_publisher import read_manifest
+from process_silver_layer import SILO_POS_FILE, SILVER_POS_FILE, run_silver_transformation
+from silver_changes import load_silver_state
+from silver_store import SILVER_DB
+
+GOLD_TABLES = [gold_kpi_logic.GOLD_DAILY_SALES, gold_kpi_logic.GOLD_CUSTOMER_METRICS,
+               gold_kpi_logic.GOLD_INV_HEALTH, gold_kpi_logic.GOLD_MARKET_BASKET]
+
+
+def by_id(df):
+    return df.sort_values("transaction_id").reset_index(drop=True)
+
+
+def test_backfill_replaces_the_range_in_live_silver_and_rebuilds_state(reference_data, pos_transactions,
+                                                                       silver_feed):
+    pos_transactions.to_csv(SILO_POS_FILE, index=False)
+    run_silver_transformation()
+    generate_gold_layer()
+    expected_silver = by_id(load_table(SILVER_POS_FILE))
+    expected_gold = {path: load_table(path) for path in GOLD_TABLES}
+
+    # Live Silver drifted from Bronze inside July: altered rows and a row Bronze never had
+    silver = load_table(SILVER_POS_FILE)
+    july = backfill.range_mask(silver["timestamp"], "2026-07-01", "2026-07-31")
+    silver.loc[july, "quantity"] += 100
+    stray = silver[july].head(1).assign(transaction_id="X00001")
+    save_table(pd.concat([silver, stray], ignore_index=True), SILVER_POS_FILE)
+    generation = load_silver_state()["generation"]
+
+    assert backfill.run_backfill("2026-07-01", "2026-07-31", workers=1)
+
+    pd.testing.assert_frame_equal(by_id(load_table(SILVER_POS_FILE)), expected_silver)
+    with sqlite3.connect(SILVER_DB) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM pos_transactions").fetchone()[0] == len(expected_silver)
+    for path, expected in expected_gold.items():
+        pd.testing.assert_frame_equal(load_table(path), expected)
+
+    # State was rebuilt against a new Silver generation, and the result was published
+    head = load_silver_state()["generation"]
+    assert head != generation
+    assert load_table_metadata(inventory_health.VELOCITY_STATE)["cursor"]["generation"] == head
+    assert customer_analytics.load_state()[2]["generation"] == head
+    assert read_manifest() is not None
+
+    # The Silver stage carries on incrementally from where it was
+    new_rows = pos_transactions.iloc[:5].assign(transaction_id=lambda d: "N" + d["transaction_id"])
+    assert len(silver_feed(new_rows)) == len(expected_silver) + 5
+    assert load_silver_state()["generation"] == head
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+import customer_analytics
+from arrow_io import arrow_path
+from customer_analytics import build_customer_analytics
+
+
+def sort_customers(customers):
+    return customers.sort_values("customer_id").reset_index(drop=True)
+
+
+def load_partition_times():
+    return {p: os.stat(arrow_path(customer_analytics.partition_paths(p)[0])).st_mtime_ns
+            for p in range(customer_analytics.CUSTOMER_PARTITIONS)}
+
+
+def test_incremental_state_matches_full_refresh_with_late_store(silver_feed, pos_transactions):
+    # One store's rows reach Silver last, with timestamps older than rows already seen
+    late = pos_transactions["store_id"] == "S003"
+    on_time = pos_transactions[~late].sort_values("timestamp")
+    cuts = [0, len(on_time) // 3, 2 * len(on_time) // 3, len(on_time)]
+
+    for start, end in zip(cuts, cuts[1:]):
+        build_customer_analytics(silver_feed(on_time.iloc[start:end]))
+    silver = silver_feed(pos_transactions[late])
+    customers, rfm, retention = build_customer_analytics(silver)
+
+    full_customers, full_rfm, full_retention = build_customer_analytics(silver, full_refresh=True)
+
+    pd.testing.assert_frame_equal(sort_customers(customers), sort_customers(full_customers))
+    pd.testing.assert_frame_equal(
+        rfm.sort_values("customer_id").reset_index(drop=True),
+        full_rfm.sort_values("customer_id").reset_index(drop=True)
+    )
+    pd.testing.assert_frame_equal(retention.reset_index(drop=True), full_retention.reset_index(drop=True))
+    assert customers["frequency"].sum() == len(pos_transactions)
+
+
+def test_corrected_transaction_replaces_the_original(silver_feed, pos_transactions):
+    build_customer_analytics(silver_feed(pos_transactions))
+    before = load_partition_times()
+
+    # Same transaction_id re-sent with a new amount and a different customer
+    original = pos_transactions.iloc[0]
+    other = next(c for c in pos_transactions["customer_id"] if c != original["customer_id"])
+    corrected = pos_transactions.iloc[[0]].assign(total_amount=original["total_amount"] + 1000, customer_id=other)
+    customers, _, _ = build_customer_analytics(silver_feed(corrected))
+
+    expected = pos_transactions.copy()
+    expected.loc[expected.index[0], ["total_amount", "customer_id"]] = [original["total_amount"] + 1000, other]
+    by_customer = expected.groupby("customer_id")["total_amount"].sum()
+    monetary = customers.set_index("customer_id")["monetary"]
+    for customer in (original["customer_id"], other):
+        assert monetary[customer] == pytest.approx(by_customer[customer])
+    assert customers["frequency"].sum() == len(pos_transactions)
+
+    # Only the partitions of the two affected customers were rewritten
+    touched = {p for p, mtime in load_partition_times().items() if mtime != before[p]}
+    assert touched == set(customer_analytics.partition_of([original["customer_id"], other]))
+
+
+def test_rerun_without_new_rows_is_a_no_op(data_dir, pos_transactions):
+    first, _, _ = build_customer_analytics(pos_transactions)
+    again, _, _ = build_customer_analytics(pos_transactions)
+    pd.testing.assert_frame_equal(sort_customers(first), sort_customers(again))
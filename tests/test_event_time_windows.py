@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+import pytest
+
+import event_time_windows
+from arrow_io import load_table, load_table_metadata
+from event_time_windows import EventTimeWindowAggregator, run_streaming_windows
+
+NOW = pd.Timestamp("2026-10-01")
+
+
+def sale(transaction_id, timestamp, amount, store_id="S001", quantity=1):
+    return {"transaction_id": transaction_id, "store_id": store_id, "product_id": "P001",
+            "quantity": quantity, "total_amount": amount, "timestamp": pd.Timestamp(timestamp),
+            "customer_id": "C001", "payment_mode": "UPI"}
+
+
+def window(agg, date, store_id="S001"):
+    return agg.windows.loc[(pd.Timestamp(date), store_id)]
+
+
+def test_repeated_transaction_is_counted_once():
+    agg = EventTimeWindowAggregator()
+    agg.process_batch(pd.DataFrame([sale("T1", "2026-09-20 10:00", 100.0)]), now=NOW)
+    deltas, rejected = agg.process_batch(
+        pd.DataFrame([sale("T1", "2026-09-20 10:00", 100.0), sale("T2", "2026-09-20 11:00", 50.0)]), now=NOW
+    )
+
+    assert window(agg, "2026-09-20")["orders"] == 2
+    assert window(agg, "2026-09-20")["revenue"] == 150.0
+    assert rejected["reject_reason"].tolist() == ["duplicate"]
+    assert deltas["orders_delta"].tolist() == [1]
+
+
+def test_correction_replaces_the_earlier_contribution():
+    agg = EventTimeWindowAggregator()
+    agg.process_batch(pd.DataFrame([sale("T1", "2026-09-20 10:00", 100.0)]), now=NOW)
+    # Re-sent with a new amount and moved to another store
+    deltas, _ = agg.process_batch(pd.DataFrame([sale("T1", "2026-09-20 10:00", 80.0, store_id="S002")]), now=NOW)
+
+    assert window(agg, "2026-09-20", "S001")["orders"] == 0
+    assert window(agg, "2026-09-20", "S002")["revenue"] == 80.0
+    assert sorted(deltas["revenue_delta"]) == [-100.0, 80.0]
+
+
+def test_seen_ids_are_dropped_once_their_window_closes():
+    agg = EventTimeWindowAggregator(allowed_lateness=pd.Timedelta(hours=12))
+    agg.process_batch(pd.DataFrame([sale("T1", "2026-09-20 10:00", 100.0)]), now=NOW)
+    agg.process_batch(pd.DataFrame([sale("T2", "2026-09-25 10:00", 10.0)]), now=NOW)
+
+    assert agg.seen.index.tolist() == ["T2"]
+
+
+def write_silo(rows):
+    rows.to_csv(event_time_windows.SOURCE_FILE, mode="a", index=False,
+                header=not os.path.exists(event_time_windows.SOURCE_FILE))
+
+
+def test_crash_before_commit_does_not_double_count(data_dir, pos_transactions, monkeypatch):
+    rows = pos_transactions.sort_values("timestamp")
+    write_silo(rows.iloc[:300])
+    run_streaming_windows()
+    write_silo(rows.iloc[300:])
+
+    # The run dies after appending its deltas, before the windows table commits the batch
+    real_save_table = event_time_windows.save_table
+
+    def crash_on_windows(df, path, metadata=None):
+        if path == event_time_windows.WINDOWS_FILE:
+            raise OSError("disk full")
+        real_save_table(df, path, metadata)
+
+    monkeypatch.setattr(event_time_windows, "save_table", crash_on_windows)
+    with pytest.raises(OSError):
+        run_streaming_windows()
+    monkeypatch.setattr(event_time_windows, "save_table", real_save_table)
+    run_streaming_windows()
+
+    windows = load_table(event_time_windows.WINDOWS_FILE)
+    assert windows["orders"].sum() == len(pos_transactions)
+    assert windows["revenue"].sum() == pytest.approx(pos_transactions["total_amount"].sum())
+
+    deltas = pd.read_csv(event_time_windows.DELTAS_FILE)
+    assert deltas["batch_id"].tolist() == sorted(deltas["batch_id"])
+    assert deltas["orders_delta"].sum() == len(pos_transactions)
+    assert load_table_metadata(event_time_windows.WINDOWS_FILE)["batch"] == 2
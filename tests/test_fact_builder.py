@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+
+import fact_builder
+from arrow_io import save_table
+
+
+def stock_on(day):
+    """Warehouse state per day: levels drift, P004 is delisted on day 3, P005 listed on day 5."""
+    products = ["P001", "P002", "P003"] + (["P004"] if day < 3 else []) + (["P005"] if day >= 5 else [])
+    return pd.DataFrame({
+        "store_id": "Mumbai_WH",
+        "product_id": products,
+        "stock_level": [100 - 10 * day if p == "P001" else 50 + (day // 4) for p in products],
+        "last_restocked": "2026-09-01",
+    })
+
+
+def test_snapshots_round_trip_through_deltas_and_checkpoints(data_dir):
+    days = pd.date_range("2026-09-01", periods=10)
+    for i, day in enumerate(days):
+        save_table(stock_on(i), os.path.join(fact_builder.DATA_PATH, "silver_warehouse.csv"))
+        fact_builder.build_fact_inventory_snapshot(day)
+    # Re-running the latest day replaces it instead of adding another entry
+    fact_builder.build_fact_inventory_snapshot(days[-1])
+
+    manifest = fact_builder._load_snapshot_manifest()
+    assert [e["date"] for e in manifest["snapshots"]] == [str(d.date()) for d in days]
+    assert [e["kind"] for e in manifest["snapshots"]] == ["full"] + ["delta"] * 6 + ["full"] + ["delta"] * 2
+    assert manifest["snapshots"][1]["rows"] == 1   # Only P001 moved
+
+    for i, day in enumerate(days):
+        state = fact_builder.read_inventory_as_of(day).drop(columns="snapshot_date")
+        expected = stock_on(i).drop(columns="last_restocked")
+        pd.testing.assert_frame_equal(
+            state.sort_values("product_id").reset_index(drop=True), expected, check_dtype=False
+        )
+
+    assert fact_builder.read_inventory_as_of("2026-08-31").empty
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import forecasting_engine
+from arrow_io import save_table, load_table
+
+
+def test_series_forecast_keeps_weekday_alignment_across_a_gap(data_dir):
+    # Monday peak, then two closed days without any sales before today's open day
+    days = pd.date_range("2026-06-01", "2026-07-26")
+    sales = pd.DataFrame({
+        "store_id": "S001",
+        "product_id": "P001",
+        "quantity": [10 if d.dayofweek == 0 else 1 for d in days] + [1],
+        "timestamp": list(days + pd.Timedelta(hours=12)) + [pd.Timestamp("2026-07-29 09:00")],
+    })
+    save_table(sales, forecasting_engine.SERIES_INPUT_FILE)
+
+    forecasting_engine.generate_series_forecast()
+
+    forecast = load_table(forecasting_engine.SERIES_OUTPUT_FILE)
+    assert pd.Timestamp(forecast["Date"].min()) == pd.Timestamp("2026-07-29")
+    peak = forecast.loc[forecast["Forecast_Quantity"].idxmax(), "Date"]
+    assert pd.Timestamp(peak).dayofweek == 0
+
+
+def test_incremental_revenue_model_matches_full_refit(data_dir):
+    rng = np.random.default_rng(3)
+    daily = pd.DataFrame({
+        "Date": pd.date_range("2026-03-01", periods=60),
+        "Total_Revenue": (1000 + 25 * np.arange(60) + rng.normal(0, 50, 60)).round(2),
+    })
+
+    # Closed days arrive over several cycles, then one more with a new open day
+    for end in (20, 35, 59, 60):
+        save_table(daily.iloc[:end], forecasting_engine.INPUT_FILE)
+        forecasting_engine.generate_forecast()
+    incremental = forecasting_engine.load_model_state()
+    incremental_forecast = load_table(forecasting_engine.OUTPUT_FILE)
+
+    os.remove(forecasting_engine.MODEL_STATE_FILE)
+    forecasting_engine.generate_forecast()
+    full = forecasting_engine.load_model_state()
+
+    np.testing.assert_allclose(incremental["coef"], full["coef"])
+    np.testing.assert_allclose(incremental["xtx"], full["xtx"])
+    pd.testing.assert_frame_equal(incremental_forecast, load_table(forecasting_engine.OUTPUT_FILE))
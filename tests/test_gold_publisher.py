@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+
+import gold_publisher
+from arrow_io import save_table, load_table
+
+
+def revenue(snapshot_dir):
+    path = gold_publisher.resolve_gold_path("gold_daily_sales.csv", snapshot_dir)
+    return load_table(path)["Total_Revenue"].tolist()
+
+
+def product_names(data_dir, name):
+    dim = pd.DataFrame({"product_id": ["P001"], "product_name": [name]})
+    dim.to_csv(data_dir / "dim_products.csv", index=False)
+
+
+def test_pinned_snapshot_keeps_its_version_while_writers_move_on(data_dir, monkeypatch):
+    monkeypatch.setattr(gold_publisher, "GC_GRACE_SECONDS", 0)
+    daily = str(data_dir / "gold_daily_sales.csv")
+    save_table(pd.DataFrame({"Date": ["2026-10-01"], "Total_Revenue": [100.0]}), daily)
+    product_names(data_dir, "Old")
+    (data_dir / "gold_daily_store_sales_deltas.csv").write_text("window_date,store_id\n")
+
+    first = gold_publisher.publish_gold_snapshot()
+    pinned = gold_publisher.current_snapshot_dir()
+    assert pinned.endswith(first)
+    assert "gold_daily_store_sales_deltas.csv" not in gold_publisher.read_manifest()["files"]
+
+    # Writers replace files (new inode) or rewrite dimensions in place after the publish
+    save_table(pd.DataFrame({"Date": ["2026-10-01"], "Total_Revenue": [250.0]}), daily)
+    product_names(data_dir, "New")
+
+    assert revenue(pinned) == [100.0]
+    dim = pd.read_csv(gold_publisher.resolve_gold_path("dim_products.csv", pinned))
+    assert dim["product_name"].tolist() == ["Old"]
+    # Files the snapshot doesn't hold come from the live data dir
+    funnel = gold_publisher.resolve_gold_path("gold_web_funnel.csv", pinned)
+    assert funnel == os.path.join("data", "gold_web_funnel.csv")
+
+    second = gold_publisher.publish_gold_snapshot()
+    assert revenue(gold_publisher.current_snapshot_dir()) == [250.0]
+
+    # Old versions are collected once they fall out of the retention window
+    keep = gold_publisher.KEEP_VERSIONS
+    versions = [second] + [gold_publisher.publish_gold_snapshot() for _ in range(keep)]
+    assert gold_publisher.read_manifest()["versions"] == versions[::-1][:keep]
+    assert not os.path.isdir(pinned)
@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+
+import inventory_health
+from arrow_io import arrow_path
+
+
+def test_folded_changes_match_a_rebuild(silver_feed, pos_transactions):
+    rows = pos_transactions.sort_values("timestamp").reset_index(drop=True)
+    late = rows.iloc[500:510]
+    on_time = rows.drop(late.index)
+
+    def refresh(batch):
+        return inventory_health.update_velocity_state(silver_feed(batch), date_col="timestamp")
+
+    refresh(on_time.iloc[:400])
+    refresh(on_time.iloc[400:])
+
+    # Late rows inside the window, plus a corrected re-send of an already counted row
+    corrected = on_time.iloc[[-3]].assign(quantity=on_time.iloc[-3]["quantity"] + 5)
+    buckets, _ = refresh(pd.concat([late, corrected]))
+
+    os.remove(arrow_path(inventory_health.VELOCITY_STATE))
+    rebuilt, _ = refresh(rows.iloc[0:0])
+
+    def sort_buckets(b):
+        b = b.assign(units=b["units"].astype(int))
+        return b.sort_values(["date"] + inventory_health.BUCKET_KEYS).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(sort_buckets(buckets), sort_buckets(rebuilt))
+    assert buckets["date"].min() > rows["timestamp"].max() - pd.Timedelta(days=inventory_health.VELOCITY_WINDOW_DAYS)
+    assert buckets["units"].sum() == rows.loc[rows["timestamp"].dt.normalize() >= buckets["date"].min(),
+                                              "quantity"].sum() + 5
@@ -0,0 +1,59 @@
+from contextlib import closing
+
+import pandas as pd
+
+import silver_store
+
+
+def test_pos_upserts_only_write_new_or_changed_rows(data_dir, pos_transactions):
+    db = str(data_dir / "silver.db")
+    rows = pos_transactions.iloc[:100]
+
+    assert silver_store.upsert_pos_transactions(rows, db) == 100
+    assert silver_store.upsert_pos_transactions(rows, db) == 0
+
+    # A correction and a new row; everything else is skipped by hash
+    corrected = rows.iloc[[10]].assign(quantity=rows.iloc[10]["quantity"] + 7)
+    batch = pd.concat([rows.iloc[:50], corrected, pos_transactions.iloc[[100]]])
+    assert silver_store.upsert_pos_transactions(batch, db) == 2
+
+    stored = silver_store.get_transaction(rows.iloc[10]["transaction_id"], db)
+    assert stored["quantity"].iloc[0] == corrected["quantity"].iloc[0]
+    assert stored["sale_date"].iloc[0] == f"{rows.iloc[10]['timestamp']:%Y-%m-%d}"
+
+    customer = rows.iloc[0]["customer_id"]
+    history = silver_store.customer_transactions(customer, db)
+    expected = pd.concat([rows, pos_transactions.iloc[[100]]])
+    assert len(history) == (expected["customer_id"] == customer).sum()
+    assert history["timestamp"].is_monotonic_increasing
+
+    latest = silver_store.recent_transactions(3, db)
+    assert list(latest["transaction_id"]) == list(
+        expected.sort_values("timestamp", ascending=False)["transaction_id"].iloc[:3]
+    )
+
+
+def test_deleted_rows_leave_the_database_and_the_hash_sidecar(data_dir, pos_transactions):
+    db = str(data_dir / "silver.db")
+    rows = pos_transactions.iloc[:20]
+    silver_store.upsert_pos_transactions(rows, db)
+
+    assert silver_store.delete_pos_transactions(["T00003", "T00004"], db) == 2
+    assert silver_store.get_transaction("T00003", db).empty
+    span = f"{rows['timestamp'].min():%Y-%m-%d}", f"{rows['timestamp'].max():%Y-%m-%d}"
+    assert len(silver_store.transactions_between(*span, db_path=db)) == 18
+
+    # Re-sent later, they count as new rows again
+    assert silver_store.upsert_pos_transactions(rows, db) == 2
+
+
+def test_warehouse_upsert_updates_in_place(data_dir):
+    db = str(data_dir / "silver.db")
+    stock = pd.DataFrame({"store_id": ["Mumbai_WH", "Delhi_WH"], "product_id": ["P001", "P001"],
+                          "stock_level": [10, 20], "last_restocked": pd.to_datetime(["2026-09-01"] * 2)})
+    silver_store.upsert_warehouse_stock(stock, db)
+    silver_store.upsert_warehouse_stock(stock.assign(stock_level=[15, 20]), db)
+
+    with closing(silver_store.connect_reader(db)) as conn:
+        levels = pd.read_sql_query("SELECT store_id, stock_level FROM warehouse_stock ORDER BY store_id", conn)
+    assert levels.values.tolist() == [["Delhi_WH", 20], ["Mumbai_WH", 15]]
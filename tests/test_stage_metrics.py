@@ -0,0 +1,27 @@
+import json
+
+import pipeline_runner
+import stage_metrics
+
+
+def test_failed_stage_is_recorded_and_stops_the_cycle(data_dir, monkeypatch):
+    ok = data_dir / "ok.py"
+    ok.write_text("print('ok')\n")
+    failing = data_dir / "failing.py"
+    failing.write_text("raise SystemExit(3)\n")
+    never = data_dir / "never.py"
+    never.write_text("open('never_ran', 'w').close()\n")
+
+    monkeypatch.setattr(pipeline_runner, "PIPELINE_STAGES",
+                        [("ok", str(ok), []), ("failing", str(failing), []), ("never", str(never), [])])
+    monkeypatch.setattr(pipeline_runner, "NIGHTLY_STAGES", [])
+    pipeline_runner.run_pipeline()
+
+    with open(stage_metrics.METRICS_JSONL) as f:
+        runs = [json.loads(line) for line in f]
+    assert [(r["stage"], r["exit_code"]) for r in runs] == [("ok", 0), ("failing", 3)]
+    assert runs[1]["wall_seconds"] is not None
+    assert not (data_dir.parent / "never_ran").exists()
+
+    with open(stage_metrics.METRICS_PROM) as f:
+        assert 'retailsetu_stage_exit_code{stage="failing"} 3' in f.read()
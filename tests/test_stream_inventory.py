@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+
+import stream_inventory
+from stream_inventory import StreamingInventoryState
+
+
+def write_warehouse(path, stock_level):
+    pd.DataFrame({"warehouse_id": ["Mumbai_WH"], "product_id": ["P001"],
+                  "stock_level": [stock_level]}).to_csv(path, index=False)
+
+
+def sale(i, quantity=1):
+    return {"transaction_id": f"T{i:05d}", "product_id": "P001", "quantity": quantity,
+            "timestamp": "2026-10-01 10:00:00"}
+
+
+def test_restock_is_checked_per_batch_or_interval_not_per_event(data_dir, monkeypatch):
+    warehouse = data_dir / "silo_warehouse.csv"
+    write_warehouse(warehouse, 30)
+    state = StreamingInventoryState(str(warehouse), str(data_dir / "alerts.csv"))
+
+    stats = []
+    real_getmtime = os.path.getmtime
+    monkeypatch.setattr(stream_inventory.os.path, "getmtime", lambda p: stats.append(p) or real_getmtime(p))
+    clock = [1000.0]
+    monkeypatch.setattr(stream_inventory.time, "monotonic", lambda: clock[0])
+    state._checked_at = clock[0]
+
+    # Single events within the interval don't touch the file
+    alerts = [a for i in range(15) for a in state.apply_event(sale(i))]
+    assert stats == []
+    assert [a["alert_type"] for a in alerts] == ["LOW_STOCK"]
+    assert state.stock["P001"] == 15
+
+    # A restock is picked up once the interval has passed
+    write_warehouse(warehouse, 500)
+    os.utime(warehouse, (real_getmtime(warehouse) + 5,) * 2)
+    clock[0] += stream_inventory.RESEED_CHECK_SECONDS
+    state.apply_event(sale(15))
+    assert state.stock["P001"] == 499
+
+    # A batch checks once up front, however many events it holds
+    stats.clear()
+    alerts = state.apply_events([sale(i, quantity=50) for i in range(16, 26)])
+    assert len(stats) == 1
+    assert [a["alert_type"] for a in alerts] == ["STOCK_OUT"]
+    assert len(pd.read_csv(data_dir / "alerts.csv")) == 2
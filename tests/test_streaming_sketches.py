@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+import streaming_sketches
+from arrow_io import load_table
+from streaming_sketches import RecentIds, run_streaming_sketches
+
+
+def write_silo(rows):
+    rows.to_csv(streaming_sketches.SOURCE_FILE, mode="a", index=False,
+                header=not os.path.exists(streaming_sketches.SOURCE_FILE))
+
+
+def test_resent_transactions_add_no_weight(data_dir, pos_transactions):
+    rows = pos_transactions.sort_values("timestamp")
+    write_silo(rows.iloc[:400])
+    run_streaming_sketches()
+    # Later rows plus re-sends of recent rows, from the last batch and this one
+    write_silo(pd.concat([rows.iloc[400:], rows.iloc[395:405], rows.iloc[590:]]))
+    run_streaming_sketches()
+
+    # 20 products fit the Space-Saving capacity, so its counts are exact
+    products = load_table(streaming_sketches.GOLD_LIVE_TOP_PRODUCTS).set_index("product_id")
+    expected = pos_transactions.groupby("product_id")["quantity"].sum()
+    pd.testing.assert_series_equal(products["est_quantity"].sort_index(), expected.astype(float),
+                                   check_names=False)
+
+    stores = load_table(streaming_sketches.GOLD_LIVE_TOP_STORES)
+    assert stores["est_revenue"].sum() == pytest.approx(pos_transactions["total_amount"].sum())
+
+
+def test_recent_ids_forget_ids_past_the_retention():
+    recent = RecentIds(retention=pd.Timedelta(hours=1))
+    recent.filter_new(["T1", "T2"], pd.to_datetime(["2026-09-01 10:00", "2026-09-01 10:30"]))
+    fresh = recent.filter_new(["T2", "T3", "T3"], pd.to_datetime(["2026-09-01 10:30"] + ["2026-09-01 11:15"] * 2))
+
+    assert fresh.tolist() == [False, True, False]
+    assert len(recent.hashes) == 2   # T1 fell out of the hour behind 11:15
+
+    restored = RecentIds.from_dict(recent.to_dict())
+    assert restored.filter_new(["T3"], pd.to_datetime(["2026-09-01 11:20"])).tolist() == [False]
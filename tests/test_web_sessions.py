@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from web_sessions import FUNNEL_STEPS, SESSION_GAP, Sessionizer, read_event_chunks, run_web_sessions
+
+
+def make_events(n=3000, seed=3):
+    """Unsorted clickstream, as in silo_web_logs.json."""
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-10-01") + pd.to_timedelta(rng.integers(0, 3 * 86400, n), unit="s")
+    return pd.DataFrame({
+        "user_id": rng.choice([f"C{i:03d}" for i in range(60)], n),
+        "action": rng.choice(list(FUNNEL_STEPS) + ["login"], n),
+        "product_id": rng.choice([f"P{i:03d}" for i in range(10)], n),
+        "device": rng.choice(["iOS", "Android", "Desktop"], n),
+        "timestamp": ts.astype(str),
+    })
+
+
+def read_gold(data_dir, name):
+    return feather.read_feather(data_dir / f"{name}.arrow")
+
+
+def test_chunked_json_array_matches_single_chunk(data_dir):
+    path = data_dir / "web_logs.json"
+    path.write_text(json.dumps(make_events().to_dict("records")))
+
+    results = []
+    for chunk_rows in (10_000, 97):
+        run_web_sessions(str(path), chunk_rows)
+        sessions = read_gold(data_dir, "gold_web_sessions").drop(columns="web_session_id")
+        funnel = read_gold(data_dir, "gold_web_funnel")
+        results.append((
+            sessions.sort_values(["user_id", "session_start"]).reset_index(drop=True),
+            funnel.sort_values(["product_id", "device"]).reset_index(drop=True),
+        ))
+
+    pd.testing.assert_frame_equal(results[0][0], results[1][0])
+    pd.testing.assert_frame_equal(results[0][1], results[1][1])
+    assert (results[0][0]["duration_sec"] >= 0).all()
+
+
+def test_out_of_order_jsonl_never_extends_a_session_backwards(data_dir):
+    path = data_dir / "web_logs.jsonl"
+    make_events().to_json(path, orient="records", lines=True)
+
+    sessionizer = Sessionizer()
+    parts = [sessionizer.assign(chunk) for chunk in read_event_chunks(str(path), 97)]
+    events = pd.concat(parts, ignore_index=True)
+
+    # Within a session, consecutive events are never further apart than the gap
+    events = events.sort_values(["web_session_id", "timestamp"])
+    gaps = events.groupby("web_session_id")["timestamp"].diff().dropna()
+    assert sessionizer.out_of_order > 0
+    assert (gaps <= SESSION_GAP).all()